@@ -1,5 +1,4 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List
 
 
 class Settings(BaseSettings):
@@ -27,6 +26,9 @@ class Settings(BaseSettings):
     AZURE_OPENAI_ENDPOINT: str | None = None
     AZURE_OPENAI_DEPLOYMENT_NAME: str = "gpt-4o"
     AZURE_OPENAI_API_VERSION: str = "2024-08-01-preview"
+    # 追加デプロイメント（JSON 配列: [{"endpoint": ..., "api_key": ..., "deployment": ..., "api_version": 任意}]）
+    # 指定すると既定のデプロイメントと合わせてラウンドロビンで振り分ける
+    AZURE_OPENAI_DEPLOYMENTS: list[dict] = []
 
     # Notion (optional)
     NOTION_API_KEY: str = ""
@@ -62,6 +64,7 @@ class Settings(BaseSettings):
     BACKEND_URL: str = "http://localhost:8000"
 
     # ACA App (minReplicas=1) - 常時起動Bot
+    # カンマ区切りで複数指定すると待機中 Bot のプールとして扱い、空いている App に振り分ける
     ACA_BOT_APP_URL: str | None = None     # e.g. "https://app-bot-tech0notta.internal.japaneast.azurecontainerapps.io"
     ACA_BOT_MODE: str = "job"              # "job" or "app"
 
@@ -77,6 +80,7 @@ class Settings(BaseSettings):
     # Application
     CORS_ORIGINS: str = "http://localhost:3000,http://localhost:3001,http://localhost:5173,https://tech0notta-frontend-sho-v2.vercel.app"
     MAX_FILE_SIZE_MB: int = 200
+    FFMPEG_MAX_CONCURRENCY: int | None = None  # 同時に実行する FFmpeg プロセス数（未指定時は CPU コア数）
 
     @property
     def azure_jwks_uri(self) -> str:
@@ -87,9 +91,15 @@ class Settings(BaseSettings):
         return f"https://login.microsoftonline.com/{self.AZURE_AD_TENANT_ID}/v2.0"
 
     @property
-    def cors_origins_list(self) -> List[str]:
+    def cors_origins_list(self) -> list[str]:
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
 
+    @property
+    def aca_bot_app_urls(self) -> list[str]:
+        if not self.ACA_BOT_APP_URL:
+            return []
+        return [url.strip().rstrip("/") for url in self.ACA_BOT_APP_URL.split(",") if url.strip()]
+
     @property
     def max_file_size_bytes(self) -> int:
         return self.MAX_FILE_SIZE_MB * 1024 * 1024
@@ -1,6 +1,8 @@
+import functools
 import logging
 import warnings
 
+import anyio
 from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
 from app.config import settings
@@ -37,6 +39,31 @@ def get_db():
         db.close()
 
 
+# 同期 DB 処理をスレッドで実行する際の同時実行上限（コネクションプールの上限に合わせる）
+DB_THREAD_LIMIT = engine_kwargs.get("pool_size", 5) + engine_kwargs.get("max_overflow", 10)
+_db_limiter: anyio.CapacityLimiter | None = None
+
+
+def _get_db_limiter() -> anyio.CapacityLimiter:
+    global _db_limiter
+    if _db_limiter is None:
+        _db_limiter = anyio.CapacityLimiter(DB_THREAD_LIMIT)
+    return _db_limiter
+
+
+async def run_db(func, *args, **kwargs):
+    """
+    同期 SQLAlchemy 処理をワーカースレッドで実行する。
+
+    async エンドポイントから呼ぶことでイベントループを塞がず、
+    共有の CapacityLimiter でプール枯渇時の待ちをスレッド側に閉じ込める。
+    """
+    return await anyio.to_thread.run_sync(
+        functools.partial(func, *args, **kwargs),
+        limiter=_get_db_limiter(),
+    )
+
+
 def init_db():
     # 新規テーブルモデルをインポートして登録
     import app.models.notification_db  # noqa: F401
@@ -1,7 +1,9 @@
+import asyncio
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
 from app.config import settings
 from app.database import init_db
 from app.routers import upload, transcribe, summarize, notion, chat, approval
@@ -28,16 +30,91 @@ async def lifespan(app: FastAPI):
     from app.services.bot_service import bot_service
     bot_service.warmup()
 
+    # Azure OpenAI への接続を裏で事前確立（起動はブロックしない）
+    if settings.AZURE_OPENAI_ENDPOINT:
+        from app.services.azure_openai import get_azure_openai_service
+        asyncio.get_running_loop().run_in_executor(None, get_azure_openai_service().warmup)
+
+    # 終了処理されずに残ったライブセッションを定期的に破棄
+    from app.services.live_transcription_service import live_transcription_service
+    live_reaper = asyncio.create_task(live_transcription_service.run_reaper())
+
     yield
 
+    live_reaper.cancel()
+
+    # 非同期 HTTP クライアントはイベントループが生きているうちに閉じる
+    from app.services.azure_speech_batch import close_azure_speech_batch_service
+    await close_azure_speech_batch_service()
+    await bot_service.aclose()
+    from app.services.notion import close_notion_service
+    await close_notion_service()
+
 
 app = FastAPI(
     title="Meeting Notes API",
     description="API for transcribing audio and creating meeting notes in Notion",
     version="1.0.0",
     lifespan=lifespan,
+    # レスポンスの JSON シリアライズを orjson で行う
+    default_response_class=ORJSONResponse,
 )
 
+# multipart の境界やヘッダー分として許容する上乗せ分
+_MULTIPART_OVERHEAD_BYTES = 1024 * 1024
+_MAX_REQUEST_BODY_BYTES = settings.max_file_size_bytes + _MULTIPART_OVERHEAD_BYTES
+
+
+class RequestBodySizeLimitMiddleware:
+    """
+    リクエストボディが上限を超えたら 413 で打ち切る ASGI ミドルウェア
+
+    Content-Length が上限を超える場合はボディを読まずに即座に拒否し、
+    chunked など Content-Length のないリクエストは receive() で受け取ったバイト数を数えて判定する。
+    （BaseHTTPMiddleware を使わず、リクエストごとのタスク・ストリーム生成を避ける）
+    """
+
+    def __init__(self, app, max_body_bytes: int):
+        self.app = app
+        self.max_body_bytes = max_body_bytes
+
+    def _too_large(self) -> HTTPException:
+        return HTTPException(
+            status_code=413,
+            detail=f"Request body exceeds maximum allowed size of {settings.MAX_FILE_SIZE_MB}MB"
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                if value.isdigit() and int(value) > self.max_body_bytes:
+                    error = self._too_large()
+                    response = JSONResponse(status_code=error.status_code, content={"detail": error.detail})
+                    await response(scope, receive, send)
+                    return
+                break
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_bytes:
+                    # ボディを読んでいるハンドラー側の例外処理で 413 レスポンスになる
+                    raise self._too_large()
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+# CORS ヘッダーを付与できるよう CORSMiddleware より内側（先）に登録する
+app.add_middleware(RequestBodySizeLimitMiddleware, max_body_bytes=_MAX_REQUEST_BODY_BYTES)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins_list,
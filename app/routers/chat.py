@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_db, run_db
 from app.auth import get_current_user
 from app.models.user import User
 from app.schemas.chat import (
@@ -20,6 +20,7 @@ from app.services.chat_service import (
     InvalidMessageError,
     ChatError
 )
+import asyncio
 import json
 import logging
 
@@ -37,7 +38,7 @@ async def create_chat_session(
     """チャットセッションを作成"""
     try:
         chat_service = ChatService(db)
-        session = chat_service.create_session(request.job_id)
+        session = await run_db(chat_service.create_session, request.job_id)
         
         return ChatSessionResponse(
             session_id=session.session_id,
@@ -68,7 +69,9 @@ async def send_chat_message(
         
         if request.streaming:
             # ストリーミングレスポンス
-            async def generate():
+            # DB 操作と OpenAI ストリームの受信はブロッキングのため同期ジェネレーターとし、
+            # StreamingResponse にスレッドプール上で反復させてイベントループを塞がない
+            def generate():
                 try:
                     for chunk in chat_service.send_message(
                         session_id, 
@@ -87,14 +90,17 @@ async def send_chat_message(
         
         else:
             # 非ストリーミングレスポンス
-            response_content = chat_service.send_message(
+            # DB 操作と OpenAI 呼び出しはブロッキングのためスレッドで実行する
+            # （LLM 応答待ちで DB 用のスレッド枠を占有しないよう run_db ではなく to_thread を使う）
+            response_content = await asyncio.to_thread(
+                chat_service.send_message,
                 session_id, 
                 request.message, 
                 streaming=False
             )
             
             # 最新のアシスタントメッセージを取得
-            messages = chat_service.get_messages(session_id)
+            messages = await run_db(chat_service.get_messages, session_id)
             latest_assistant_msg = next(
                 (msg for msg in reversed(messages) if msg.role == "assistant"),
                 None
@@ -130,8 +136,8 @@ async def get_chat_history(
     """チャット履歴を取得"""
     try:
         chat_service = ChatService(db)
-        session = chat_service.get_session(session_id)
-        messages = chat_service.get_messages(session_id)
+        session = await run_db(chat_service.get_session, session_id)
+        messages = await run_db(chat_service.get_messages, session_id)
         
         return ChatHistoryResponse(
             session_id=session.session_id,
@@ -163,7 +169,7 @@ async def list_chat_sessions(
     """セッション一覧を取得"""
     try:
         chat_service = ChatService(db)
-        sessions = chat_service.list_sessions(job_id)
+        sessions = await run_db(chat_service.list_sessions, job_id)
         
         return ChatSessionListResponse(
             sessions=[
@@ -2,16 +2,23 @@
 ライブ文字起こしAPIエンドポイント
 リアルタイム文字起こしセグメントの取得・送信用REST API
 """
+import asyncio
+import hashlib
 import logging
 from typing import Optional
 
 import uuid
 from datetime import datetime
 
-from fastapi import APIRouter, HTTPException, Query, File, UploadFile, Form, Depends, BackgroundTasks
+import orjson
+from fastapi import (
+    APIRouter, HTTPException, Query, File, UploadFile, Form, Depends, BackgroundTasks, Request, Response,
+    WebSocket, WebSocketDisconnect, status,
+)
+from fastapi.exceptions import RequestValidationError
 
 from app.timezone import jst_now
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 from sqlalchemy.orm import Session
 
 from app.services.live_transcription_service import (
@@ -78,6 +85,7 @@ async def get_live_sessions():
 
 @router.get("/segments/{session_id}", response_model=SegmentsResponse)
 async def get_segments(
+    request: Request,
     session_id: str,
     since_id: Optional[str] = Query(None, description="このID以降のセグメントを取得"),
     limit: int = Query(100, ge=1, le=500, description="最大取得数")
@@ -85,6 +93,9 @@ async def get_segments(
     """
     セッションの文字起こしセグメントを取得
     
+    ETag を返し、If-None-Match が一致する場合（新しいセグメントがない場合）は
+    304 Not Modified を返す。
+    
     Args:
         session_id: セッションID
         since_id: このID以降のセグメントを取得（差分取得用）
@@ -107,49 +118,122 @@ async def get_segments(
         else:
             raise HTTPException(status_code=404, detail="セッションが見つかりません")
     
+    # 前回から変化がなければシリアライズせずに 304 を返す
+    # ヘッダーは Latin-1 のみ許されるため、ID をそのまま入れず全体のハッシュにする
+    etag_source = f"{session_id}\x1e{session.revision}\x1e{session.last_segment_id}\x1e{since_id or ''}\x1e{limit}"
+    etag = f'"{hashlib.blake2b(etag_source.encode("utf-8"), digest_size=16).hexdigest()}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    
     segments = live_transcription_service.get_segments(
         session_id=session_id,
         since_id=since_id,
         limit=limit
     )
     
-    return SegmentsResponse(
-        session=SessionInfoResponse(
-            session_id=session.session_id,
-            meeting_id=session.meeting_id,
-            meeting_topic=session.meeting_topic,
-            started_at=session.started_at.isoformat(),
-            participant_count=session.participant_count,
-            segment_count=len(session.segments)
-        ),
-        segments=[
-            SegmentResponse(
-                id=seg.id,
-                speaker=seg.speaker,
-                speakerId=seg.speaker_id,
-                text=seg.text,
-                time=seg.time,
-                initials=seg.initials,
-                colorClass=seg.color_class
-            )
+    # ポーリングで最も頻繁に呼ばれるため、モデルを経由せず SegmentsResponse 形式の dict を
+    # 直接組み立てて orjson で 1 パスでシリアライズする（response_model は OpenAPI 用）
+    payload = {
+        "session": {
+            "session_id": session.session_id,
+            "meeting_id": session.meeting_id,
+            "meeting_topic": session.meeting_topic,
+            "started_at": session.started_at.isoformat(),
+            "participant_count": session.participant_count,
+            "segment_count": len(session.segments),
+        },
+        "segments": [
+            {
+                "id": seg.id,
+                "speaker": seg.speaker,
+                "speakerId": seg.speaker_id,
+                "text": seg.text,
+                "time": seg.time,
+                "initials": seg.initials,
+                "colorClass": seg.color_class,
+            }
             for seg in segments
         ],
-        total_count=len(session.segments)
+        "total_count": len(session.segments),
+    }
+    return Response(
+        content=orjson.dumps(payload),
+        media_type="application/json",
+        headers={"ETag": etag},
     )
 
 
-@router.post("/segments/{session_id}/push")
-async def push_segment(session_id: str, request: PushSegmentRequest):
+@router.websocket("/ws/{session_id}")
+async def stream_segments(
+    websocket: WebSocket,
+    session_id: str,
+    since_id: Optional[str] = None,
+):
+    """
+    セッションの新着セグメントを WebSocket で配信
+    
+    接続時に since_id 以降の既存セグメントを送り、その後は追加されるたびに
+    セグメント（TranscriptSegment.to_dict() 形式の JSON）を 1 フレームずつ送る。
+    セッションが削除されると接続を閉じる。
+    """
+    # 購読と既存分の取得を await を挟まずに行い、その間の追加を取りこぼさないようにする
+    queue = live_transcription_service.subscribe(session_id)
+    if queue is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="セッションが見つかりません")
+        return
+    backlog = live_transcription_service.get_segments(session_id, since_id=since_id, limit=500)
+    # 購読直後にワーカースレッドから追加された分は既存分とキューの両方に入り得るため、
+    # 既存分として送った ID はキューから来ても送らない
+    backlog_ids = {seg.id for seg in backlog}
+    
+    try:
+        await websocket.accept()
+        for seg in backlog:
+            await websocket.send_text(orjson.dumps(seg.to_dict()).decode())
+        
+        while True:
+            payload = await queue.get()
+            if payload is None:
+                await websocket.close()
+                break
+            if backlog_ids and payload["id"] in backlog_ids:
+                backlog_ids.discard(payload["id"])
+                continue
+            await websocket.send_text(orjson.dumps(payload).decode())
+    except WebSocketDisconnect:
+        logger.debug(f"WebSocket 切断: session={session_id}")
+    finally:
+        live_transcription_service.unsubscribe(session_id, queue)
+
+
+@router.post(
+    "/segments/{session_id}/push",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": PushSegmentRequest.model_json_schema()}},
+        }
+    },
+)
+async def push_segment(session_id: str, http_request: Request):
     """
     Botからセグメントを受信
     
     Args:
         session_id: セッションID
-        request: セグメントデータ
+        http_request: セグメントデータ（PushSegmentRequest 形式の JSON）
     
     Returns:
         追加されたセグメント
     """
+    # 生のボディを model_validate_json に渡し、JSON パースと検証を pydantic-core の 1 パスで行う
+    try:
+        request = PushSegmentRequest.model_validate_json(await http_request.body())
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**err, "loc": ("body", *err["loc"])} for err in e.errors(include_url=False)]
+        )
+
     # セッションが存在しない場合は自動作成
     session = live_transcription_service.get_session(session_id)
     
@@ -392,18 +476,17 @@ async def auto_summarize_background(job_id: str):
 
         logger.info(f"🤖 自動要約開始: job_id={job_id}")
 
-        # 要約生成
+        # 要約生成（SUMMARIZING は中間コミットせず、要約完了時にまとめてコミット）
         job.status = JobStatus.SUMMARIZING.value
-        job.updated_at = jst_now()
-        db.commit()
 
-        summary = get_azure_openai_service().generate_summary(job.transcription)
+        summary = await asyncio.to_thread(
+            get_azure_openai_service().generate_summary, job.transcription
+        )
 
         job.summary = summary
         job.status = JobStatus.SUMMARIZED.value
         job.updated_at = jst_now()
         db.commit()
-        db.refresh(job)
 
         logger.info(f"✅ 要約完了: job_id={job_id}")
 
@@ -437,17 +520,29 @@ async def finalize_session(
         session_id: セッションID
 
     Returns:
-        {"job_id": str, "segment_count": int}
+        {"job_id": str, "segment_count": int, "evicted_segment_count": int}
+        （evicted_segment_count > 0 の場合、会議冒頭の発言は保持上限を超えて破棄されている）
     """
     session = live_transcription_service.get_session(session_id)
+    evicted_count = 0
 
     # セッションが既に消えていても空のJobは作る（再起動後など）
     if session:
-        segments = session.segments
+        # Bot のワーカースレッドが追加中でも安全に走査できるようスナップショットを取る
+        segments = live_transcription_service.snapshot_segments(session_id)
         transcription_lines = [
             f"[{seg.time} {seg.speaker}]: {seg.text}"
             for seg in segments
         ]
+        evicted_count = session.evicted_count
+        if evicted_count:
+            logger.warning(
+                f"⚠️ 保持上限を超えたため冒頭 {evicted_count} 件のセグメントが文字起こしに含まれません: "
+                f"session_id={session_id}"
+            )
+            transcription_lines.insert(
+                0, f"（会議冒頭の {evicted_count} 件の発言は保持上限を超えたため含まれていません）"
+            )
         transcription_text = "\n".join(transcription_lines)
         meeting_topic = session.meeting_topic
         segment_count = len(segments)
@@ -479,7 +574,7 @@ async def finalize_session(
         background_tasks.add_task(auto_summarize_background, job_id)
         logger.info(f"🤖 自動要約をバックグラウンドでスケジュール: job_id={job_id}")
 
-    return {"job_id": job_id, "segment_count": segment_count}
+    return {"job_id": job_id, "segment_count": segment_count, "evicted_segment_count": evicted_count}
 
 
 @router.get("/health")
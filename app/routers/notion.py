@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from app.database import get_db
+from app.database import get_db, run_db
 from app.models.job import Job, JobStatus
 from app.services.notion_client import get_notion_service
 import logging
@@ -23,7 +23,7 @@ async def create_notion_page(
 ):
     job = None
     try:
-        job = db.query(Job).filter(Job.job_id == request.job_id).first()
+        job = await run_db(db.query(Job).filter(Job.job_id == request.job_id).first)
 
         if not job:
             raise HTTPException(status_code=404, detail="Job not found")
@@ -40,29 +40,31 @@ async def create_notion_page(
                 detail="Missing transcription or summary"
             )
 
-        job.status = JobStatus.CREATING_NOTION.value
-        db.commit()
-
+        # コミットで job が expire される前に必要な値を取り出しておく
         title = request.title or f"議事録 - {job.filename}"
+        transcription, summary, filename = job.transcription, job.summary, job.filename
+
+        job.status = JobStatus.CREATING_NOTION.value
+        await run_db(db.commit)
 
-        page_id, page_url = get_notion_service().create_meeting_note(
+        page_id, page_url = await get_notion_service().create_meeting_note(
             title=title,
-            transcription=job.transcription,
-            summary=job.summary,
-            audio_filename=job.filename
+            transcription=transcription,
+            summary=summary,
+            audio_filename=filename
         )
 
         job.notion_page_id = page_id
         job.notion_page_url = page_url
         job.status = JobStatus.COMPLETED.value
-        db.commit()
-        db.refresh(job)
+        await run_db(db.commit)
 
+        # コミット後に job を参照すると再 SELECT が走るため、設定済みの値で返す
         return {
-            "job_id": job.job_id,
-            "status": job.status,
-            "notion_page_id": job.notion_page_id,
-            "notion_page_url": job.notion_page_url,
+            "job_id": request.job_id,
+            "status": JobStatus.COMPLETED.value,
+            "notion_page_id": page_id,
+            "notion_page_url": page_url,
             "message": "Notion page created successfully"
         }
 
@@ -73,7 +75,7 @@ async def create_notion_page(
         if job is not None:
             job.status = JobStatus.FAILED.value
             job.error_message = str(e)
-            db.commit()
+            await run_db(db.commit)
         raise HTTPException(status_code=500, detail=f"Failed to create Notion page: {str(e)}")
 
 
@@ -83,7 +85,7 @@ async def get_job_status(
     db: Session = Depends(get_db)
 ):
     try:
-        job = db.query(Job).filter(Job.job_id == job_id).first()
+        job = await run_db(db.query(Job).filter(Job.job_id == job_id).first)
 
         if not job:
             raise HTTPException(status_code=404, detail="Job not found")
@@ -4,12 +4,14 @@ Zoom RTMS (Real-time Media Streams) ルーター
 Zoom RTMS Webhookを受信し、RTMSクライアントを起動する
 """
 from fastapi import APIRouter, Request, HTTPException
-from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from functools import lru_cache
+from typing import Dict, Any
 import logging
 import hmac
 import hashlib
-import json
+
+import orjson
+from cachetools import TTLCache
 
 from app.config import settings
 from app.services.rtms_client import rtms_manager
@@ -18,11 +20,14 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/rtms", tags=["rtms"])
 
+# 処理済みイベントのキー（Zoom のタイムアウト再送による二重処理を防ぐ）
+_processed_events: TTLCache = TTLCache(maxsize=1024, ttl=300)  # 5分
+
 
-class RTMSWebhookPayload(BaseModel):
-    """RTMS Webhookペイロード"""
-    event: str
-    payload: Dict[str, Any]
+@lru_cache(maxsize=1)
+def _hmac_base(secret_token: str) -> hmac.HMAC:
+    """鍵設定済みの HMAC オブジェクト（リクエストごとに copy() して鍵の初期化を省く）"""
+    return hmac.new(secret_token.encode('utf-8'), digestmod=hashlib.sha256)
 
 
 def verify_webhook_signature(request_body: bytes, signature: str, timestamp: str) -> bool:
@@ -31,12 +36,9 @@ def verify_webhook_signature(request_body: bytes, signature: str, timestamp: str
         logger.warning("ZOOM_WEBHOOK_SECRET_TOKEN が設定されていません")
         return True  # 開発環境では検証をスキップ
     
-    message = f"v0:{timestamp}:{request_body.decode('utf-8')}"
-    expected_signature = "v0=" + hmac.new(
-        settings.ZOOM_WEBHOOK_SECRET_TOKEN.encode('utf-8'),
-        message.encode('utf-8'),
-        hashlib.sha256
-    ).hexdigest()
+    mac = _hmac_base(settings.ZOOM_WEBHOOK_SECRET_TOKEN).copy()
+    mac.update(b"v0:" + timestamp.encode('utf-8') + b":" + request_body)
+    expected_signature = "v0=" + mac.hexdigest()
     
     return hmac.compare_digest(expected_signature, signature)
 
@@ -61,8 +63,8 @@ async def rtms_webhook(request: Request):
         raise HTTPException(status_code=401, detail="Invalid signature")
     
     try:
-        data = json.loads(body)
-    except json.JSONDecodeError:
+        data = orjson.loads(body)
+    except orjson.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Invalid JSON")
     
     event = data.get("event", "")
@@ -87,7 +89,20 @@ async def rtms_webhook(request: Request):
     
     # RTMS開始イベント
     if event == "rtms.started":
-        await handle_rtms_started(payload)
+        # 再送された同一イベントは RTMS クライアントを二重起動しないようスキップ
+        # （判定と登録の間に await がないため、イベントループ上でアトミック）
+        object_data = payload.get("object", {})
+        event_key = (event, object_data.get("meeting_id", ""), object_data.get("start_time", ""))
+        if event_key in _processed_events:
+            logger.info(f"⏭️ 重複したRTMS Webhookをスキップ: meeting_id={event_key[1]}")
+            return {"status": "ok", "deduped": True}
+        _processed_events[event_key] = True
+        try:
+            await handle_rtms_started(payload)
+        except Exception:
+            # 起動に失敗した場合は Zoom の再送で再試行できるよう処理済みから外す
+            _processed_events.pop(event_key, None)
+            raise
     
     # RTMS終了イベント
     elif event == "rtms.stopped":
@@ -1,12 +1,16 @@
 from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from app.database import get_db
+from app.database import SessionLocal, get_db, run_db
 from app.models.job import Job, JobStatus
 from app.services.azure_openai import get_azure_openai_service
+import asyncio
 import logging
 from datetime import datetime, date
 import json
+import orjson
 
 from app.timezone import jst_now
 
@@ -27,12 +31,10 @@ async def extract_metadata_background(job_id: str, db: Session):
         job = db.query(Job).filter(Job.job_id == job_id).first()
         if not job or not job.summary:
             return
-        
-        # ステータスを更新
-        job.status = JobStatus.EXTRACTING_METADATA.value
-        job.updated_at = jst_now()
-        db.commit()
-        
+
+        # EXTRACTING_METADATA はダッシュボード上 SUMMARIZED と同じ扱いのため中間コミットせず、
+        # 抽出完了時に REVIEWING への遷移として 1 回だけコミットする
+
         # メタデータ抽出
         from app.services.metadata_service import get_metadata_service
         metadata_service = get_metadata_service()
@@ -118,7 +120,7 @@ async def summarize_transcription(
 ):
     job = None
     try:
-        job = db.query(Job).filter(Job.job_id == request.job_id).first()
+        job = await run_db(db.query(Job).filter(Job.job_id == request.job_id).first)
 
         if not job:
             raise HTTPException(status_code=404, detail="Job not found")
@@ -132,10 +134,11 @@ async def summarize_transcription(
         if not job.transcription:
             raise HTTPException(status_code=400, detail="No transcription available")
 
-        job.status = JobStatus.SUMMARIZING.value
-        db.commit()
-
-        summary = get_azure_openai_service().generate_summary(
+        # 呼び出し元はレスポンスを待っているため SUMMARIZING は中間コミットせず、
+        # LLM 応答後に SUMMARIZED と要約をまとめて 1 回でコミットする
+        # generate_summary は同期 HTTP 呼び出しのため、イベントループを塞がないようスレッドで実行
+        summary = await asyncio.to_thread(
+            get_azure_openai_service().generate_summary,
             job.transcription,
             template_prompt=request.template_prompt
         )
@@ -143,23 +146,24 @@ async def summarize_transcription(
         job.summary = summary
         job.status = JobStatus.SUMMARIZED.value
         job.updated_at = jst_now()
-        db.commit()
-        db.refresh(job)
-        
+        await run_db(db.commit)
+
+        # コミット後の job 属性は expire 済みで、参照すると再 SELECT が走るため
+        # レスポンスは設定済みの値から組み立てる
         # MVP新機能: 自動でメタデータ抽出を実行
         if request.auto_extract_metadata:
-            background_tasks.add_task(extract_metadata_background, job.job_id, db)
+            background_tasks.add_task(extract_metadata_background, request.job_id, db)
             return {
-                "job_id": job.job_id,
-                "status": job.status,
-                "summary": job.summary,
+                "job_id": request.job_id,
+                "status": JobStatus.SUMMARIZED.value,
+                "summary": summary,
                 "message": "要約が完了しました。メタデータ抽出をバックグラウンドで実行中です。"
             }
 
         return {
-            "job_id": job.job_id,
-            "status": job.status,
-            "summary": job.summary,
+            "job_id": request.job_id,
+            "status": JobStatus.SUMMARIZED.value,
+            "summary": summary,
             "message": "Summary generated successfully"
         }
 
@@ -170,5 +174,104 @@ async def summarize_transcription(
         if job is not None:
             job.status = JobStatus.FAILED.value
             job.error_message = str(e)
-            db.commit()
+            await run_db(db.commit)
         raise HTTPException(status_code=500, detail="Failed to generate summary")
+
+
+def _save_streamed_summary(job_id: str, summary: str | None, error: str | None = None) -> bool:
+    """ストリーミング生成の結果を保存する（リクエストのセッションは配信開始前に閉じるため新規セッションを使う）"""
+    db = SessionLocal()
+    try:
+        job = db.query(Job).filter(Job.job_id == job_id).first()
+        if not job:
+            return False
+        if error is None:
+            job.summary = summary
+            job.status = JobStatus.SUMMARIZED.value
+        else:
+            job.status = JobStatus.FAILED.value
+            job.error_message = error
+        job.updated_at = jst_now()
+        db.commit()
+        return True
+    except Exception as e:
+        logger.error(f"Failed to save streamed summary for job {job_id}: {e}", exc_info=True)
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
+
+async def _extract_metadata_after_stream(job_id: str):
+    """ストリーミング完了後のメタデータ抽出（専用セッションで実行）"""
+    db = SessionLocal()
+    try:
+        await extract_metadata_background(job_id, db)
+    finally:
+        db.close()
+
+
+@router.post("/summarize/stream")
+async def summarize_transcription_stream(
+    request: SummarizeRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    要約を Server-Sent Events で逐次返す
+
+    生成されたトークンを `data: {"delta": ...}` として順に送り、
+    保存完了後に `event: done`（失敗時は `event: error`）を送る。
+    """
+    job = await run_db(db.query(Job).filter(Job.job_id == request.job_id).first)
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    if job.status != JobStatus.TRANSCRIBED.value:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Job is not in TRANSCRIBED status. Current status: {job.status}"
+        )
+
+    if not job.transcription:
+        raise HTTPException(status_code=400, detail="No transcription available")
+
+    job_id = request.job_id
+    transcription = job.transcription
+    template_prompt = request.template_prompt
+    service = get_azure_openai_service()
+
+    # 同期ジェネレーターは StreamingResponse がスレッドプールで反復するため、
+    # LLM のストリーム受信と保存処理でイベントループを塞がない
+    def event_stream():
+        parts: list[str] = []
+        try:
+            for content in service.generate_summary_streaming(
+                transcription, template_prompt=template_prompt
+            ):
+                parts.append(content)
+                yield b"data: " + orjson.dumps({"delta": content}) + b"\n\n"
+        except Exception as e:
+            logger.error(f"Error streaming summary: {e}", exc_info=True)
+            _save_streamed_summary(job_id, None, error=str(e))
+            yield b"event: error\ndata: " + orjson.dumps({"detail": "Failed to generate summary"}) + b"\n\n"
+            return
+
+        if not _save_streamed_summary(job_id, "".join(parts)):
+            yield b"event: error\ndata: " + orjson.dumps({"detail": "Failed to save summary"}) + b"\n\n"
+            return
+        yield b"event: done\ndata: " + orjson.dumps(
+            {"job_id": job_id, "status": JobStatus.SUMMARIZED.value}
+        ) + b"\n\n"
+
+    # メタデータ抽出は配信完了後に実行する（要約が保存されていなければ何もしない）
+    background = (
+        BackgroundTask(_extract_metadata_after_stream, job_id)
+        if request.auto_extract_metadata else None
+    )
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+        background=background
+    )
@@ -1,16 +1,69 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
+from sqlalchemy import bindparam, select, update
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from app.database import get_db
+from app.database import SessionLocal, get_db
 from app.models.job import Job, JobStatus
 from app.services.blob_storage import get_blob_storage_service
 from app.services.azure_speech_batch import get_azure_speech_batch_service
+from cachetools import TTLCache
+import asyncio
 import logging
+import orjson
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api", tags=["transcribe"])
 
+# ポーリングで頻繁に呼ばれるため、job_id 検索の SELECT はモジュールで一度だけ組み立てて
+# SQLAlchemy のコンパイル済みキャッシュを再利用する（job_id には unique index あり）
+_select_job_by_job_id = select(Job).where(Job.job_id == bindparam("job_id"))
+
+# 同じバッチジョブへの同時ポーリングは Azure への呼び出しを 1 回にまとめる（single-flight）
+_batch_status_inflight: dict[str, asyncio.Task] = {}
+# 直近のステータスを短時間だけ保持し、ポーリング間隔内の重複呼び出しを省く
+_batch_status_cache: TTLCache = TTLCache(maxsize=1024, ttl=2)
+
+
+async def _get_batch_status(transcription_job_id: str) -> dict:
+    """
+    バッチ文字起こしのステータスを取得する
+
+    同一 transcription_job_id への同時呼び出しは実行中のタスクを共有し、
+    完了後 2 秒間は結果をキャッシュから返す。
+    """
+    cached = _batch_status_cache.get(transcription_job_id)
+    if cached is not None:
+        return cached
+
+    task = _batch_status_inflight.get(transcription_job_id)
+    if task is None:
+        task = asyncio.ensure_future(
+            get_azure_speech_batch_service().get_transcription_status_async(transcription_job_id)
+        )
+        _batch_status_inflight[transcription_job_id] = task
+        task.add_done_callback(
+            lambda t: _finish_batch_status(transcription_job_id, t)
+        )
+    # 呼び出し元のキャンセルが共有タスクに波及しないよう shield する
+    return await asyncio.shield(task)
+
+
+def _finish_batch_status(transcription_job_id: str, task: asyncio.Task) -> None:
+    if _batch_status_inflight.get(transcription_job_id) is task:
+        del _batch_status_inflight[transcription_job_id]
+    if not task.cancelled() and task.exception() is None:
+        _batch_status_cache[transcription_job_id] = task.result()
+
+
+# SSE 配信: job_id ごとの購読者キュー、共有ポーリングタスク、最新イベント
+TRANSCRIBE_STREAM_INTERVAL_SECONDS = 5
+_stream_subscribers: dict[str, set[asyncio.Queue]] = {}
+_stream_watchers: dict[str, asyncio.Task] = {}
+_stream_latest: dict[str, dict] = {}
+
 
 class TranscribeRequest(BaseModel):
     job_id: str
@@ -21,36 +74,45 @@ async def transcribe_audio(
     request: TranscribeRequest,
     db: Session = Depends(get_db)
 ):
-    job = None
+    job: Optional[Job] = None
     try:
-        job = db.query(Job).filter(Job.job_id == request.job_id).first()
+        job = db.execute(_select_job_by_job_id, {"job_id": request.job_id}).scalar_one_or_none()
 
         if not job:
             raise HTTPException(status_code=404, detail="Job not found")
 
-        if job.status != JobStatus.UPLOADED.value:
+        # 同じジョブへの同時リクエストで Azure のバッチジョブを二重に作らないよう、
+        # UPLOADED → TRANSCRIBING を条件付き UPDATE で先に確保してから送信する
+        claimed = db.execute(
+            update(Job)
+            .where(Job.job_id == request.job_id, Job.status == JobStatus.UPLOADED.value)
+            .values(status=JobStatus.TRANSCRIBING.value, error_message=None)
+        ).rowcount
+        db.commit()
+        if claimed != 1:
+            db.refresh(job)
             raise HTTPException(
                 status_code=400,
                 detail=f"Job is not in UPLOADED status. Current status: {job.status}"
             )
 
-        job.status = JobStatus.TRANSCRIBING.value
-        job.error_message = None
-        db.commit()
+        blob_name = job.blob_name
 
-        blob_sas_url = get_blob_storage_service().get_blob_sas_url(job.blob_name)
-        transcription_id = get_azure_speech_batch_service().submit_transcription(
+        # Blob SDK 呼び出しはブロッキングなのでスレッドで実行し、バッチ送信は非同期クライアントで行う
+        blob_sas_url = await asyncio.to_thread(
+            get_blob_storage_service().get_blob_sas_url, blob_name
+        )
+        transcription_id = await get_azure_speech_batch_service().submit_transcription_async(
             blob_sas_url
         )
 
         job.transcription_job_id = transcription_id
         db.commit()
-        db.refresh(job)
 
         return {
-            "job_id": job.job_id,
-            "status": job.status,
-            "transcription_job_id": job.transcription_job_id,
+            "job_id": request.job_id,
+            "status": JobStatus.TRANSCRIBING.value,
+            "transcription_job_id": transcription_id,
             "message": "Transcription started"
         }
 
@@ -59,79 +121,172 @@ async def transcribe_audio(
     except Exception as e:
         logger.error(f"Error during transcription: {e}", exc_info=True)
         if job is not None:
+            # 途中の変更を破棄し、コミット失敗でセッションが無効になっていても失敗を記録できるようにする
+            db.rollback()
             job.status = JobStatus.FAILED.value
             job.error_message = str(e)
             db.commit()
         raise HTTPException(status_code=500, detail="Failed to transcribe audio")
 
 
-@router.get("/transcribe/status")
-async def transcribe_status(
-    job_id: str,
-    db: Session = Depends(get_db)
-):
-    try:
-        job = db.query(Job).filter(Job.job_id == job_id).first()
+async def _build_status_response(job: Job, db: Session) -> dict:
+    """
+    ジョブの文字起こし状態をレスポンス形式で返す
 
-        if not job:
-            raise HTTPException(status_code=404, detail="Job not found")
+    文字起こし中の場合は Azure のバッチ状態を確認し、完了・失敗への遷移があれば保存する。
+    """
+    if job.status == JobStatus.TRANSCRIBED.value:
+        return {
+            "job_id": job.job_id,
+            "status": job.status,
+            "transcription": job.transcription,
+        }
 
-        if job.status == JobStatus.TRANSCRIBED.value:
-            return {
-                "job_id": job.job_id,
-                "status": job.status,
-                "transcription": job.transcription,
-            }
+    if job.status == JobStatus.FAILED.value:
+        return {
+            "job_id": job.job_id,
+            "status": job.status,
+            "error_message": job.error_message,
+        }
 
-        if job.status == JobStatus.FAILED.value:
-            return {
-                "job_id": job.job_id,
-                "status": job.status,
-                "error_message": job.error_message,
-            }
+    if job.status != JobStatus.TRANSCRIBING.value:
+        return {"job_id": job.job_id, "status": job.status}
 
-        if job.status != JobStatus.TRANSCRIBING.value:
-            return {"job_id": job.job_id, "status": job.status}
+    if not job.transcription_job_id:
+        raise HTTPException(status_code=500, detail="Missing transcription job ID")
 
-        if not job.transcription_job_id:
-            raise HTTPException(status_code=500, detail="Missing transcription job ID")
+    batch_status = await _get_batch_status(job.transcription_job_id)
 
-        batch_status = get_azure_speech_batch_service().get_transcription_status(
+    if batch_status.get("status") == "Succeeded":
+        transcription = await get_azure_speech_batch_service().fetch_transcription_text_async(
             job.transcription_job_id
         )
+        job.transcription = transcription
+        job.status = JobStatus.TRANSCRIBED.value
+        db.commit()
+        db.refresh(job)
+        return {
+            "job_id": job.job_id,
+            "status": job.status,
+            "transcription": job.transcription,
+        }
 
-        if batch_status.get("status") == "Succeeded":
-            transcription = get_azure_speech_batch_service().fetch_transcription_text(
-                job.transcription_job_id
-            )
-            job.transcription = transcription
-            job.status = JobStatus.TRANSCRIBED.value
-            db.commit()
-            db.refresh(job)
-            return {
-                "job_id": job.job_id,
-                "status": job.status,
-                "transcription": job.transcription,
-            }
-
-        if batch_status.get("status") == "Failed":
-            job.status = JobStatus.FAILED.value
-            job.error_message = str(batch_status.get("error"))
-            db.commit()
-            return {
-                "job_id": job.job_id,
-                "status": job.status,
-                "error_message": job.error_message,
-            }
-
+    if batch_status.get("status") == "Failed":
+        job.status = JobStatus.FAILED.value
+        job.error_message = str(batch_status.get("error"))
+        db.commit()
         return {
             "job_id": job.job_id,
             "status": job.status,
-            "batch_status": batch_status.get("status"),
+            "error_message": job.error_message,
         }
 
+    return {
+        "job_id": job.job_id,
+        "status": job.status,
+        "batch_status": batch_status.get("status"),
+    }
+
+
+@router.get("/transcribe/status")
+async def transcribe_status(
+    job_id: str,
+    db: Session = Depends(get_db)
+):
+    try:
+        job = db.execute(_select_job_by_job_id, {"job_id": job_id}).scalar_one_or_none()
+
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+
+        return await _build_status_response(job, db)
+
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error checking transcription status: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to check transcription status")
+
+
+async def _watch_transcription(job_id: str) -> None:
+    """
+    job_id ごとに 1 つだけ動くポーリングタスク
+
+    一定間隔で状態を確認し、前回から変化したときだけ全購読者のキューへ配信する。
+    文字起こし中以外の状態になるか、購読者がいなくなったら終了する。
+    """
+    last_event: Optional[dict] = None
+    try:
+        while _stream_subscribers.get(job_id):
+            db = SessionLocal()
+            try:
+                job = db.execute(_select_job_by_job_id, {"job_id": job_id}).scalar_one_or_none()
+                if job is None:
+                    event = {"job_id": job_id, "status": "not_found"}
+                else:
+                    event = await _build_status_response(job, db)
+            except Exception as e:
+                logger.error(f"Error watching transcription status: {e}", exc_info=True)
+                event = {"job_id": job_id, "status": "error", "detail": "Failed to check transcription status"}
+            finally:
+                db.close()
+
+            if event != last_event:
+                last_event = event
+                _stream_latest[job_id] = event
+                for queue in _stream_subscribers.get(job_id, ()):
+                    queue.put_nowait(event)
+
+            if event["status"] != JobStatus.TRANSCRIBING.value:
+                break
+            await asyncio.sleep(TRANSCRIBE_STREAM_INTERVAL_SECONDS)
+    finally:
+        # 購読者にストリーム終了を通知（None は終端マーカー）
+        _stream_watchers.pop(job_id, None)
+        _stream_latest.pop(job_id, None)
+        for queue in _stream_subscribers.get(job_id, ()):
+            queue.put_nowait(None)
+
+
+@router.get("/transcribe/stream/{job_id}")
+async def transcribe_stream(
+    job_id: str,
+    db: Session = Depends(get_db)
+):
+    """
+    文字起こし状態を Server-Sent Events で配信する
+
+    同じ job_id の購読者は 1 つのポーリングタスクを共有するため、
+    接続数が増えても Azure への問い合わせとポーリングの DB アクセスは増えない。
+    """
+    job_exists = db.execute(_select_job_by_job_id, {"job_id": job_id}).scalar_one_or_none() is not None
+    if not job_exists:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream():
+        # 購読はジェネレーター開始後に行い、応答開始前に切断されてもキューが残らないようにする
+        queue: asyncio.Queue = asyncio.Queue()
+        subscribers = _stream_subscribers.setdefault(job_id, set())
+        try:
+            subscribers.add(queue)
+            latest = _stream_latest.get(job_id)
+            if latest is not None:
+                queue.put_nowait(latest)
+            if job_id not in _stream_watchers:
+                _stream_watchers[job_id] = asyncio.create_task(_watch_transcription(job_id))
+
+            while True:
+                event = await queue.get()
+                if event is None:
+                    break
+                yield b"data: " + orjson.dumps(event) + b"\n\n"
+        finally:
+            subscribers.discard(queue)
+            if not subscribers and _stream_subscribers.get(job_id) is subscribers:
+                del _stream_subscribers[job_id]
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
@@ -3,22 +3,36 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.job import Job, JobStatus
 from app.services.blob_storage import get_blob_storage_service
-from app.services.audio_extractor import get_audio_extractor
+from app.services.audio_extractor import VIDEO_CONTENT_TYPES, get_audio_extractor
 from app.config import settings
+import asyncio
 import uuid
 import logging
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api", tags=["upload"])
 
+# 許可されたファイル形式
+ALLOWED_AUDIO_FORMATS = frozenset({
+    "audio/wav", "audio/mpeg", "audio/mp3", "audio/mp4",
+    "audio/x-m4a", "audio/ogg", "audio/aac", "audio/flac"
+})
+ALLOWED_VIDEO_FORMATS = VIDEO_CONTENT_TYPES
+ALLOWED_FORMATS = ALLOWED_AUDIO_FORMATS | ALLOWED_VIDEO_FORMATS
+_INVALID_FORMAT_MESSAGE = (
+    "Invalid file format. Allowed formats: audio (WAV, MP3, M4A, AAC, FLAC, OGG) "
+    "or video (MP4, MOV, AVI, WebM, MKV)"
+)
+
 
 @router.post("/upload")
 async def upload_audio(
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
 ):
-    job = None
+    job: Optional[Job] = None
     try:
         if file.size > settings.max_file_size_bytes:
             raise HTTPException(
@@ -26,25 +40,13 @@ async def upload_audio(
                 detail=f"File size exceeds maximum allowed size of {settings.MAX_FILE_SIZE_MB}MB"
             )
 
-        # 許可されたファイル形式
-        allowed_audio_formats = [
-            "audio/wav", "audio/mpeg", "audio/mp3", "audio/mp4", 
-            "audio/x-m4a", "audio/ogg", "audio/aac", "audio/flac"
-        ]
-        allowed_video_formats = [
-            "video/mp4", "video/quicktime", "video/x-msvideo", 
-            "video/webm", "video/x-matroska"
-        ]
-        allowed_formats = allowed_audio_formats + allowed_video_formats
-        
-        if file.content_type not in allowed_formats:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid file format. Allowed formats: audio (WAV, MP3, M4A, AAC, FLAC, OGG) or video (MP4, MOV, AVI, WebM, MKV)"
-            )
+        if file.content_type not in ALLOWED_FORMATS:
+            raise HTTPException(status_code=400, detail=_INVALID_FORMAT_MESSAGE)
+        is_video = file.content_type in ALLOWED_VIDEO_FORMATS
 
         job_id = str(uuid.uuid4())
 
+        # アップロード中もステータス API・UI から見えるよう、先に UPLOADING で登録しておく
         job = Job(
             job_id=job_id,
             filename=file.filename,
@@ -54,18 +56,18 @@ async def upload_audio(
         db.add(job)
         db.commit()
 
-        # ファイルデータを読み込み
-        file_data = await file.read()
-        
         # 動画ファイルの場合は音声を抽出
-        audio_extractor = get_audio_extractor()
-        if audio_extractor.is_video_file(file.content_type):
+        if is_video:
+            audio_extractor = get_audio_extractor()
             logger.info(f"Video file detected: {file.filename}. Extracting audio...")
+            video_data = await file.read()
             try:
-                file_data, extracted_filename = audio_extractor.extract_audio(
-                    file_data, 
+                # FFmpeg は同時実行数を制限した共有ワーカーで実行する
+                file_data, extracted_filename = await audio_extractor.extract_audio_async(
+                    video_data, 
                     file.filename
                 )
+                upload_length = len(file_data)
                 # 抽出された音声ファイル名を使用
                 upload_filename = extracted_filename
                 upload_content_type = "audio/wav"
@@ -80,28 +82,32 @@ async def upload_audio(
                     detail=f"Failed to extract audio from video: {str(e)}"
                 )
         else:
+            # 音声ファイルはメモリに読み込まず、スプール済みのファイルをそのまま Blob にストリーミング
+            file_data = file.file
+            upload_length = file.size
             upload_filename = file.filename
             upload_content_type = file.content_type
         
         # Blob Storageにアップロード
-        blob_name, blob_url = get_blob_storage_service().upload_file(
+        blob_name, blob_url = await asyncio.to_thread(
+            get_blob_storage_service().upload_file,
             file_data=file_data,
             filename=upload_filename,
-            content_type=upload_content_type
+            content_type=upload_content_type,
+            length=upload_length
         )
 
         job.blob_name = blob_name
         job.blob_url = blob_url
         job.status = JobStatus.UPLOADED.value
         db.commit()
-        db.refresh(job)
 
         return {
-            "job_id": job.job_id,
-            "filename": job.filename,
-            "status": job.status,
-            "blob_url": job.blob_url,
-            "message": "File uploaded successfully" + (" (audio extracted from video)" if audio_extractor.is_video_file(file.content_type) else "")
+            "job_id": job_id,
+            "filename": file.filename,
+            "status": JobStatus.UPLOADED.value,
+            "blob_url": blob_url,
+            "message": "File uploaded successfully" + (" (audio extracted from video)" if is_video else "")
         }
 
     except HTTPException:
@@ -109,7 +115,10 @@ async def upload_audio(
     except Exception as e:
         logger.error(f"Error uploading file: {e}", exc_info=True)
         if job is not None:
+            # コミット自体の失敗でセッションが無効になっている場合に備え、先にロールバックしてから失敗を記録する
+            db.rollback()
             job.status = JobStatus.FAILED.value
             job.error_message = str(e)
+            db.add(job)
             db.commit()
         raise HTTPException(status_code=500, detail="Failed to upload file")
@@ -4,13 +4,16 @@ Zoom会議イベント（meeting.started等）を受信するWebhookエンドポ
 """
 import hashlib
 import hmac
-import json
 import logging
 from datetime import datetime
+from functools import lru_cache
+from collections.abc import Awaitable, Callable
 from typing import Any
 
-from fastapi import APIRouter, Header, HTTPException, Request
-from pydantic import BaseModel
+from cachetools import TTLCache
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Request
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
 
 from app.timezone import jst_now
 from app.zoom_config import zoom_config
@@ -18,16 +21,19 @@ from app.services.zoom_api_service import zoom_api_service
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/api/zoom", tags=["zoom"])
+router = APIRouter(prefix="/api/zoom", tags=["zoom"], default_response_class=ORJSONResponse)
+
+# 受理済みイベント（Zoom の再送による二重処理を防ぐ）: (event, meeting_id, event_ts) -> True
+_accepted_events: TTLCache = TTLCache(maxsize=1024, ttl=300)  # 5分
 
 
 # ==================== Pydantic Models ====================
 
 class ZoomWebhookPayload(BaseModel):
     """Zoom Webhookのペイロード"""
-    event: str  # イベント名
-    event_ts: int  # イベントのタイムスタンプ
-    payload: dict[str, Any]  # 詳細データ
+    event: str = ""  # イベント名
+    event_ts: int | None = None  # イベントのタイムスタンプ（CRC では省略されることがある）
+    payload: dict[str, Any] = Field(default_factory=dict)  # 詳細データ
 
 
 class ChallengeResponse(BaseModel):
@@ -38,11 +44,14 @@ class ChallengeResponse(BaseModel):
 
 class MeetingInfo(BaseModel):
     """会議情報"""
-    meeting_id: str
-    uuid: str
-    host_id: str
-    topic: str
-    start_time: str
+    # Webhook の payload.object をそのまま検証できるよう、id を meeting_id として受け取る
+    model_config = ConfigDict(populate_by_name=True, coerce_numbers_to_str=True)
+
+    meeting_id: str = Field("", validation_alias="id")
+    uuid: str = ""
+    host_id: str = ""
+    topic: str = ""
+    start_time: str = ""
     timezone: str | None = None
     duration: int | None = None
     # API から取得した詳細情報
@@ -53,6 +62,28 @@ class MeetingInfo(BaseModel):
 
 # ==================== Helper Functions ====================
 
+@lru_cache(maxsize=4)
+def _hmac_base(secret_token: str) -> hmac.HMAC:
+    """
+    鍵設定済みの HMAC オブジェクト（リクエストごとに copy() して鍵の初期化を省く）
+
+    Secret Token の文字列をキーにキャッシュするため、設定が変われば自動的に作り直される。
+    """
+    return hmac.new(secret_token.encode('utf-8'), digestmod=hashlib.sha256)
+
+
+def _hmac_sha256(secret_token: str, message: bytes) -> bytes:
+    """Secret Token で message の HMAC SHA-256 ダイジェスト（生バイト列）を計算"""
+    mac = _hmac_base(secret_token).copy()
+    mac.update(message)
+    return mac.digest()
+
+
+def _signature_message(timestamp: str, request_body: bytes) -> bytes:
+    """署名対象メッセージ v0:{timestamp}:{body} をバイト列のまま組み立てる（ボディの decode/encode を避ける）"""
+    return b"v0:" + timestamp.encode('utf-8') + b":" + request_body
+
+
 def verify_zoom_signature(
     request_body: bytes,
     timestamp: str,
@@ -75,20 +106,21 @@ def verify_zoom_signature(
         logger.warning("ZOOM_WEBHOOK_SECRET_TOKEN が設定されていません")
         return False
     
-    # メッセージを構築: v0:{timestamp}:{body}
-    message = f"v0:{timestamp}:{request_body.decode('utf-8')}"
+    # 署名は "v0={hex}" 形式。hex 文字列化せず生のダイジェスト同士で比較する
+    if not signature.startswith("v0="):
+        return False
+    try:
+        received_digest = bytes.fromhex(signature[3:])
+    except ValueError:
+        return False
     
     # HMAC SHA-256 でハッシュを生成
-    hash_for_verify = hmac.new(
-        secret_token.encode('utf-8'),
-        message.encode('utf-8'),
-        hashlib.sha256
-    ).hexdigest()
-    
-    # 署名を作成して比較
-    expected_signature = f"v0={hash_for_verify}"
+    expected_digest = _hmac_sha256(
+        secret_token,
+        _signature_message(timestamp, request_body)
+    )
     
-    return hmac.compare_digest(signature, expected_signature)
+    return hmac.compare_digest(received_digest, expected_digest)
 
 
 def create_challenge_response(plain_token: str, secret_token: str) -> ChallengeResponse:
@@ -102,11 +134,10 @@ def create_challenge_response(plain_token: str, secret_token: str) -> ChallengeR
     Returns:
         ChallengeResponse
     """
-    encrypted_token = hmac.new(
-        secret_token.encode('utf-8'),
-        plain_token.encode('utf-8'),
-        hashlib.sha256
-    ).hexdigest()
+    encrypted_token = _hmac_sha256(
+        secret_token,
+        plain_token.encode('utf-8')
+    ).hex()
     
     return ChallengeResponse(
         plainToken=plain_token,
@@ -116,6 +147,14 @@ def create_challenge_response(plain_token: str, secret_token: str) -> ChallengeR
 
 # ==================== Event Handlers ====================
 
+def _count_active_bot_sessions(bot_service, meeting_id: str) -> int:
+    """会議に派遣済みで稼働中（完了・エラー以外）の Bot セッション数"""
+    return sum(
+        1 for s in bot_service.get_sessions_by_meeting(meeting_id)
+        if s.status.value not in ("completed", "error")
+    )
+
+
 async def handle_meeting_started(payload: dict[str, Any]) -> MeetingInfo:
     """
     会議開始イベントを処理
@@ -129,18 +168,8 @@ async def handle_meeting_started(payload: dict[str, Any]) -> MeetingInfo:
     # Bot派遣サービスのインポート（循環参照回避）
     from app.services.bot_service import bot_service
     
-    meeting_object = payload.get("object", {})
-    meeting_id = str(meeting_object.get("id", ""))
-    
-    meeting_info = MeetingInfo(
-        meeting_id=meeting_id,
-        uuid=meeting_object.get("uuid", ""),
-        host_id=meeting_object.get("host_id", ""),
-        topic=meeting_object.get("topic", ""),
-        start_time=meeting_object.get("start_time", ""),
-        timezone=meeting_object.get("timezone"),
-        duration=meeting_object.get("duration")
-    )
+    meeting_info = MeetingInfo.model_validate(payload.get("object", {}))
+    meeting_id = meeting_info.meeting_id
     
     logger.info(
         f"🎥 会議が開始されました: "
@@ -149,6 +178,16 @@ async def handle_meeting_started(payload: dict[str, Any]) -> MeetingInfo:
         f"開始時刻={meeting_info.start_time}"
     )
     
+    # 既にBotが派遣済みなら Zoom API の呼び出し自体を省く（Webhook の再送時など）
+    # 重複チェックはメモリ上のセッション検索のみで I/O を伴わない
+    active_count = _count_active_bot_sessions(bot_service, meeting_id)
+    if active_count:
+        logger.info(
+            f"⏭️ 既にBotが派遣済みのためスキップ: "
+            f"meeting_id={meeting_id}, active_sessions={active_count}"
+        )
+        return meeting_info
+    
     # Zoom APIから会議詳細を取得してパスコード付きURLを取得
     try:
         meeting_details = await zoom_api_service.get_meeting_details(meeting_id)
@@ -164,17 +203,12 @@ async def handle_meeting_started(payload: dict[str, Any]) -> MeetingInfo:
             
             # Bot自動派遣（重複チェック）
             try:
-                # 既にこの会議にBotが派遣されているかチェック
-                existing_sessions = bot_service.get_sessions_by_meeting(meeting_id)
-                active_sessions = [
-                    s for s in existing_sessions 
-                    if s.status.value not in ("completed", "error")
-                ]
-                
-                if active_sessions:
+                # API 呼び出し中に別の Webhook が派遣した可能性があるため、派遣直前に再確認する
+                active_count = _count_active_bot_sessions(bot_service, meeting_id)
+                if active_count:
                     logger.info(
                         f"⏭️ 既にBotが派遣済みのためスキップ: "
-                        f"meeting_id={meeting_id}, active_sessions={len(active_sessions)}"
+                        f"meeting_id={meeting_id}, active_sessions={active_count}"
                     )
                 else:
                     session = await bot_service.dispatch_bot(
@@ -225,49 +259,44 @@ async def handle_meeting_ended(payload: dict[str, Any]) -> dict[str, Any]:
     return {"meeting_id": meeting_id, "status": "ended", "terminated_sessions": terminated_count}
 
 
-# ==================== API Endpoints ====================
+async def _run_event_handler(
+    handler: Callable[[dict[str, Any]], Awaitable[Any]],
+    event_type: str,
+    payload: dict[str, Any]
+) -> None:
+    """バックグラウンドでイベントハンドラーを実行（レスポンス送信後のため例外はログに残す）"""
+    try:
+        await handler(payload)
+    except Exception as e:
+        logger.error(f"Zoomイベント処理中にエラーが発生: event={event_type}, error={e}", exc_info=True)
 
-@router.post("/webhook")
-async def zoom_webhook(
+
+# ==================== Dependencies ====================
+
+async def verified_zoom_body(
     request: Request,
     x_zm_request_timestamp: str = Header(None, alias="x-zm-request-timestamp"),
     x_zm_signature: str = Header(None, alias="x-zm-signature")
-):
+) -> ZoomWebhookPayload:
     """
-    Zoom Webhookエンドポイント
-    
-    Zoomからのイベント通知を受信し、適切なハンドラーで処理する。
-    
-    サポートしているイベント:
-    - endpoint.url_validation: CRC（Challenge-Response Check）
-    - meeting.started: 会議開始
-    - meeting.ended: 会議終了
+    Zoom Webhook のボディを一度だけ読み込み、署名検証とパースを行う
+
+    生のバイト列に対して署名を検証し、同じバイト列を model_validate_json で検証済みモデルに変換する。
+    CRC（endpoint.url_validation）は署名検証の対象外。
     """
-    # イベントタイプに応じて処理
-    # 先にボディを取得（検証用）
     raw_body = await request.body()
     
+    # JSON のパースとスキーマ検証を pydantic-core で一度に行う
     try:
-        data = json.loads(raw_body)
-    except json.JSONDecodeError:
-        raise HTTPException(status_code=400, detail="Invalid JSON payload")
-    
-    event_type = data.get("event", "")
-    
-    logger.info(f"Zoom Webhook受信: event={event_type}")
+        webhook_payload = ZoomWebhookPayload.model_validate_json(raw_body)
+    except ValidationError as e:
+        if any(error["type"] == "json_invalid" for error in e.errors()):
+            raise HTTPException(status_code=400, detail="Invalid JSON payload")
+        raise HTTPException(status_code=400, detail="Invalid webhook payload")
     
     # CRC（Challenge-Response Check）の場合は署名検証なしで応答
-    if event_type == "endpoint.url_validation":
-        plain_token = data.get("payload", {}).get("plainToken", "")
-        if not plain_token:
-            raise HTTPException(status_code=400, detail="plainToken not found")
-        
-        response = create_challenge_response(
-            plain_token,
-            zoom_config.webhook_secret_token
-        )
-        logger.info("✅ CRC検証リクエストに応答しました")
-        return response
+    if webhook_payload.event == "endpoint.url_validation":
+        return webhook_payload
     
     # 通常のイベントの場合は署名を検証
     if x_zm_request_timestamp and x_zm_signature:
@@ -283,17 +312,16 @@ async def zoom_webhook(
             logger.warning(f"  受信ヘッダー: timestamp={x_zm_request_timestamp}, signature={x_zm_signature}")
             
             # デバッグ用に計算値をログ出力（本番ではSecret Tokenが漏れないよう注意が必要だが、署名自体はログに出してもリスクは低い）
-            # 再計算してログに出す
-            message = f"v0:{x_zm_request_timestamp}:{raw_body.decode('utf-8')}"
-            hash_for_verify = hmac.new(
-                zoom_config.webhook_secret_token.encode('utf-8'),
-                message.encode('utf-8'),
-                hashlib.sha256
-            ).hexdigest()
-            calculated_signature = f"v0={hash_for_verify}"
-            
-            logger.warning(f"  期待される署名: {calculated_signature}")
-            logger.warning(f"  Secret Token長: {len(zoom_config.webhook_secret_token) if zoom_config.webhook_secret_token else 0}")
+            # 再計算はコストがかかるため DEBUG ログ有効時のみ行う
+            if logger.isEnabledFor(logging.DEBUG):
+                hash_for_verify = _hmac_sha256(
+                    zoom_config.webhook_secret_token,
+                    _signature_message(x_zm_request_timestamp, raw_body)
+                ).hex()
+                calculated_signature = f"v0={hash_for_verify}"
+                
+                logger.debug(f"  期待される署名: {calculated_signature}")
+                logger.debug(f"  Secret Token長: {len(zoom_config.webhook_secret_token) if zoom_config.webhook_secret_token else 0}")
             
             # デバッグモード: 署名検証失敗しても通す（開発用）
             logger.error("⚠️ 署名検証に失敗しましたが、処理を続行します（デバッグモード）")
@@ -303,20 +331,67 @@ async def zoom_webhook(
         # 開発時は許可、本番では拒否を推奨
         # raise HTTPException(status_code=401, detail="Missing signature headers")
     
+    return webhook_payload
+
+
+# ==================== API Endpoints ====================
+
+@router.post("/webhook")
+async def zoom_webhook(
+    background_tasks: BackgroundTasks,
+    webhook_payload: ZoomWebhookPayload = Depends(verified_zoom_body)
+):
+    """
+    Zoom Webhookエンドポイント
+    
+    Zoomからのイベント通知を受信し、適切なハンドラーで処理する。
+    ボディの読み込み・署名検証・パースは verified_zoom_body で済ませている。
+    Zoom は 3 秒以内に応答がないと再送するため、会議イベントの処理はバックグラウンドで行い即座に応答する。
+    
+    サポートしているイベント:
+    - endpoint.url_validation: CRC（Challenge-Response Check）
+    - meeting.started: 会議開始
+    - meeting.ended: 会議終了
+    """
+    event_type = webhook_payload.event
+    
+    logger.info(f"Zoom Webhook受信: event={event_type}")
+    
+    # CRC（Challenge-Response Check）の場合は署名検証なしで応答
+    if event_type == "endpoint.url_validation":
+        plain_token = webhook_payload.payload.get("plainToken", "")
+        if not plain_token:
+            raise HTTPException(status_code=400, detail="plainToken not found")
+        
+        response = create_challenge_response(
+            plain_token,
+            zoom_config.webhook_secret_token
+        )
+        logger.info("✅ CRC検証リクエストに応答しました")
+        return response
+    
     # イベントタイプに応じて処理
-    payload = data.get("payload", {})
+    payload = webhook_payload.payload
     
     if event_type == "meeting.started":
-        result = await handle_meeting_started(payload)
-        return {"status": "success", "event": event_type, "meeting": result.model_dump()}
-    
+        handler = handle_meeting_started
     elif event_type == "meeting.ended":
-        result = await handle_meeting_ended(payload)
-        return {"status": "success", "event": event_type, "result": result}
-    
+        handler = handle_meeting_ended
     else:
         logger.info(f"未処理のイベント: {event_type}")
         return {"status": "success", "event": event_type, "message": "Event received but not processed"}
+    
+    # 再送された同一イベントは処理を重ねない
+    if webhook_payload.event_ts is not None:
+        meeting_id = str(payload.get("object", {}).get("id", ""))
+        event_key = (event_type, meeting_id, webhook_payload.event_ts)
+        if event_key in _accepted_events:
+            logger.info(f"⏭️ 処理済みのイベントのためスキップ: event={event_type}, meeting_id={meeting_id}")
+            return {"status": "accepted", "event": event_type, "deduped": True}
+        _accepted_events[event_key] = True
+    
+    background_tasks.add_task(_run_event_handler, handler, event_type, payload)
+    return {"status": "accepted", "event": event_type}
 
 
 @router.get("/health")
@@ -4,37 +4,81 @@
 動画ファイルから音声を抽出するサービス。
 FFmpegを使用して動画ファイルをWAV形式の音声ファイルに変換します。
 """
+import asyncio
 import ffmpeg
+import io
 import tempfile
 import os
 import logging
+import wave
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# 抽出する音声の形式（Azure Speech Serviceに最適な 16kHz / 16-bit / モノラル）
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH_BYTES = 2
+CHANNELS = 1
+
+# FFmpeg の同時実行数を CPU コア数までに制限する共有ワーカー
+# （アップロードが集中してもプロセスが乱立せず、超過分はキューで待つ）
+FFMPEG_MAX_WORKERS = settings.FFMPEG_MAX_CONCURRENCY or max(1, os.cpu_count() or 1)
+_ffmpeg_pool = ThreadPoolExecutor(max_workers=FFMPEG_MAX_WORKERS, thread_name_prefix="ffmpeg")
+
+
+def _pcm_to_wav(pcm_data: bytes) -> bytes:
+    """生の PCM (s16le) データに WAV ヘッダーを付与する"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav_file:
+        wav_file.setnchannels(CHANNELS)
+        wav_file.setsampwidth(SAMPLE_WIDTH_BYTES)
+        wav_file.setframerate(SAMPLE_RATE)
+        wav_file.writeframes(pcm_data)
+    return buffer.getvalue()
+
+
+# 音声抽出の対象とする動画の MIME タイプ
+VIDEO_CONTENT_TYPES = frozenset({
+    'video/mp4',
+    'video/quicktime',
+    'video/x-msvideo',
+    'video/webm',
+    'video/x-matroska',
+})
+
+
+def is_video_file(content_type: str) -> bool:
+    """
+    ファイルが動画ファイルかどうかを判定
+    
+    Args:
+        content_type: MIMEタイプ
+        
+    Returns:
+        動画ファイルの場合True
+    """
+    return content_type in VIDEO_CONTENT_TYPES
+
 
 class AudioExtractor:
     """動画から音声を抽出するクラス"""
     
+    # 既存の呼び出し（extractor.is_video_file(...)）向けにモジュール関数を公開する
+    is_video_file = staticmethod(is_video_file)
+
     @staticmethod
-    def is_video_file(content_type: str) -> bool:
+    async def extract_audio_async(input_data: bytes, input_filename: str) -> tuple[bytes, str]:
         """
-        ファイルが動画ファイルかどうかを判定
+        extract_audio を共有ワーカーで実行する（イベントループをブロックしない）
         
-        Args:
-            content_type: MIMEタイプ
-            
-        Returns:
-            動画ファイルの場合True
+        同時実行数は FFMPEG_MAX_WORKERS に制限され、超過分は空きが出るまで待機する。
         """
-        video_types = [
-            'video/mp4',
-            'video/quicktime',
-            'video/x-msvideo',
-            'video/webm',
-            'video/x-matroska'
-        ]
-        return content_type in video_types
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _ffmpeg_pool, AudioExtractor.extract_audio, input_data, input_filename
+        )
     
     @staticmethod
     def extract_audio(input_data: bytes, input_filename: str) -> tuple[bytes, str]:
@@ -52,13 +96,13 @@ class AudioExtractor:
             Exception: 音声抽出に失敗した場合
         """
         temp_input = None
-        temp_output = None
         
         try:
             # 入力ファイルの拡張子を取得
             input_ext = Path(input_filename).suffix
             
             # 一時ファイルを作成（入力動画）
+            # MP4/MOV は moov atom が末尾にあるとシークが必要なため、入力は stdin ではなくファイルで渡す
             with tempfile.NamedTemporaryFile(suffix=input_ext, delete=False) as temp_input_file:
                 temp_input = temp_input_file.name
                 temp_input_file.write(input_data)
@@ -66,32 +110,27 @@ class AudioExtractor:
             # 出力ファイル名を生成（WAV形式）
             output_filename = Path(input_filename).stem + '_extracted.wav'
             
-            # 一時ファイルを作成（出力音声）
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_output_file:
-                temp_output = temp_output_file.name
-            
             logger.info(f"Extracting audio from {input_filename}")
             
-            # FFmpegで音声を抽出
+            # FFmpegで音声を抽出し、stdout のパイプで直接受け取る（出力用の一時ファイルを使わない）
             # - 音声コーデック: PCM 16-bit
             # - サンプリングレート: 16kHz（Azure Speech Serviceに最適）
             # - チャンネル: モノラル
-            (
+            # WAV をパイプに出力するとヘッダーのサイズを書き戻せないため、生 PCM を受け取ってヘッダーは自前で付与する
+            pcm_data, _ = (
                 ffmpeg
                 .input(temp_input)
                 .output(
-                    temp_output,
-                    acodec='pcm_s16le',  # PCM 16-bit
-                    ar='16000',          # 16kHz
-                    ac=1                 # モノラル
+                    'pipe:1',
+                    format='s16le',
+                    acodec='pcm_s16le',      # PCM 16-bit
+                    ar=str(SAMPLE_RATE),     # 16kHz
+                    ac=CHANNELS,             # モノラル
+                    threads=1                # 1 ワーカー = 1 スレッドでコア数と対応させる
                 )
-                .overwrite_output()
                 .run(capture_stdout=True, capture_stderr=True, quiet=True)
             )
-            
-            # 抽出された音声ファイルを読み込み
-            with open(temp_output, 'rb') as f:
-                audio_data = f.read()
+            audio_data = _pcm_to_wav(pcm_data)
             
             logger.info(f"Audio extracted successfully: {len(audio_data)} bytes")
             
@@ -113,12 +152,6 @@ class AudioExtractor:
                     os.unlink(temp_input)
                 except Exception as e:
                     logger.warning(f"Failed to delete temp input file: {e}")
-            
-            if temp_output and os.path.exists(temp_output):
-                try:
-                    os.unlink(temp_output)
-                except Exception as e:
-                    logger.warning(f"Failed to delete temp output file: {e}")
 
 
 # シングルトンインスタンス
@@ -1,54 +1,202 @@
-from openai import AzureOpenAI
+from openai import AzureOpenAI, RateLimitError
 from app.config import settings
 from app.services.prompt_loader import load_prompt
 from typing import List, Generator
+from cachetools import TTLCache
+import atexit
+import hashlib
+import httpx
+import itertools
 import logging
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
+# 要約結果キャッシュ（同じ文字起こし・プロンプトでの再実行やリトライで API を呼ばない）
+SUMMARY_CACHE_MAXSIZE = 256
+SUMMARY_CACHE_TTL_SECONDS = 3600  # 1時間
+
+# 429 を返したデプロイメントを振り分け対象から外す時間
+RATE_LIMIT_COOLDOWN_SECONDS = 30
+
+# 要約指示（文字起こしの後ろに置く）
+SUMMARY_INSTRUCTION = "上記の会議文字起こしデータを構造化された議事録に変換してください。"
+
 
 class AzureOpenAIService:
     def __init__(self):
+        # 接続プールを明示的に管理し、全リクエストで TCP/TLS 接続を使い回す
+        # （要約生成は長時間かかるため読み取りタイムアウトは SDK 既定の 600 秒を維持）
+        self._http_client = httpx.Client(
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+            timeout=httpx.Timeout(600.0, connect=5.0),
+        )
+        atexit.register(self._http_client.close)
         self.client = AzureOpenAI(
             api_key=settings.AZURE_OPENAI_API_KEY,
             api_version=settings.AZURE_OPENAI_API_VERSION,
-            azure_endpoint=settings.AZURE_OPENAI_ENDPOINT
+            azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
+            http_client=self._http_client
         )
         self.deployment_name = settings.AZURE_OPENAI_DEPLOYMENT_NAME
+        # (クライアント, デプロイメント名) の一覧。先頭は既定のデプロイメント
+        self._deployments: list[tuple[AzureOpenAI, str]] = [(self.client, self.deployment_name)]
+        for extra in settings.AZURE_OPENAI_DEPLOYMENTS:
+            self._deployments.append((
+                AzureOpenAI(
+                    api_key=extra["api_key"],
+                    api_version=extra.get("api_version", settings.AZURE_OPENAI_API_VERSION),
+                    azure_endpoint=extra["endpoint"],
+                    http_client=self._http_client
+                ),
+                extra["deployment"]
+            ))
+        self._rr = itertools.cycle(range(len(self._deployments)))
+        self._cooldown_until: dict[int, float] = {}
+        self._summary_cache: TTLCache = TTLCache(
+            maxsize=SUMMARY_CACHE_MAXSIZE, ttl=SUMMARY_CACHE_TTL_SECONDS
+        )
+        # シングルトンを複数スレッド（to_thread）から共有するため、キャッシュ操作は排他する
+        self._summary_cache_lock = threading.Lock()
 
-    def generate_summary(self, transcription: str, template_prompt: str | None = None) -> str:
+    def _summary_cache_key(self, prompt: str, transcription: str) -> bytes:
+        return hashlib.sha256(
+            "\x1e".join((self.deployment_name, prompt, transcription)).encode("utf-8")
+        ).digest()
+
+    def _pick_deployment(self) -> int:
+        """クールダウン中でないデプロイメントをラウンドロビンで選ぶ（全て待機中なら最も早く復帰するもの）"""
+        now = time.monotonic()
+        for _ in range(len(self._deployments)):
+            index = next(self._rr)
+            if self._cooldown_until.get(index, 0.0) <= now:
+                return index
+        return min(self._cooldown_until, key=self._cooldown_until.get)
+
+    def _create_chat_completion(self, **kwargs):
+        """
+        デプロイメントを振り分けて chat.completions.create を呼ぶ
+
+        429 (RateLimitError) を返したデプロイメントは一定時間外し、次のデプロイメントで再試行する。
+        """
+        attempts = len(self._deployments)
+        for attempt in range(attempts):
+            index = self._pick_deployment()
+            client, deployment = self._deployments[index]
+            try:
+                return client.chat.completions.create(model=deployment, **kwargs)
+            except RateLimitError:
+                self._cooldown_until[index] = time.monotonic() + RATE_LIMIT_COOLDOWN_SECONDS
+                if attempt == attempts - 1:
+                    raise
+                logger.warning(f"Deployment {deployment} rate limited, failing over")
+
+    def warmup(self):
+        """アプリ起動時にエンドポイントへの接続を確立しておく（初回リクエストのハンドシェイクを省く）"""
         try:
-            # 優先順位: 1) API引数 template_prompt  2) ファイルから読み込み  3) フォールバック
-            if template_prompt and template_prompt.strip():
-                prompt = template_prompt.strip()
-                logger.info("Using template_prompt from API request")
+            self._http_client.head(settings.AZURE_OPENAI_ENDPOINT)
+            logger.info("🔥 Azure OpenAI 接続事前確立完了")
+        except Exception as e:
+            logger.warning(f"Azure OpenAI 接続事前確立スキップ: {e}")
+
+    def _build_summary_messages(
+        self, transcription: str, template_prompt: str | None = None
+    ) -> tuple[str, list[dict]]:
+        """要約用のプロンプトとメッセージを組み立てる（キャッシュキー用にプロンプトも返す）"""
+        # 優先順位: 1) API引数 template_prompt  2) ファイルから読み込み  3) フォールバック
+        if template_prompt and template_prompt.strip():
+            prompt = template_prompt.strip()
+            logger.info("Using template_prompt from API request")
+        else:
+            file_prompt = load_prompt()  # app/prompts/summary_default.md
+            if file_prompt:
+                prompt = file_prompt
+                logger.info("Using prompt from file: summary_default.md")
             else:
-                file_prompt = load_prompt()  # app/prompts/summary_default.md
-                if file_prompt:
-                    prompt = file_prompt
-                    logger.info("Using prompt from file: summary_default.md")
-                else:
-                    # フォールバック（ファイルが見つからない場合）
-                    prompt = "あなたは議事録を要約する専門家です。会議の文字起こしデータを構造化された議事録形式に変換してください。"
-                    logger.warning("Prompt file not found, using fallback prompt")
-
-            response = self.client.chat.completions.create(
-                model=self.deployment_name,
-                messages=[
-                    {"role": "system", "content": prompt},
-                    {"role": "user", "content": f"以下の会議文字起こしデータを構造化された議事録に変換してください:\n\n{transcription}"}
-                ],
+                # フォールバック（ファイルが見つからない場合）
+                prompt = "あなたは議事録を要約する専門家です。会議の文字起こしデータを構造化された議事録形式に変換してください。"
+                logger.warning("Prompt file not found, using fallback prompt")
+
+        # プロンプトキャッシュは先頭一致で効くため、同一会議で不変な文字起こしを
+        # 加工せず単独のメッセージとして先頭に置き、可変の指示（テンプレート）は後ろに置く
+        messages = [
+            {"role": "user", "content": transcription},
+            {"role": "system", "content": prompt},
+            {"role": "user", "content": SUMMARY_INSTRUCTION}
+        ]
+        return prompt, messages
+
+    def _get_cached_summary(self, cache_key: bytes) -> str | None:
+        with self._summary_cache_lock:
+            return self._summary_cache.get(cache_key)
+
+    def _store_cached_summary(self, cache_key: bytes, summary: str) -> None:
+        if summary:
+            with self._summary_cache_lock:
+                self._summary_cache[cache_key] = summary
+
+    def generate_summary(self, transcription: str, template_prompt: str | None = None) -> str:
+        try:
+            prompt, messages = self._build_summary_messages(transcription, template_prompt)
+
+            cache_key = self._summary_cache_key(prompt, transcription)
+            cached_summary = self._get_cached_summary(cache_key)
+            if cached_summary is not None:
+                logger.info("Summary served from cache")
+                return cached_summary
+
+            response = self._create_chat_completion(
+                messages=messages,
                 temperature=0.3,
                 max_tokens=8000
             )
 
             summary = response.choices[0].message.content
             logger.info(f"Summary generated: {len(summary)} characters")
+            self._store_cached_summary(cache_key, summary)
             return summary
 
         except Exception as e:
             logger.error(f"Error generating summary: {e}", exc_info=True)
             raise
+
+    def generate_summary_streaming(
+        self, transcription: str, template_prompt: str | None = None
+    ) -> Generator[str, None, None]:
+        """
+        議事録をストリーミングで生成する（生成されたトークンから順に返す）
+
+        Yields:
+            生成された議事録の断片
+        """
+        prompt, messages = self._build_summary_messages(transcription, template_prompt)
+
+        cache_key = self._summary_cache_key(prompt, transcription)
+        cached_summary = self._get_cached_summary(cache_key)
+        if cached_summary is not None:
+            logger.info("Summary served from cache")
+            yield cached_summary
+            return
+
+        response = self._create_chat_completion(
+            messages=messages,
+            temperature=0.3,
+            max_tokens=8000,
+            stream=True
+        )
+
+        parts: list[str] = []
+        for chunk in response:
+            # Azure はコンテンツフィルター結果のみの（choices が空の）チャンクを返すことがある
+            if chunk.choices and chunk.choices[0].delta.content:
+                content = chunk.choices[0].delta.content
+                parts.append(content)
+                yield content
+
+        summary = "".join(parts)
+        logger.info(f"Summary streamed: {len(summary)} characters")
+        self._store_cached_summary(cache_key, summary)
     
     def chat_rewrite(
         self, 
@@ -77,8 +225,7 @@ class AzureOpenAIService:
     
     def _chat_rewrite_normal(self, messages: List[dict]) -> str:
         """非ストリーミングのチャットリライト"""
-        response = self.client.chat.completions.create(
-            model=self.deployment_name,
+        response = self._create_chat_completion(
             messages=messages,
             temperature=0.3,
             max_tokens=3000
@@ -90,8 +237,7 @@ class AzureOpenAIService:
     
     def _chat_rewrite_streaming(self, messages: List[dict]) -> Generator[str, None, None]:
         """ストリーミングのチャットリライト"""
-        response = self.client.chat.completions.create(
-            model=self.deployment_name,
+        response = self._create_chat_completion(
             messages=messages,
             temperature=0.3,
             max_tokens=3000,
@@ -104,10 +250,14 @@ class AzureOpenAIService:
 
 
 _azure_openai_service = None
+_azure_openai_service_lock = threading.Lock()
 
 
 def get_azure_openai_service() -> AzureOpenAIService:
     global _azure_openai_service
+    # 同時アクセスでクライアントを二重に生成しないよう、初回生成は排他する（ダブルチェックロッキング）
     if _azure_openai_service is None:
-        _azure_openai_service = AzureOpenAIService()
+        with _azure_openai_service_lock:
+            if _azure_openai_service is None:
+                _azure_openai_service = AzureOpenAIService()
     return _azure_openai_service
@@ -1,9 +1,9 @@
 import azure.cognitiveservices.speech as speechsdk
 from app.config import settings
+import io
 import logging
-import tempfile
-import os
-import time
+import threading
+import wave
 
 logger = logging.getLogger(__name__)
 
@@ -18,18 +18,25 @@ class AzureSpeechService:
 
     def transcribe_audio(self, audio_data: bytes, audio_format: str = "wav") -> str:
         try:
-            with tempfile.NamedTemporaryFile(
-                delete=False, suffix=f".{audio_format}"
-            ) as temp_file:
-                temp_file.write(audio_data)
-                temp_file_path = temp_file.name
-
-            try:
-                audio_config = speechsdk.audio.AudioConfig(filename=temp_file_path)
-                return self._run_continuous_recognition(audio_config)
-            finally:
-                if os.path.exists(temp_file_path):
-                    os.unlink(temp_file_path)
+            if audio_format.lower() != "wav":
+                raise ValueError(f"Unsupported audio format for in-memory recognition: {audio_format}")
+
+            # 一時ファイルを経由せず、WAV ヘッダーから形式を読み取って PCM をそのまま SDK に渡す
+            # （ヘッダー長は 44 バイト固定とは限らないため wave モジュールで解析する）
+            with wave.open(io.BytesIO(audio_data), "rb") as wav:
+                stream_format = speechsdk.audio.AudioStreamFormat(
+                    samples_per_second=wav.getframerate(),
+                    bits_per_sample=wav.getsampwidth() * 8,
+                    channels=wav.getnchannels()
+                )
+                raw_pcm = wav.readframes(wav.getnframes())
+
+            stream = speechsdk.audio.PushAudioInputStream(stream_format)
+            stream.write(raw_pcm)
+            stream.close()
+
+            audio_config = speechsdk.audio.AudioConfig(stream=stream)
+            return self._run_continuous_recognition(audio_config)
 
         except Exception as e:
             logger.error(f"Error during transcription: {e}", exc_info=True)
@@ -41,13 +48,13 @@ class AzureSpeechService:
             audio_config=audio_config
         )
 
-        done = False
+        # セッション終了・キャンセルで即座に待機を解除する（ポーリングによる遅延をなくす）
+        done_event = threading.Event()
         transcription_parts = []
         error_message = None
 
         def stop_cb(evt):
-            nonlocal done
-            done = True
+            done_event.set()
 
         def recognized_cb(evt):
             if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech:
@@ -57,11 +64,11 @@ class AzureSpeechService:
                 logger.warning(f"No speech recognized: {evt.result.no_match_details}")
 
         def canceled_cb(evt):
-            nonlocal done, error_message
+            nonlocal error_message
             if evt.reason == speechsdk.CancellationReason.Error:
                 error_message = f"Error: {evt.error_details}"
                 logger.error(error_message)
-            done = True
+            done_event.set()
 
         speech_recognizer.recognized.connect(recognized_cb)
         speech_recognizer.session_stopped.connect(stop_cb)
@@ -69,8 +76,7 @@ class AzureSpeechService:
 
         speech_recognizer.start_continuous_recognition()
 
-        while not done:
-            time.sleep(0.5)
+        done_event.wait()
 
         speech_recognizer.stop_continuous_recognition()
 
@@ -83,10 +89,13 @@ class AzureSpeechService:
 
 
 _azure_speech_service = None
+_azure_speech_service_lock = threading.Lock()
 
 
 def get_azure_speech_service() -> AzureSpeechService:
     global _azure_speech_service
     if _azure_speech_service is None:
-        _azure_speech_service = AzureSpeechService()
+        with _azure_speech_service_lock:
+            if _azure_speech_service is None:
+                _azure_speech_service = AzureSpeechService()
     return _azure_speech_service
@@ -1,5 +1,8 @@
+import atexit
 import httpx
 import logging
+import orjson  # 文字起こし結果の JSON は数 MB になることがあるため、(de)serialize は orjson で行う
+import threading
 import time
 from typing import Optional
 from urllib.parse import urlparse
@@ -7,6 +10,9 @@ from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# 完了待ちポーリングの初回間隔（秒）。以降は poll_interval_seconds まで倍々に伸ばす
+INITIAL_POLL_INTERVAL_SECONDS = 1.0
+
 
 class AzureSpeechBatchService:
     def __init__(self):
@@ -18,6 +24,24 @@ class AzureSpeechBatchService:
             "Content-Type": "application/json",
         }
         self.api_version = settings.AZURE_SPEECH_API_VERSION
+        # ポーリングごとの TCP/TLS ハンドシェイクを避けるため接続を使い回す
+        # （contentUrl は Blob の SAS URL なので、サブスクリプションキーは既定ヘッダーにせずリクエストごとに付与する）
+        self._client = httpx.Client(
+            timeout=60,
+            limits=httpx.Limits(max_keepalive_connections=8),
+        )
+        atexit.register(self.close)
+        # イベントループ上で完了待ちするための非同期クライアント（スレッドを占有しない）
+        self._async_client = httpx.AsyncClient(
+            timeout=60,
+            limits=httpx.Limits(max_keepalive_connections=8),
+        )
+
+    def close(self) -> None:
+        self._client.close()
+
+    async def aclose(self) -> None:
+        await self._async_client.aclose()
 
     def transcribe_blob(
         self,
@@ -38,22 +62,63 @@ class AzureSpeechBatchService:
         return self._create_transcription(blob_sas_url, locale)
 
     def get_transcription_status(self, transcription_id: str) -> dict:
-        response = httpx.get(
-            f"{self.endpoint}/speechtotext/transcriptions/{transcription_id}",
+        response = self._client.get(
+            self._status_url(transcription_id),
             headers=self.headers,
             params={"api-version": self.api_version},
-            timeout=60,
         )
         response.raise_for_status()
-        data = response.json()
+        data = orjson.loads(response.content)
         return {"status": data.get("status"), "error": data.get("error")}
 
     def fetch_transcription_text(self, transcription_id: str) -> str:
         return self._fetch_transcription_text(transcription_id)
 
+    async def submit_transcription_async(self, blob_sas_url: str, locale: str = "ja-JP") -> str:
+        response = await self._async_client.post(
+            f"{self.endpoint}/speechtotext/transcriptions:submit",
+            headers=self.headers,
+            content=orjson.dumps(self._build_create_payload(blob_sas_url, locale)),
+            params={"api-version": self.api_version},
+        )
+        return self._parse_create_response(response)
+
+    async def get_transcription_status_async(self, transcription_id: str) -> dict:
+        response = await self._async_client.get(
+            self._status_url(transcription_id),
+            headers=self.headers,
+            params={"api-version": self.api_version},
+        )
+        response.raise_for_status()
+        data = orjson.loads(response.content)
+        return {"status": data.get("status"), "error": data.get("error")}
+
+    async def fetch_transcription_text_async(self, transcription_id: str) -> str:
+        response = await self._async_client.get(
+            f"{self._status_url(transcription_id)}/files",
+            headers=self.headers,
+            params={"api-version": self.api_version},
+        )
+        response.raise_for_status()
+        content_url = self._find_content_url(orjson.loads(response.content))
+        content_response = await self._async_client.get(content_url)
+        content_response.raise_for_status()
+        return self._extract_transcription_text(orjson.loads(content_response.content))
+
+    def _status_url(self, transcription_id: str) -> str:
+        return f"{self.endpoint}/speechtotext/transcriptions/{transcription_id}"
+
     def _create_transcription(self, blob_sas_url: str, locale: str) -> str:
-        url = f"{self.endpoint}/speechtotext/transcriptions:submit"
-        payload = {
+        response = self._client.post(
+            f"{self.endpoint}/speechtotext/transcriptions:submit",
+            headers=self.headers,
+            content=orjson.dumps(self._build_create_payload(blob_sas_url, locale)),
+            params={"api-version": self.api_version},
+        )
+        return self._parse_create_response(response)
+
+    def _build_create_payload(self, blob_sas_url: str, locale: str) -> dict:
+        return {
             "contentUrls": [blob_sas_url],
             "locale": locale,
             "displayName": "meeting-notes-transcription",
@@ -62,13 +127,8 @@ class AzureSpeechBatchService:
                 "timeToLiveHours": 6,
             },
         }
-        response = httpx.post(
-            url,
-            headers=self.headers,
-            json=payload,
-            params={"api-version": self.api_version},
-            timeout=60,
-        )
+
+    def _parse_create_response(self, response: httpx.Response) -> str:
         try:
             response.raise_for_status()
         except httpx.HTTPStatusError as e:
@@ -77,7 +137,7 @@ class AzureSpeechBatchService:
         location = response.headers.get("Location") or response.headers.get("Operation-Location")
         if location:
             return self._extract_transcription_id(location)
-        data = response.json()
+        data = orjson.loads(response.content)
         transcription_url = data.get("self")
         if not transcription_url:
             raise RuntimeError("Failed to get transcription URL from Azure Speech response")
@@ -90,45 +150,50 @@ class AzureSpeechBatchService:
         poll_interval_seconds: int,
     ) -> None:
         start_time = time.time()
+        # 短いジョブは早く完了を検知し、長いジョブではポーリング頻度を抑える（指数バックオフ）
+        delay = min(INITIAL_POLL_INTERVAL_SECONDS, poll_interval_seconds)
         while True:
-            response = httpx.get(
-                f"{self.endpoint}/speechtotext/transcriptions/{transcription_id}",
+            response = self._client.get(
+                self._status_url(transcription_id),
                 headers=self.headers,
                 params={"api-version": self.api_version},
-                timeout=60,
             )
             response.raise_for_status()
-            status = response.json().get("status")
+            data = orjson.loads(response.content)
+            status = data.get("status")
             if status in {"Succeeded", "Failed"}:
                 if status == "Failed":
-                    error = response.json().get("error")
+                    error = data.get("error")
                     raise RuntimeError(f"Batch transcription failed: {error}")
                 return
             if time.time() - start_time > timeout_seconds:
                 raise TimeoutError("Batch transcription timed out")
-            time.sleep(poll_interval_seconds)
+            time.sleep(delay)
+            delay = min(poll_interval_seconds, delay * 2)
 
     def _fetch_transcription_text(self, transcription_id: str) -> str:
         files_url = f"{self.endpoint}/speechtotext/transcriptions/{transcription_id}/files"
-        response = httpx.get(
+        response = self._client.get(
             files_url,
             headers=self.headers,
             params={"api-version": self.api_version},
-            timeout=60,
         )
         response.raise_for_status()
-        files = response.json().get("values", [])
+        content_url = self._find_content_url(orjson.loads(response.content))
+        content_response = self._client.get(content_url)
+        content_response.raise_for_status()
+        content = orjson.loads(content_response.content)
+        return self._extract_transcription_text(content)
+
+    def _find_content_url(self, files_data: dict) -> str:
         content_url: Optional[str] = None
-        for item in files:
+        for item in files_data.get("values", []):
             if item.get("kind") == "Transcription":
                 content_url = item.get("links", {}).get("contentUrl")
                 break
         if not content_url:
             raise RuntimeError("Transcription content URL not found")
-        content_response = httpx.get(content_url, timeout=60)
-        content_response.raise_for_status()
-        content = content_response.json()
-        return self._extract_transcription_text(content)
+        return content_url
 
     def _extract_transcription_id(self, url: str) -> str:
         parsed = urlparse(url)
@@ -153,10 +218,19 @@ class AzureSpeechBatchService:
 
 
 _azure_speech_batch_service = None
+_azure_speech_batch_service_lock = threading.Lock()
 
 
 def get_azure_speech_batch_service() -> AzureSpeechBatchService:
     global _azure_speech_batch_service
     if _azure_speech_batch_service is None:
-        _azure_speech_batch_service = AzureSpeechBatchService()
+        with _azure_speech_batch_service_lock:
+            if _azure_speech_batch_service is None:
+                _azure_speech_batch_service = AzureSpeechBatchService()
     return _azure_speech_batch_service
+
+
+async def close_azure_speech_batch_service() -> None:
+    """生成済みのサービスがあれば非同期クライアントを閉じる（アプリ終了時用）"""
+    if _azure_speech_batch_service is not None:
+        await _azure_speech_batch_service.aclose()
@@ -1,3 +1,4 @@
+from azure.core.exceptions import ResourceExistsError, ResourceNotFoundError
 from azure.storage.blob import (
     BlobServiceClient,
     BlobClient,
@@ -7,54 +8,85 @@ from azure.storage.blob import (
 )
 from app.config import settings
 import logging
-from typing import Optional
+import threading
+import time
+from cachetools import TTLCache
+from typing import BinaryIO, Optional
 import uuid
+from functools import lru_cache
 from datetime import datetime, timedelta, timezone
 
 logger = logging.getLogger(__name__)
 
+# ストリームアップロード時に並列でステージするブロック数
+UPLOAD_MAX_CONCURRENCY = 4
+
+# SAS URL のキャッシュ保持期間（秒）。SAS の有効期限より十分前に作り直す
+SAS_URL_CACHE_TTL_SECONDS = 3000  # 50分
+# キャッシュから返した URL に最低限残しておく有効期間（秒）
+SAS_URL_MIN_REMAINING_SECONDS = 600  # 10分
+
+
+@lru_cache(maxsize=8)
+def _parse_connection_string(conn_str: str) -> tuple[str, str]:
+    """接続文字列から AccountName と AccountKey を取り出す（同じ文字列は再解析しない）"""
+    parts = {}
+    for segment in conn_str.split(";"):
+        if "=" in segment:
+            key, value = segment.split("=", 1)
+            parts[key] = value
+    account_name = parts.get("AccountName")
+    account_key = parts.get("AccountKey")
+    if not account_name or not account_key:
+        raise ValueError("Azure Storage connection string is missing AccountName or AccountKey")
+    return account_name, account_key
+
 
 class BlobStorageService:
+    # SAS は読み取り専用で毎回同じ権限のため、一度だけ生成して使い回す
+    _SAS_READ_PERMISSION = BlobSasPermissions(read=True)
+
     def __init__(self):
         self.blob_service_client = BlobServiceClient.from_connection_string(
             settings.AZURE_STORAGE_CONNECTION_STRING
         )
         self.container_name = settings.AZURE_STORAGE_CONTAINER_NAME
-        self._account_name, self._account_key = self._parse_connection_string(
+        self._account_name, self._account_key = _parse_connection_string(
             settings.AZURE_STORAGE_CONNECTION_STRING
         )
-        self._ensure_container_exists()
-
-    def _parse_connection_string(self, conn_str: str) -> tuple[str, str]:
-        parts = {}
-        for segment in conn_str.split(";"):
-            if "=" in segment:
-                key, value = segment.split("=", 1)
-                parts[key] = value
-        account_name = parts.get("AccountName")
-        account_key = parts.get("AccountKey")
-        if not account_name or not account_key:
-            raise ValueError("Azure Storage connection string is missing AccountName or AccountKey")
-        return account_name, account_key
+        self._sas_url_cache: TTLCache = TTLCache(maxsize=1024, ttl=SAS_URL_CACHE_TTL_SECONDS)
+        # get_blob_sas_url は to_thread のワーカーから並行して呼ばれるため、キャッシュ操作は排他する
+        self._sas_url_cache_lock = threading.Lock()
+        # コンテナは通常すでに存在するため起動時には確認せず、
+        # アップロードが 404 になったときだけ作成する（プロセス内で一度確認できれば以後は不要）
+        self._container_verified = False
 
     def _ensure_container_exists(self):
         try:
             container_client = self.blob_service_client.get_container_client(
                 self.container_name
             )
-            if not container_client.exists():
-                container_client.create_container()
-                logger.info(f"Container '{self.container_name}' created")
+            container_client.create_container()
+            logger.info(f"Container '{self.container_name}' created")
+        except ResourceExistsError:
+            pass
         except Exception as e:
             logger.error(f"Error ensuring container exists: {e}", exc_info=True)
             raise
 
     def upload_file(
         self,
-        file_data: bytes,
+        file_data: bytes | BinaryIO,
         filename: str,
-        content_type: Optional[str] = None
+        content_type: Optional[str] = None,
+        length: Optional[int] = None
     ) -> tuple[str, str]:
+        """
+        ファイルを Blob Storage にアップロードする
+
+        file_data にはバイト列のほか、ファイルライクオブジェクトも渡せる。
+        ストリームの場合は全体をメモリに載せず、ブロック単位で読みながら並列に送信する。
+        """
         try:
             blob_name = f"{uuid.uuid4()}_{filename}"
             blob_client = self.blob_service_client.get_blob_client(
@@ -66,11 +98,30 @@ class BlobStorageService:
             if content_type:
                 content_settings = ContentSettings(content_type=content_type)
 
-            blob_client.upload_blob(
-                file_data,
+            # 404 時に再送できるよう、ストリームの開始位置を覚えておく
+            start_position = None
+            if not self._container_verified and hasattr(file_data, "seek"):
+                start_position = file_data.tell()
+
+            upload_kwargs = dict(
+                length=length,
                 content_settings=content_settings,
-                overwrite=True
+                overwrite=True,
+                max_concurrency=UPLOAD_MAX_CONCURRENCY
             )
+            try:
+                blob_client.upload_blob(file_data, **upload_kwargs)
+            except ResourceNotFoundError:
+                if self._container_verified or (
+                    not isinstance(file_data, bytes) and start_position is None
+                ):
+                    raise
+                logger.info(f"Container '{self.container_name}' not found, creating it")
+                self._ensure_container_exists()
+                if start_position is not None:
+                    file_data.seek(start_position)
+                blob_client.upload_blob(file_data, **upload_kwargs)
+            self._container_verified = True
 
             blob_url = blob_client.url
             logger.info(f"File uploaded successfully: {blob_name}")
@@ -115,6 +166,18 @@ class BlobStorageService:
         return blob_client.url
 
     def get_blob_sas_url(self, blob_name: str, expiry_minutes: int = 120) -> str:
+        # 有効期限が長い SAS は TTL の間そのまま使い回す。短いものは同じ分のうちに
+        # 発行したものだけを共有し、一括処理での HMAC 計算の繰り返しを避ける
+        long_lived = expiry_minutes * 60 >= SAS_URL_CACHE_TTL_SECONDS + SAS_URL_MIN_REMAINING_SECONDS
+        if long_lived:
+            cache_key = (blob_name, expiry_minutes)
+        else:
+            cache_key = (blob_name, expiry_minutes, int(time.time()) // 60)
+        with self._sas_url_cache_lock:
+            cached_url = self._sas_url_cache.get(cache_key)
+        if cached_url is not None:
+            return cached_url
+
         blob_client = self.blob_service_client.get_blob_client(
             container=self.container_name,
             blob=blob_name
@@ -125,17 +188,25 @@ class BlobStorageService:
             account_key=self._account_key,
             container_name=self.container_name,
             blob_name=blob_name,
-            permission=BlobSasPermissions(read=True),
+            permission=self._SAS_READ_PERMISSION,
             expiry=expiry_time,
         )
-        return f"{blob_client.url}?{sas_token}"
+        sas_url = f"{blob_client.url}?{sas_token}"
+        # 同じ分の間に返す短期 SAS は有効期限が最大 1 分短くなるだけなので、1 分以下の SAS は共有しない
+        if long_lived or expiry_minutes > 1:
+            with self._sas_url_cache_lock:
+                self._sas_url_cache[cache_key] = sas_url
+        return sas_url
 
 
 _blob_storage_service = None
+_blob_storage_service_lock = threading.Lock()
 
 
 def get_blob_storage_service() -> BlobStorageService:
     global _blob_storage_service
     if _blob_storage_service is None:
-        _blob_storage_service = BlobStorageService()
+        with _blob_storage_service_lock:
+            if _blob_storage_service is None:
+                _blob_storage_service = BlobStorageService()
     return _blob_storage_service
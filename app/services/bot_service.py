@@ -5,17 +5,35 @@ Azure Container Apps (ACA) Job を使って会議Botコンテナを起動・管
 import asyncio
 import logging
 import os
+import re
 import uuid
+from collections import defaultdict
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, Optional
+from typing import Any, Optional
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+from cachetools import TTLCache
 
 from app.timezone import jst_now
 from app.zoom_config import zoom_config
 
 logger = logging.getLogger(__name__)
 
+# セッションはインメモリ保持のため、古いものは一定期間で破棄してメモリを上限付きにする
+SESSION_CACHE_MAXSIZE = 50_000
+SESSION_TTL_SECONDS = 7 * 24 * 3600  # 7日
+
+# 常駐 Bot (ACA App) に派遣したセッションの container_id。ACA Job execution 名とは区別する
+ACA_APP_CONTAINER_ID = "aca-app"
+
+# Zoom URL (https://xxx.zoom.us/j/123456789?pwd=...) から会議番号を取り出す
+_MEETING_ID_RE = re.compile(r"/j/(\d+)")
+# 会議ID文字列から数字以外を取り除く
+_NON_DIGITS_RE = re.compile(r"\D+")
+
 
 class BotStatus(str, Enum):
     """Botの状態"""
@@ -68,8 +86,18 @@ class BotService:
 
     def __init__(self):
         # インメモリでセッション管理
-        self._sessions: Dict[str, BotSession] = {}
+        # TTLCache は挿入時に期限切れを掃除するため、別途の定期タスクは不要
+        self._sessions: TTLCache = TTLCache(
+            maxsize=SESSION_CACHE_MAXSIZE, ttl=SESSION_TTL_SECONDS
+        )
+        # 会議ID → セッションID の索引（会議単位の検索を全件走査にしない）
+        self._by_meeting: dict[str, set[str]] = defaultdict(set)
+        # 終了・エラー以外のセッションID（一覧取得で過去の全セッションを走査しない）
+        self._active: set[str] = set()
         self._aca_client = None
+        self._http_client: Optional[httpx.AsyncClient] = None
+        # 待機中 Bot (ACA App) のプールをどこから探すか（負荷を偏らせないためのラウンドロビン位置）
+        self._app_pool_cursor = 0
 
     def _get_aca_client(self):
         """Azure Container Apps API クライアントを取得（遅延初期化）"""
@@ -92,6 +120,21 @@ class BotService:
             )
         return self._aca_client
 
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """ACA App への dispatch 用 HTTP クライアント（接続を使い回し、派遣ごとの TCP/TLS 確立を省く）"""
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(
+                timeout=10.0,
+                limits=httpx.Limits(max_keepalive_connections=4),
+            )
+        return self._http_client
+
+    async def aclose(self) -> None:
+        """アプリ終了時に HTTP クライアントを閉じる"""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
     def warmup(self):
         """アプリ起動時にACAクライアントとトークンを事前取得"""
         try:
@@ -107,16 +150,13 @@ class BotService:
         Returns:
             (meeting_id, password)
         """
-        import re
-        from urllib.parse import urlparse, parse_qs
-
         meeting_id = ""
         password = None
 
         # URLかどうか判定
         if "zoom.us" in url_or_id:
             # URLからID抽出
-            match = re.search(r'/j/(\d+)', url_or_id)
+            match = _MEETING_ID_RE.search(url_or_id)
             if match:
                 meeting_id = match.group(1)
 
@@ -127,7 +167,7 @@ class BotService:
                 password = query['pwd'][0]
         else:
             # 数字のみの場合はIDとして扱う
-            meeting_id = ''.join(filter(str.isdigit, url_or_id))
+            meeting_id = _NON_DIGITS_RE.sub("", url_or_id)
 
         return meeting_id, password
 
@@ -174,7 +214,7 @@ class BotService:
             raise ValueError("有効な会議URLを指定してください")
 
         # セッション作成
-        session_id = str(uuid.uuid4())
+        session_id = uuid.uuid4().hex
         now = jst_now()
 
         session = BotSession(
@@ -188,6 +228,8 @@ class BotService:
             meeting_url=meeting_url,
         )
         self._sessions[session_id] = session
+        self._by_meeting[clean_meeting_id].add(session_id)
+        self._active.add(session_id)
 
         logger.info(
             f"🤖 Bot派遣セッション作成: "
@@ -197,7 +239,7 @@ class BotService:
 
         # モードに応じて起動方式を選択
         from app.config import settings
-        if settings.ACA_BOT_MODE == "app" and settings.ACA_BOT_APP_URL:
+        if settings.ACA_BOT_MODE == "app" and settings.aca_bot_app_urls:
             asyncio.create_task(self._dispatch_to_aca_app(session))
         else:
             asyncio.create_task(self._run_aca_job(session))
@@ -208,6 +250,8 @@ class BotService:
         """
         ACA App (minReplicas=1) の HTTP エンドポイントに会議参加を指示する。
         コンテナは常時起動済みのため、コールドスタート不要で即座に会議参加。
+        ACA_BOT_APP_URL に複数の App を指定した場合は待機中 Bot のプールとして空きを探し、
+        全て使用中なら ACA Job（コールドスタート）で起動する。
         """
         try:
             session.status = BotStatus.JOINING
@@ -232,33 +276,40 @@ class BotService:
                 meeting_topic=f"会議 {session.meeting_id}"
             )
 
-            import httpx
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                res = await client.post(
-                    f"{settings.ACA_BOT_APP_URL}/dispatch",
-                    json={
-                        "platform": session.platform.value,
-                        "meeting_url": session.meeting_url or session.meeting_id,
-                        "bot_name": bot_name,
-                        "session_id": session.id,
-                        "backend_url": settings.BACKEND_URL,
-                    },
-                )
-
-            if res.status_code == 200:
-                session.container_id = "aca-app"
-                session.updated_at = jst_now()
-                logger.info(f"ACA App dispatch 成功: session_id={session.id}")
-            elif res.status_code == 409:
-                raise ValueError("ACA App Bot は別の会議に参加中です")
-            else:
-                raise ValueError(f"ACA App dispatch 失敗: {res.status_code} {res.text}")
+            # 起動済みの Bot を順に当たり、空いているものに割り当てる（409 = 別の会議に参加中）
+            urls = settings.aca_bot_app_urls
+            start = self._app_pool_cursor % len(urls)
+            self._app_pool_cursor += 1
+            payload = {
+                "platform": session.platform.value,
+                "meeting_url": session.meeting_url or session.meeting_id,
+                "bot_name": bot_name,
+                "session_id": session.id,
+                "backend_url": settings.BACKEND_URL,
+            }
+            for url in urls[start:] + urls[:start]:
+                res = await self._get_http_client().post(f"{url}/dispatch", json=payload)
+                if res.status_code == 200:
+                    session.container_id = ACA_APP_CONTAINER_ID
+                    session.updated_at = jst_now()
+                    logger.info(f"ACA App dispatch 成功: session_id={session.id}, app={url}")
+                    return
+                if res.status_code != 409:
+                    raise ValueError(f"ACA App dispatch 失敗: {res.status_code} {res.text}")
+
+            # 待機中の Bot がすべて使用中なら、コールドスタートの ACA Job にフォールバックする
+            if settings.ACA_BOT_JOB_NAME:
+                logger.info(f"ACA App Bot が全て使用中のため ACA Job で起動: session_id={session.id}")
+                await self._run_aca_job(session)
+                return
+            raise ValueError("ACA App Bot は別の会議に参加中です")
 
         except Exception as e:
             logger.error(f"ACA App dispatch エラー: {e}")
             session.status = BotStatus.ERROR
             session.error_message = str(e)
             session.updated_at = jst_now()
+            self._active.discard(session.id)
 
     async def _run_aca_job(self, session: BotSession) -> None:
         """
@@ -326,7 +377,7 @@ class BotService:
 
             # Azure SDK は同期的なので run_in_executor で非同期化
             client = self._get_aca_client()
-            loop = asyncio.get_event_loop()
+            loop = asyncio.get_running_loop()
 
             execution = await loop.run_in_executor(
                 None,
@@ -353,6 +404,7 @@ class BotService:
             session.status = BotStatus.ERROR
             session.error_message = str(e)
             session.updated_at = jst_now()
+            self._active.discard(session.id)
 
     def get_session(self, session_id: str) -> Optional[BotSession]:
         """セッション取得"""
@@ -361,20 +413,33 @@ class BotService:
     def get_sessions_by_meeting(self, meeting_id: str) -> list[BotSession]:
         """会議IDでセッション検索"""
         clean_id = self._extract_meeting_id(meeting_id)
-        return [
-            s for s in self._sessions.values()
-            if s.meeting_id == clean_id
-        ]
+        session_ids = self._by_meeting.get(clean_id)
+        if not session_ids:
+            return []
+        # 期限切れで破棄されたセッションは索引からも外す（索引の set 自体を更新する）
+        session_ids.difference_update([sid for sid in session_ids if sid not in self._sessions])
+        if not session_ids:
+            del self._by_meeting[clean_id]
+            return []
+        return [self._sessions[sid] for sid in session_ids]
 
     def get_active_sessions(self) -> list[BotSession]:
         """
         アクティブなセッション一覧を取得
         （終了・エラー以外のセッション）
         """
-        return [
-            s for s in self._sessions.values()
-            if s.status not in (BotStatus.COMPLETED, BotStatus.ERROR)
-        ]
+        # ステータスはコールバック（bot_router）からも直接更新されるため、
+        # 終了済みになっていたものはここで索引から外す
+        active = []
+        for session_id in list(self._active):
+            session = self._sessions.get(session_id)
+            if session is None or session.status in (BotStatus.COMPLETED, BotStatus.ERROR):
+                self._active.discard(session_id)
+            else:
+                active.append(session)
+        # 従来どおり作成順で返す
+        active.sort(key=lambda session: session.created_at)
+        return active
 
     async def terminate_bot(self, session_id: str) -> bool:
         """
@@ -397,11 +462,13 @@ class BotService:
         logger.info(f"🛑 Bot退出開始: session_id={session_id}")
 
         # ACA Job execution を停止
-        if session.container_id:
+        # 常駐 Bot (ACA App) は Job execution ではないため停止 API を呼ばない
+        # （会議終了時に Bot 自身が /complete を通知して待機状態に戻る）
+        if session.container_id and session.container_id != ACA_APP_CONTAINER_ID:
             try:
                 from app.config import settings
                 client = self._get_aca_client()
-                loop = asyncio.get_event_loop()
+                loop = asyncio.get_running_loop()
 
                 await loop.run_in_executor(
                     None,
@@ -417,6 +484,7 @@ class BotService:
 
         session.status = BotStatus.COMPLETED
         session.updated_at = jst_now()
+        self._active.discard(session_id)
 
         logger.info(f"✅ Bot退出完了: session_id={session_id}")
         return True
@@ -441,14 +509,14 @@ class BotService:
         Returns:
             終了させたセッション数
         """
-        sessions = self.get_sessions_by_meeting(meeting_id)
-        count = 0
-        for session in sessions:
-            # 完了・エラー済みでなければ終了処理を実行
-            if session.status not in (BotStatus.COMPLETED, BotStatus.ERROR):
-                await self.terminate_bot(session.id)
-                count += 1
-        return count
+        # 完了・エラー済みでなければ終了処理を実行
+        # 停止はそれぞれ ACA API の完了待ちになるため、順番に待たず並行して行う
+        targets = [
+            session.id for session in self.get_sessions_by_meeting(meeting_id)
+            if session.status not in (BotStatus.COMPLETED, BotStatus.ERROR)
+        ]
+        await asyncio.gather(*(self.terminate_bot(session_id) for session_id in targets))
+        return len(targets)
 
 
 # シングルトンインスタンス
@@ -1,3 +1,4 @@
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 from app.models.chat import ChatSession, ChatMessage
 from app.models.job import Job, JobStatus
@@ -8,6 +9,37 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# 議事録修正アシスタントのシステムプロンプト（呼び出しごとに組み立て直さない）
+SYSTEM_PROMPT = """あなたは議事録の修正を支援するAIアシスタントです。
+
+【役割】
+- ユーザーの指示に従って、議事録を修正・改善する
+- 元の議事録の重要な情報を失わないように注意する
+- 指示が曖昧な場合は、最も合理的な解釈で対応する
+
+【対応可能な指示の例】
+- 「要約を短くして」→ 簡潔にまとめる
+- 「もっと詳しく」→ 詳細を追加
+- 「箇条書きにして」→ フォーマットを変更
+- 「決定事項を強調して」→ 特定セクションを強調
+- 「〇〇の部分を削除」→ 指定部分を削除
+- 「〇〇について追加」→ 指定内容を追加
+
+【出力形式】
+- 修正後の議事録全体を出力
+- 元のフォーマット（Markdown）を維持
+- 変更箇所が明確になるように配慮
+
+【注意事項】
+- 事実と異なる情報を追加しない
+- 元の議事録の文脈を尊重する
+- ユーザーの指示に忠実に従う
+"""
+_SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+
+# コンテキストに含める過去メッセージの件数
+CONTEXT_HISTORY_LIMIT = 5
+
 
 class ChatError(Exception):
     """チャット機能のエラー"""
@@ -48,7 +80,7 @@ class ChatService:
             raise InvalidMessageError("Summary not generated yet")
         
         # セッション作成
-        session_id = str(uuid.uuid4())
+        session_id = uuid.uuid4().hex
         session = ChatSession(
             session_id=session_id,
             job_id=job_id
@@ -100,37 +132,35 @@ class ChatService:
         # コンテキスト構築（ユーザーメッセージ保存前に実行）
         context = self.build_context(session_id, job.summary, user_message)
         
-        # ユーザーメッセージを保存
-        user_msg_id = str(uuid.uuid4())
+        # ユーザーメッセージ（AI応答と合わせて 1 回のコミットで保存する）
+        user_msg_id = uuid.uuid4().hex
         user_msg = ChatMessage(
             message_id=user_msg_id,
             session_id=session_id,
             role="user",
             content=user_message
         )
-        self.db.add(user_msg)
-        self.db.commit()
         
         # AI応答生成
         if streaming:
-            return self._generate_streaming_response(session_id, context)
+            return self._generate_streaming_response(session_id, context, user_msg)
         else:
-            return self._generate_response(session_id, context)
+            return self._generate_response(session_id, context, user_msg)
     
-    def _generate_response(self, session_id: str, context: List[dict]) -> str:
+    def _generate_response(self, session_id: str, context: List[dict], user_msg: ChatMessage) -> str:
         """非ストリーミングレスポンスを生成"""
         try:
             response_content = self.openai_service.chat_rewrite(context, streaming=False)
             
             # アシスタントメッセージを保存
-            assistant_msg_id = str(uuid.uuid4())
+            assistant_msg_id = uuid.uuid4().hex
             assistant_msg = ChatMessage(
                 message_id=assistant_msg_id,
                 session_id=session_id,
                 role="assistant",
                 content=response_content
             )
-            self.db.add(assistant_msg)
+            self.db.add_all([user_msg, assistant_msg])
             self.db.commit()
             
             logger.info(f"Chat response generated for session: {session_id}")
@@ -143,24 +173,32 @@ class ChatService:
     def _generate_streaming_response(
         self, 
         session_id: str, 
-        context: List[dict]
+        context: List[dict],
+        user_msg: ChatMessage
     ) -> Generator[str, None, None]:
-        """ストリーミングレスポンスを生成"""
+        """
+        ストリーミングレスポンスを生成
+        
+        ストリーミング中にリクエストのセッションが閉じられても失われないよう、
+        ユーザーメッセージは完了時にアシスタントメッセージと一緒に追加する
+        """
         try:
-            full_content = ""
+            # 文字列の += 連結はチャンク数に対して二乗のコピーになり得るため、リストに溜めて最後に結合する
+            chunks: list[str] = []
             for chunk in self.openai_service.chat_rewrite(context, streaming=True):
-                full_content += chunk
+                chunks.append(chunk)
                 yield chunk
+            full_content = "".join(chunks)
             
             # 完了後にアシスタントメッセージを保存
-            assistant_msg_id = str(uuid.uuid4())
+            assistant_msg_id = uuid.uuid4().hex
             assistant_msg = ChatMessage(
                 message_id=assistant_msg_id,
                 session_id=session_id,
                 role="assistant",
                 content=full_content
             )
-            self.db.add(assistant_msg)
+            self.db.add_all([user_msg, assistant_msg])
             self.db.commit()
             
             logger.info(f"Streaming chat response completed for session: {session_id}")
@@ -196,42 +234,21 @@ class ChatService:
         Returns:
             OpenAI APIに渡すメッセージリスト
         """
-        SYSTEM_PROMPT = """あなたは議事録の修正を支援するAIアシスタントです。
-
-【役割】
-- ユーザーの指示に従って、議事録を修正・改善する
-- 元の議事録の重要な情報を失わないように注意する
-- 指示が曖昧な場合は、最も合理的な解釈で対応する
-
-【対応可能な指示の例】
-- 「要約を短くして」→ 簡潔にまとめる
-- 「もっと詳しく」→ 詳細を追加
-- 「箇条書きにして」→ フォーマットを変更
-- 「決定事項を強調して」→ 特定セクションを強調
-- 「〇〇の部分を削除」→ 指定部分を削除
-- 「〇〇について追加」→ 指定内容を追加
-
-【出力形式】
-- 修正後の議事録全体を出力
-- 元のフォーマット（Markdown）を維持
-- 変更箇所が明確になるように配慮
-
-【注意事項】
-- 事実と異なる情報を追加しない
-- 元の議事録の文脈を尊重する
-- ユーザーの指示に忠実に従う
-"""
-        
-        messages = [
-            {"role": "system", "content": SYSTEM_PROMPT}
-        ]
+        # システムメッセージは共有の dict を使う（OpenAI SDK は読み取るだけ）
+        messages = [_SYSTEM_MESSAGE]
         
         # 過去のメッセージを取得（最新5件のみ）
-        past_messages = self.db.query(ChatMessage).filter(
+        # 最新 N 件の抽出と古い順への並べ替えはどちらも SQL 側で行い、必要な列だけを取得する
+        recent = select(
+            ChatMessage.id, ChatMessage.role, ChatMessage.content, ChatMessage.created_at
+        ).where(
             ChatMessage.session_id == session_id
-        ).order_by(ChatMessage.created_at.desc()).limit(10).all()
-        
-        past_messages = list(reversed(past_messages))  # 古い順に並び替え
+        ).order_by(
+            ChatMessage.created_at.desc(), ChatMessage.id.desc()
+        ).limit(CONTEXT_HISTORY_LIMIT).subquery()
+        past_messages = self.db.execute(
+            select(recent.c.role, recent.c.content).order_by(recent.c.created_at, recent.c.id)
+        ).all()
         
         # 最初のメッセージの場合、元の議事録を含める
         if not past_messages:
@@ -241,10 +258,10 @@ class ChatService:
             })
         else:
             # 過去の対話履歴を追加（最新5件のみ）
-            for msg in past_messages[-5:]:
+            for role, content in past_messages:
                 messages.append({
-                    "role": msg.role,
-                    "content": msg.content
+                    "role": role,
+                    "content": content
                 })
         
         # 新しいユーザーメッセージを追加
@@ -257,25 +274,25 @@ class ChatService:
     
     def list_sessions(self, job_id: str = None) -> List[dict]:
         """セッション一覧を取得"""
-        query = self.db.query(ChatSession)
+        # メッセージ件数はセッションごとに COUNT を発行せず、外部結合 + GROUP BY の 1 クエリで取得する
+        query = self.db.query(
+            ChatSession, func.count(ChatMessage.id)
+        ).outerjoin(
+            ChatMessage, ChatMessage.session_id == ChatSession.session_id
+        )
         
         if job_id:
             query = query.filter(ChatSession.job_id == job_id)
         
-        sessions = query.order_by(ChatSession.created_at.desc()).all()
+        rows = query.group_by(ChatSession.id).order_by(ChatSession.created_at.desc()).all()
         
-        result = []
-        for session in sessions:
-            message_count = self.db.query(ChatMessage).filter(
-                ChatMessage.session_id == session.session_id
-            ).count()
-            
-            result.append({
+        return [
+            {
                 "session_id": session.session_id,
                 "job_id": session.job_id,
                 "message_count": message_count,
                 "created_at": session.created_at,
                 "updated_at": session.updated_at
-            })
-        
-        return result
+            }
+            for session, message_count in rows
+        ]
@@ -3,6 +3,7 @@ CRMサービス - 顧客・商談管理のビジネスロジック
 
 Notion Customer DB / Deal DBとの連携を担当します。
 """
+from dataclasses import dataclass
 from typing import List, Optional
 from datetime import date, datetime
 from fastapi import HTTPException
@@ -19,12 +20,43 @@ NOTION_CUSTOMER_DB_ID = getattr(settings, 'NOTION_CUSTOMER_DB_ID', None) or ""
 NOTION_DEAL_DB_ID = getattr(settings, 'NOTION_DEAL_DB_ID', None) or ""
 
 
+@dataclass(slots=True)
+class _CustomerRow:
+    """インメモリ保持する顧客レコード"""
+    id: str
+    company_name: str
+    contact_person: str
+    email: Optional[str]
+    phone: Optional[str]
+    address: Optional[str]
+    notes: Optional[str]
+    created_at: datetime
+    updated_at: datetime
+    notion_page_url: str = ""
+
+
+@dataclass(slots=True)
+class _DealRow:
+    """インメモリ保持する商談レコード"""
+    id: str
+    customer_id: str
+    name: str
+    amount: Optional[int]
+    probability: Optional[int]
+    expected_close_date: Optional[date]
+    status: DealStatus
+    created_at: datetime
+    updated_at: datetime
+    close_date: Optional[date] = None
+    notion_page_url: str = ""
+
+
 class CRMService:
     """顧客・商談管理サービス"""
 
     def __init__(self):
-        self._customers: dict[str, dict] = {}
-        self._deals: dict[str, dict] = {}
+        self._customers: dict[str, _CustomerRow] = {}
+        self._deals: dict[str, _DealRow] = {}
         self._next_customer_id = 1
         self._next_deal_id = 1
 
@@ -41,18 +73,17 @@ class CRMService:
     async def create_customer(self, data: CustomerCreate) -> CustomerResponse:
         now = jst_now()
         cid = self._generate_customer_id()
-        record = {
-            "id": cid,
-            "company_name": data.company_name,
-            "contact_person": data.contact_person,
-            "email": data.email,
-            "phone": data.phone,
-            "address": data.address,
-            "notes": data.notes,
-            "notion_page_url": "",
-            "created_at": now,
-            "updated_at": now,
-        }
+        record = _CustomerRow(
+            id=cid,
+            company_name=data.company_name,
+            contact_person=data.contact_person,
+            email=data.email,
+            phone=data.phone,
+            address=data.address,
+            notes=data.notes,
+            created_at=now,
+            updated_at=now,
+        )
         self._customers[cid] = record
         logger.info(f"Customer created: {cid} - {data.company_name}")
         return self._to_customer_response(record)
@@ -71,18 +102,18 @@ class CRMService:
         if not record:
             raise HTTPException(status_code=404, detail="顧客が見つかりません")
         if data.company_name is not None:
-            record["company_name"] = data.company_name
+            record.company_name = data.company_name
         if data.contact_person is not None:
-            record["contact_person"] = data.contact_person
+            record.contact_person = data.contact_person
         if data.email is not None:
-            record["email"] = data.email
+            record.email = data.email
         if data.phone is not None:
-            record["phone"] = data.phone
+            record.phone = data.phone
         if data.address is not None:
-            record["address"] = data.address
+            record.address = data.address
         if data.notes is not None:
-            record["notes"] = data.notes
-        record["updated_at"] = jst_now()
+            record.notes = data.notes
+        record.updated_at = jst_now()
         logger.info(f"Customer updated: {customer_id}")
         return self._to_customer_response(record)
 
@@ -92,18 +123,19 @@ class CRMService:
         del self._customers[customer_id]
         logger.info(f"Customer deleted: {customer_id}")
 
-    def _to_customer_response(self, record: dict) -> CustomerResponse:
-        return CustomerResponse(
-            id=record["id"],
-            company_name=record["company_name"],
-            contact_person=record["contact_person"],
-            email=record.get("email"),
-            phone=record.get("phone"),
-            address=record.get("address"),
-            notes=record.get("notes"),
-            notion_page_url=record.get("notion_page_url", ""),
-            created_at=record["created_at"],
-            updated_at=record["updated_at"],
+    def _to_customer_response(self, record: _CustomerRow) -> CustomerResponse:
+        # レコードは create/update で検証済みの値のみを保持しているため、再検証せずに組み立てる
+        return CustomerResponse.model_construct(
+            id=record.id,
+            company_name=record.company_name,
+            contact_person=record.contact_person,
+            email=record.email,
+            phone=record.phone,
+            address=record.address,
+            notes=record.notes,
+            notion_page_url=record.notion_page_url,
+            created_at=record.created_at,
+            updated_at=record.updated_at,
         )
 
     # --- 商談管理 ---
@@ -114,19 +146,17 @@ class CRMService:
             raise HTTPException(status_code=400, detail="指定された顧客が見つかりません")
         now = jst_now()
         did = self._generate_deal_id()
-        record = {
-            "id": did,
-            "customer_id": data.customer_id,
-            "name": data.name,
-            "amount": data.amount,
-            "probability": data.probability,
-            "expected_close_date": data.expected_close_date,
-            "status": data.status.value if data.status else DealStatus.LEAD.value,
-            "close_date": None,
-            "notion_page_url": "",
-            "created_at": now,
-            "updated_at": now,
-        }
+        record = _DealRow(
+            id=did,
+            customer_id=data.customer_id,
+            name=data.name,
+            amount=data.amount,
+            probability=data.probability,
+            expected_close_date=data.expected_close_date,
+            status=data.status or DealStatus.LEAD,
+            created_at=now,
+            updated_at=now,
+        )
         self._deals[did] = record
         logger.info(f"Deal created: {did} - {data.name}")
         return self._to_deal_response(record)
@@ -134,12 +164,13 @@ class CRMService:
     async def get_deals(
         self, customer_id: Optional[str] = None, status: Optional[DealStatus] = None
     ) -> List[DealResponse]:
-        deals = list(self._deals.values())
-        if customer_id:
-            deals = [d for d in deals if d["customer_id"] == customer_id]
-        if status:
-            deals = [d for d in deals if d["status"] == status.value]
-        return [self._to_deal_response(d) for d in deals]
+        # 中間リストを作らず、1 回の走査で絞り込みとレスポンス変換を行う
+        return [
+            self._to_deal_response(d)
+            for d in self._deals.values()
+            if (not customer_id or d.customer_id == customer_id)
+            and (status is None or d.status == status)
+        ]
 
     async def get_deal(self, deal_id: str) -> DealResponse:
         record = self._deals.get(deal_id)
@@ -152,19 +183,19 @@ class CRMService:
         if not record:
             raise HTTPException(status_code=404, detail="商談が見つかりません")
         if data.name is not None:
-            record["name"] = data.name
+            record.name = data.name
         if data.amount is not None:
-            record["amount"] = data.amount
+            record.amount = data.amount
         if data.probability is not None:
-            record["probability"] = data.probability
+            record.probability = data.probability
         if data.expected_close_date is not None:
-            record["expected_close_date"] = data.expected_close_date
+            record.expected_close_date = data.expected_close_date
         if data.status is not None:
-            record["status"] = data.status.value
+            record.status = data.status
             # 成約・失注時にclose_dateを自動設定
             if data.status in (DealStatus.WON, DealStatus.LOST):
-                record["close_date"] = date.today()
-        record["updated_at"] = jst_now()
+                record.close_date = date.today()
+        record.updated_at = jst_now()
         logger.info(f"Deal updated: {deal_id}")
         return self._to_deal_response(record)
 
@@ -174,19 +205,20 @@ class CRMService:
         del self._deals[deal_id]
         logger.info(f"Deal deleted: {deal_id}")
 
-    def _to_deal_response(self, record: dict) -> DealResponse:
-        return DealResponse(
-            id=record["id"],
-            customer_id=record["customer_id"],
-            name=record["name"],
-            amount=record.get("amount"),
-            probability=record.get("probability"),
-            expected_close_date=record.get("expected_close_date"),
-            status=DealStatus(record["status"]),
-            close_date=record.get("close_date"),
-            notion_page_url=record.get("notion_page_url", ""),
-            created_at=record["created_at"],
-            updated_at=record["updated_at"],
+    def _to_deal_response(self, record: _DealRow) -> DealResponse:
+        # 検証済みのレコードから再検証せずに組み立てる
+        return DealResponse.model_construct(
+            id=record.id,
+            customer_id=record.customer_id,
+            name=record.name,
+            amount=record.amount,
+            probability=record.probability,
+            expected_close_date=record.expected_close_date,
+            status=record.status,
+            close_date=record.close_date,
+            notion_page_url=record.notion_page_url,
+            created_at=record.created_at,
+            updated_at=record.updated_at,
         )
 
 
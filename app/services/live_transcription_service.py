@@ -2,36 +2,59 @@
 リアルタイム文字起こしサービス
 セッションごとにリアルタイムの文字起こしセグメントを管理する
 """
+import asyncio
 import logging
+import threading
+from collections import deque
 from dataclasses import dataclass, field
+from functools import lru_cache
 from datetime import datetime
+from itertools import islice
 from typing import Dict, List, Optional
+import time
 import uuid
 
-from app.timezone import jst_now
+from app.timezone import JST, jst_now
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@lru_cache(maxsize=256)
+def _compute_initials(speaker: str) -> str:
+    """話者名からイニシャルを生成（日本語名の場合は最初の2文字）"""
+    return speaker[:2] if speaker else ""
+
+
+@dataclass(slots=True)
 class TranscriptSegment:
     """文字起こしセグメント"""
     id: str
     speaker: str
     text: str
     time: str
-    timestamp: datetime
+    timestamp_ns: int  # UNIX エポックからのナノ秒（datetime は timestamp で必要時に生成）
     speaker_id: str = ""  # Azureからのspeaker_id（マッピング用）
     initials: str = ""
     color_class: str = ""
+    # to_dict() の結果（追加後はほぼ不変なので使い回し、話者名の更新時に破棄する）
+    _cached_dict: Optional[dict] = field(default=None, repr=False, compare=False)
     
     def __post_init__(self):
         # initials が空の場合は speaker から自動生成
         if not self.initials and self.speaker:
-            # 日本語名の場合は最初の2文字
-            self.initials = self.speaker[:2] if self.speaker else ""
+            self.initials = _compute_initials(self.speaker)
+    
+    @property
+    def timestamp(self) -> datetime:
+        seconds, nanos = divmod(self.timestamp_ns, 1_000_000_000)
+        return datetime.fromtimestamp(seconds, JST).replace(microsecond=nanos // 1000)
     
     def to_dict(self) -> dict:
+        if self._cached_dict is None:
+            self._cached_dict = self._build_dict()
+        return self._cached_dict
+    
+    def _build_dict(self) -> dict:
         return {
             "id": self.id,
             "speaker": self.speaker,
@@ -44,16 +67,43 @@ class TranscriptSegment:
         }
 
 
-@dataclass
+_JST_OFFSET_SECONDS = int(JST.utcoffset(None).total_seconds())
+
+
+def _format_jst_hhmm(timestamp_ns: int) -> str:
+    """エポックナノ秒を JST の "HH:MM" に整形（datetime を生成しない）"""
+    minutes = (timestamp_ns // 1_000_000_000 + _JST_OFFSET_SECONDS) // 60
+    return f"{minutes // 60 % 24:02d}:{minutes % 60:02d}"
+
+
+# 1 セッションで保持するセグメント数の上限（超えた分は古いものから破棄）
+MAX_SEGMENTS = 20_000
+
+
+@dataclass(slots=True)
 class LiveSession:
-    """ライブセッション"""
+    """
+    ライブセッション
+    
+    segments は MAX_SEGMENTS 件のリングバッファで、上限を超えると最も古い
+    セグメントから上書きされる（evicted_count に破棄済み件数を数える）。
+    """
     session_id: str
     meeting_id: str
     meeting_topic: str
     started_at: datetime
-    segments: List[TranscriptSegment] = field(default_factory=list)
+    segments: deque[TranscriptSegment] = field(default_factory=lambda: deque(maxlen=MAX_SEGMENTS))
+    evicted_count: int = 0  # リングバッファから破棄されたセグメント数
+    # speaker_id -> その話者のセグメント（古い順、話者マッピング更新の対象絞り込み用）
+    speaker_id_index: Dict[str, deque[TranscriptSegment]] = field(default_factory=dict)
+    # speaker_id（なければ話者名）-> 話者情報（初出順、get_unique_speakers 用）
+    unique_speakers: Dict[str, dict] = field(default_factory=dict)
     participant_count: int = 0
     speaker_mapping: Dict[str, str] = field(default_factory=dict)  # speaker_id -> ユーザー指定の名前
+    last_segment_id: str = ""  # 最後に追加されたセグメントID
+    revision: int = 0  # セグメント・話者名・参加者数が変わるたびに加算（ETag 用）
+    subscribers: List[asyncio.Queue] = field(default_factory=list)  # WebSocket 配信先
+    last_activity: float = field(default_factory=time.monotonic)  # 最終更新時刻（アイドル判定用）
     
     def to_dict(self) -> dict:
         return {
@@ -67,6 +117,15 @@ class LiveSession:
         }
 
 
+# この時間更新のないセッションは終了したものとみなして破棄する
+SESSION_IDLE_TTL_SECONDS = 2 * 60 * 60
+# アイドルセッションを掃除する間隔
+SESSION_REAP_INTERVAL_SECONDS = 60
+
+# 購読者ごとのキュー上限（溢れた分は破棄し、クライアントは since_id で再取得する）
+SUBSCRIBER_QUEUE_MAXSIZE = 256
+
+
 # スピーカーごとの色クラス（ローテーション）
 SPEAKER_COLORS = [
     "bg-blue-100 text-blue-700",
@@ -86,6 +145,14 @@ class LiveTranscriptionService:
         self._sessions: Dict[str, LiveSession] = {}
         # スピーカー名 -> 色クラスのマップ（セッションごと）
         self._speaker_colors: Dict[str, Dict[str, str]] = {}
+        # セグメントID -> 通し番号（セッションごと、since_id 検索用）
+        # segments 内の位置は 通し番号 - evicted_count
+        self._segment_index: Dict[str, Dict[str, int]] = {}
+        # 購読者キューを所有するイベントループ（Speech SDK のコールバックスレッドからの配信用）
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # add_segment は Speech SDK / RTMS のワーカースレッドからも呼ばれるため、
+        # segments（deque）の追加と走査はこのロックで排他する
+        self._segments_lock = threading.Lock()
     
     def create_session(
         self,
@@ -104,6 +171,7 @@ class LiveTranscriptionService:
         )
         self._sessions[session_id] = session
         self._speaker_colors[session_id] = {}
+        self._segment_index[session_id] = {}
         
         logger.info(f"🎙️ ライブセッション作成: session_id={session_id}, meeting_id={meeting_id}")
         return session
@@ -118,17 +186,12 @@ class LiveTranscriptionService:
         """
         スピーカーの色クラスを取得（なければ新規割り当て）
         """
-        if session_id not in self._speaker_colors:
-            self._speaker_colors[session_id] = {}
-        
-        colors = self._speaker_colors[session_id]
-        
-        if speaker not in colors:
+        colors = self._speaker_colors.setdefault(session_id, {})
+        color = colors.get(speaker)
+        if color is None:
             # 新しいスピーカーに色を割り当て
-            color_index = len(colors) % len(SPEAKER_COLORS)
-            colors[speaker] = SPEAKER_COLORS[color_index]
-        
-        return colors[speaker]
+            color = colors[speaker] = SPEAKER_COLORS[len(colors) % len(SPEAKER_COLORS)]
+        return color
     
     def add_segment(
         self,
@@ -156,7 +219,7 @@ class LiveTranscriptionService:
             logger.warning(f"セッションが見つかりません: {session_id}")
             return None
         
-        now = jst_now()
+        now_ns = time.time_ns()
         
         # 話者マッピングがあれば適用
         display_speaker = speaker
@@ -164,21 +227,50 @@ class LiveTranscriptionService:
             display_speaker = session.speaker_mapping[speaker_id]
         
         segment = TranscriptSegment(
-            id=str(uuid.uuid4()),
+            id=uuid.uuid4().hex,
             speaker=display_speaker,
             speaker_id=speaker_id,
             text=text,
-            time=time_str or now.strftime("%H:%M"),
-            timestamp=now,
+            time=time_str or _format_jst_hhmm(now_ns),
+            timestamp_ns=now_ns,
             color_class=self._get_speaker_color(session_id, speaker_id or speaker)
         )
         
-        session.segments.append(segment)
+        with self._segments_lock:
+            index = self._segment_index.setdefault(session_id, {})
+            index[segment.id] = session.evicted_count + len(session.segments)
+            if len(session.segments) == session.segments.maxlen:
+                # 最も古いセグメントが押し出されるので索引からも外す
+                oldest = session.segments[0]
+                index.pop(oldest.id, None)
+                if oldest.speaker_id:
+                    session.speaker_id_index[oldest.speaker_id].popleft()
+                session.evicted_count += 1
+                if session.evicted_count == 1:
+                    logger.warning(
+                        f"セグメント数が上限 {session.segments.maxlen} 件に達したため古いものから破棄します: "
+                        f"session={session_id}"
+                    )
+            session.segments.append(segment)
+            session.last_activity = time.monotonic()
+            if speaker_id:
+                session.speaker_id_index.setdefault(speaker_id, deque()).append(segment)
+            session.unique_speakers.setdefault(speaker_id or speaker, {
+                "speaker_id": speaker_id,
+                "label": display_speaker,
+                "mapped_name": session.speaker_mapping.get(speaker_id, ""),
+            })
+            session.last_segment_id = segment.id
+            session.revision += 1
         
-        logger.debug(
-            f"セグメント追加: session={session_id}, speaker={display_speaker}, "
-            f"text={text[:30]}..."
-        )
+        if session.subscribers:
+            self._broadcast(session, segment.to_dict())
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "セグメント追加: session=%s, speaker=%s, text=%s...",
+                session_id, display_speaker, text[:30]
+            )
         
         return segment
     
@@ -204,41 +296,137 @@ class LiveTranscriptionService:
             return []
         
         segments = session.segments
+        start = 0
         
-        # since_id が指定された場合、その ID 以降のセグメントを返す
-        if since_id:
-            found_index = -1
-            for i, seg in enumerate(segments):
-                if seg.id == since_id:
-                    found_index = i
-                    break
+        with self._segments_lock:
+            # since_id が指定された場合、その ID 以降のセグメントを返す
+            # （破棄済み・未知の ID は先頭から返す）
+            if since_id:
+                seq = self._segment_index.get(session_id, {}).get(since_id)
+                if seq is not None:
+                    start = seq - session.evicted_count + 1
             
-            if found_index >= 0:
-                segments = segments[found_index + 1:]
+            # limit 適用（末尾から必要な件数だけ取り出す）
+            count = min(len(segments) - start, limit)
+            if count <= 0:
+                return []
+            tail = list(islice(reversed(segments), count))
+        tail.reverse()
+        return tail
+    
+    def snapshot_segments(self, session_id: str) -> List[TranscriptSegment]:
+        """
+        保持中の全セグメントを古い順のリストで取得（他スレッドの追加と競合しないスナップショット）
+        """
+        session = self._sessions.get(session_id)
+        if not session:
+            return []
+        with self._segments_lock:
+            return list(session.segments)
+    
+    def subscribe(self, session_id: str) -> Optional[asyncio.Queue]:
+        """
+        セッションの新着セグメントを購読する
         
-        # limit 適用
-        return segments[-limit:] if len(segments) > limit else segments
+        Returns:
+            セグメント dict が届くキュー（セッション削除時は None が届く）、
+            セッションが見つからない場合は None
+        """
+        session = self._sessions.get(session_id)
+        if not session:
+            return None
+        
+        self._loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_MAXSIZE)
+        session.subscribers.append(queue)
+        return queue
+    
+    def unsubscribe(self, session_id: str, queue: asyncio.Queue) -> None:
+        """
+        購読を解除
+        """
+        session = self._sessions.get(session_id)
+        if session and queue in session.subscribers:
+            session.subscribers.remove(queue)
+    
+    def _broadcast(self, session: LiveSession, payload: Optional[dict]) -> None:
+        """
+        購読者全員にペイロードを配信（イベントループ外のスレッドからはループに委譲）
+        """
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        
+        if self._loop is None or running_loop is self._loop:
+            self._put_all(session.session_id, list(session.subscribers), payload)
+        elif not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(
+                self._put_all, session.session_id, list(session.subscribers), payload
+            )
+    
+    @staticmethod
+    def _put_all(session_id: str, queues: List[asyncio.Queue], payload: Optional[dict]) -> None:
+        for queue in queues:
+            try:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                logger.warning(f"購読キューが満杯のためセグメントを破棄: session={session_id}")
     
     def update_participant_count(self, session_id: str, count: int) -> None:
         """
         参加者数を更新
         """
         session = self._sessions.get(session_id)
-        if session:
+        if not session:
+            return
+        session.last_activity = time.monotonic()
+        if session.participant_count != count:
             session.participant_count = count
+            session.revision += 1
     
     def clear_session(self, session_id: str) -> bool:
         """
         セッションをクリア
         """
         if session_id in self._sessions:
-            del self._sessions[session_id]
+            session = self._sessions.pop(session_id)
+            if session.subscribers:
+                # 購読中の WebSocket に終了を通知
+                self._broadcast(session, None)
             if session_id in self._speaker_colors:
                 del self._speaker_colors[session_id]
+            self._segment_index.pop(session_id, None)
             logger.info(f"🗑️ ライブセッション削除: session_id={session_id}")
             return True
         return False
     
+    def reap_idle_sessions(self, idle_seconds: float = SESSION_IDLE_TTL_SECONDS) -> int:
+        """
+        idle_seconds 以上更新のないセッションを削除（終了処理されずに残ったセッション対策）
+        
+        Returns:
+            削除したセッション数
+        """
+        deadline = time.monotonic() - idle_seconds
+        idle_ids = [sid for sid, session in list(self._sessions.items()) if session.last_activity < deadline]
+        for session_id in idle_ids:
+            self.clear_session(session_id)
+        if idle_ids:
+            logger.info(f"🧹 アイドルセッションを削除: {len(idle_ids)}件")
+        return len(idle_ids)
+    
+    async def run_reaper(self, interval_seconds: float = SESSION_REAP_INTERVAL_SECONDS) -> None:
+        """
+        アイドルセッションの定期削除ループ（アプリ起動時にタスクとして開始する）
+        """
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                self.reap_idle_sessions()
+            except Exception as e:
+                logger.error(f"アイドルセッション削除エラー: {e}", exc_info=True)
+    
     def get_active_sessions(self) -> List[LiveSession]:
         """
         アクティブなセッション一覧を取得
@@ -265,13 +453,33 @@ class LiveTranscriptionService:
             logger.warning(f"セッションが見つかりません: {session_id}")
             return False
         
+        # 取得したマッピングをその場で書き換えて渡された場合は差分が取れないので全件更新
+        previous = session.speaker_mapping if session.speaker_mapping is not mapping else {}
         session.speaker_mapping = mapping
+        session.revision += 1
+        session.last_activity = time.monotonic()
+        
+        # マッピングから外れた話者は mapped_name だけ消す（セグメントの表示名はそのまま）
+        for speaker_id in previous.keys() - mapping.keys():
+            speaker = session.unique_speakers.get(speaker_id)
+            if speaker:
+                speaker["mapped_name"] = ""
         
-        # 既存セグメントの話者名も更新
-        for segment in session.segments:
-            if segment.speaker_id and segment.speaker_id in mapping:
-                segment.speaker = mapping[segment.speaker_id]
-                segment.initials = segment.speaker[:2] if segment.speaker else ""
+        # 表示名が変わった speaker_id の既存セグメントだけ話者名を更新
+        for speaker_id, name in mapping.items():
+            if previous.get(speaker_id) == name:
+                continue
+            speaker = session.unique_speakers.get(speaker_id)
+            if speaker:
+                speaker["label"] = name
+                speaker["mapped_name"] = name
+            initials = _compute_initials(name)
+            with self._segments_lock:
+                targets = list(session.speaker_id_index.get(speaker_id, ()))
+            for segment in targets:
+                segment.speaker = name
+                segment.initials = initials
+                segment._cached_dict = None
         
         logger.info(f"🔄 話者マッピング更新: session={session_id}, mapping={mapping}")
         return True
@@ -296,17 +504,7 @@ class LiveTranscriptionService:
         if not session:
             return []
         
-        speakers = {}
-        for segment in session.segments:
-            sid = segment.speaker_id or segment.speaker
-            if sid not in speakers:
-                speakers[sid] = {
-                    "speaker_id": segment.speaker_id,
-                    "label": segment.speaker,
-                    "mapped_name": session.speaker_mapping.get(segment.speaker_id, "")
-                }
-        
-        return list(speakers.values())
+        return list(session.unique_speakers.values())
 
 
 # シングルトンインスタンス
@@ -6,12 +6,66 @@ Azure OpenAIを使用して議事録テキストから会議メタデータを
 from typing import Optional, List, Tuple
 from datetime import date
 from app.services.azure_openai import get_azure_openai_service
+from cachetools import TTLCache
 from fastapi import HTTPException
+import asyncio
+import hashlib
 import logging
-import json
+import orjson
 
 logger = logging.getLogger(__name__)
 
+# 抽出結果キャッシュ（同じ要約・文字起こしでの再実行やリトライで API を呼ばない）
+METADATA_CACHE_MAXSIZE = 128
+METADATA_CACHE_TTL_SECONDS = 3600  # 1時間
+
+# プロンプトに含める文字起こしの最大文字数
+TRANSCRIPTION_EXCERPT_CHARS = 3000
+
+# メタデータ抽出用プロンプト
+METADATA_SYSTEM_PROMPT = """あなたは議事録分析の専門家です。
+以下の議事録から、会議のメタデータを抽出してください。
+
+以下のJSON形式で出力してください:
+{
+  "mtg_name": "会議の名称（例：「QTnet案件 定例会議」）",
+  "participants": ["参加者1", "参加者2"],
+  "company_name": "関連する企業名（顧客企業など）",
+  "meeting_date": "会議の開催日（YYYY-MM-DD形式）",
+  "meeting_type": "会議の種別（定例/商談/社内/キックオフ/レビュー/その他）",
+  "project": "関連する案件・プロジェクト名",
+  "key_stakeholders": ["重要な共有先となる人物"],
+  "key_team": "重要な共有先となるチーム（営業/開発/企画/経営/その他）",
+  "search_keywords": "検索用キーワード（カンマ区切り）"
+}
+
+ルール:
+1. 明示されていない項目はnullを設定してください
+2. 参加者名は敬称を除いて抽出してください（「田中さん」→「田中」）
+3. 日付が明示されていない場合はnullを設定してください
+4. 会議の種別は内容から推定してください
+5. 検索キーワードは会議の主要トピックから3-5個抽出してください
+6. 必ずJSON形式で出力してください
+7. **mtg_nameは必ず設定してください。会議の内容から適切な名称を生成してください（例：「札幌ビルアプリ開発 進捗確認会議」）**
+8. **company_nameは顧客企業や関連企業名を抽出してください**
+9. **key_stakeholdersは会議で言及された重要人物を抽出してください**"""
+
+METADATA_USER_PROMPT_TEMPLATE = """【議事録要約】
+{summary}{transcription}
+
+上記の議事録からメタデータを抽出してください。"""
+
+# 案件自動選択用プロンプト
+PROJECT_SELECTION_SYSTEM_PROMPT = (
+    "あなたは会議内容と案件を照合するアシスタントです。"
+    "会議の要約と案件リストを比較し、最も関連性の高い案件を1つ選んでください。"
+    "確信が持てない場合はnullを返してください。"
+    "以下のJSON形式で出力してください:\n"
+    '{"project_id": "<NotionページID>", "project_name": "<案件名>", "reason": "<理由>"}\n'
+    "または関連案件がなければ:\n"
+    '{"project_id": null, "project_name": null, "reason": "<理由>"}'
+)
+
 
 class MeetingMetadata:
     """会議メタデータ"""
@@ -84,6 +138,19 @@ class MeetingMetadata:
 class MetadataService:
     """メタデータ抽出サービス"""
     
+    def __init__(self, cache_enabled: bool = True):
+        # キー -> AI 応答の JSON 文字列（呼び出し側で結果を書き換えても影響しないよう文字列で保持）
+        self._cache: Optional[TTLCache] = (
+            TTLCache(maxsize=METADATA_CACHE_MAXSIZE, ttl=METADATA_CACHE_TTL_SECONDS)
+            if cache_enabled else None
+        )
+    
+    @staticmethod
+    def _cache_key(summary: str, transcription_text: str) -> bytes:
+        return hashlib.blake2b(
+            "\x1e".join((summary, transcription_text)).encode("utf-8"), digest_size=16
+        ).digest()
+    
     async def extract_metadata(
         self, 
         summary: str, 
@@ -109,65 +176,46 @@ class MetadataService:
             
             openai_service = get_azure_openai_service()
             
-            # メタデータ抽出用プロンプト
-            system_prompt = """あなたは議事録分析の専門家です。
-以下の議事録から、会議のメタデータを抽出してください。
-
-以下のJSON形式で出力してください:
-{
-  "mtg_name": "会議の名称（例：「QTnet案件 定例会議」）",
-  "participants": ["参加者1", "参加者2"],
-  "company_name": "関連する企業名（顧客企業など）",
-  "meeting_date": "会議の開催日（YYYY-MM-DD形式）",
-  "meeting_type": "会議の種別（定例/商談/社内/キックオフ/レビュー/その他）",
-  "project": "関連する案件・プロジェクト名",
-  "key_stakeholders": ["重要な共有先となる人物"],
-  "key_team": "重要な共有先となるチーム（営業/開発/企画/経営/その他）",
-  "search_keywords": "検索用キーワード（カンマ区切り）"
-}
-
-ルール:
-1. 明示されていない項目はnullを設定してください
-2. 参加者名は敬称を除いて抽出してください（「田中さん」→「田中」）
-3. 日付が明示されていない場合はnullを設定してください
-4. 会議の種別は内容から推定してください
-5. 検索キーワードは会議の主要トピックから3-5個抽出してください
-6. 必ずJSON形式で出力してください
-7. **mtg_nameは必ず設定してください。会議の内容から適切な名称を生成してください（例：「札幌ビルアプリ開発 進捗確認会議」）**
-8. **company_nameは顧客企業や関連企業名を抽出してください**
-9. **key_stakeholdersは会議で言及された重要人物を抽出してください**"""
-
             # 文字起こしテキストがある場合は追加
             transcription_text = ""
             if transcription:
                 # 長すぎる場合は先頭部分のみ使用
-                max_length = 3000
-                if len(transcription) > max_length:
-                    transcription_text = f"\n\n【文字起こしテキスト（抜粋）】\n{transcription[:max_length]}..."
-                else:
-                    transcription_text = f"\n\n【文字起こしテキスト】\n{transcription}"
+                excerpt = transcription[:TRANSCRIPTION_EXCERPT_CHARS]
+                truncated = len(excerpt) < len(transcription)
+                transcription_text = "".join((
+                    "\n\n【文字起こしテキスト（抜粋）】\n" if truncated else "\n\n【文字起こしテキスト】\n",
+                    excerpt,
+                    "..." if truncated else "",
+                ))
             
-            user_prompt = f"""【議事録要約】
-{summary}{transcription_text}
-
-上記の議事録からメタデータを抽出してください。"""
-
-            # Azure OpenAI APIを呼び出し
-            response = openai_service.client.chat.completions.create(
-                model=openai_service.deployment_name,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.3,
-                max_tokens=1500,
-                response_format={"type": "json_object"}
+            user_prompt = METADATA_USER_PROMPT_TEMPLATE.format(
+                summary=summary, transcription=transcription_text
             )
+
+            cache_key = self._cache_key(summary, transcription_text)
+            content = self._cache.get(cache_key) if self._cache is not None else None
+            if content is not None:
+                logger.info("Metadata served from cache")
+            else:
+                # Azure OpenAI APIを呼び出し（デプロイメント振り分け・429 フェイルオーバー込み。
+                # 同期クライアントのためイベントループを塞がないようスレッドで実行する）
+                response = await asyncio.to_thread(
+                    openai_service._create_chat_completion,
+                    messages=[
+                        {"role": "system", "content": METADATA_SYSTEM_PROMPT},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    temperature=0.3,
+                    max_tokens=1500,
+                    response_format={"type": "json_object"}
+                )
+                
+                content = response.choices[0].message.content
+                logger.info(f"Metadata extraction response: {content}")
             
-            content = response.choices[0].message.content
-            logger.info(f"Metadata extraction response: {content}")
-            
-            result = json.loads(content)
+            result = orjson.loads(content)
+            if self._cache is not None:
+                self._cache[cache_key] = content
             
             # デフォルト日付の適用
             if not result.get("meeting_date") and default_date:
@@ -186,7 +234,7 @@ class MetadataService:
             
             return metadata
             
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"Failed to parse metadata response as JSON: {e}", exc_info=True)
             raise HTTPException(
                 status_code=500,
@@ -246,21 +294,10 @@ class MetadataService:
                 extra = f"\n\n【文字起こし抜粋】\n{transcription[:1500]}"
 
             openai_service = get_azure_openai_service()
-            response = openai_service.client.chat.completions.create(
-                model=openai_service.deployment_name,
+            response = await asyncio.to_thread(
+                openai_service._create_chat_completion,
                 messages=[
-                    {
-                        "role": "system",
-                        "content": (
-                            "あなたは会議内容と案件を照合するアシスタントです。"
-                            "会議の要約と案件リストを比較し、最も関連性の高い案件を1つ選んでください。"
-                            "確信が持てない場合はnullを返してください。"
-                            "以下のJSON形式で出力してください:\n"
-                            '{"project_id": "<NotionページID>", "project_name": "<案件名>", "reason": "<理由>"}\n'
-                            "または関連案件がなければ:\n"
-                            '{"project_id": null, "project_name": null, "reason": "<理由>"}'
-                        )
-                    },
+                    {"role": "system", "content": PROJECT_SELECTION_SYSTEM_PROMPT},
                     {
                         "role": "user",
                         "content": (
@@ -275,7 +312,7 @@ class MetadataService:
                 response_format={"type": "json_object"}
             )
 
-            result = json.loads(response.choices[0].message.content)
+            result = orjson.loads(response.choices[0].message.content)
             project_id = result.get("project_id")
             project_name = result.get("project_name")
             reason = result.get("reason", "")
@@ -29,6 +29,12 @@ def get_notion_service() -> NotionService:
     return _notion_service
 
 
+async def close_notion_service() -> None:
+    """生成済みのサービスがあれば非同期クライアントを閉じる（アプリ終了時用）"""
+    if _notion_service is not None:
+        await _notion_service.aclose()
+
+
 def get_notion_client() -> NotionService:
     """get_notion_serviceのエイリアス"""
     return get_notion_service()
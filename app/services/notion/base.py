@@ -1,7 +1,7 @@
 """Notion サービス基底クラス - クライアント初期化と共通設定"""
 import logging
 
-from notion_client import Client
+from notion_client import AsyncClient
 
 from app.config import settings
 
@@ -14,7 +14,8 @@ class NotionServiceBase:
     def __init__(self):
         self.enabled = bool(settings.NOTION_API_KEY and settings.NOTION_DATABASE_ID)
         if self.enabled:
-            self.client = Client(auth=settings.NOTION_API_KEY)
+            # 1 つの AsyncClient（httpx の接続プール）をシングルトンで使い回す
+            self.client = AsyncClient(auth=settings.NOTION_API_KEY)
             self.database_id = settings.NOTION_DATABASE_ID
             self.meeting_database_id = settings.NOTION_DATABASE_ID
             self.task_database_id = settings.NOTION_TASK_DB_ID
@@ -25,3 +26,8 @@ class NotionServiceBase:
             )
         else:
             logger.warning("Notion API key or Database ID not set. Notion integration disabled.")
+
+    async def aclose(self) -> None:
+        """非同期クライアントの接続プールを閉じる"""
+        if self.enabled:
+            await self.client.aclose()
@@ -1,10 +1,26 @@
 """Notion コンテンツ変換 - Markdown → Notion blocks"""
 import re
 import logging
+from collections.abc import Iterator
 from typing import Optional
 
+import orjson
+
 logger = logging.getLogger(__name__)
 
+# Notion API の制限: rich_text 1 要素あたりの文字数 / 1 ブロックあたりの rich_text 要素数
+RICH_TEXT_MAX_CHARS = 2000
+RICH_TEXT_MAX_ITEMS = 100
+# 1 リクエストで送れるブロック数の上限（ネストした children を含む）と、
+# ペイロード上限 500KB に対して余裕をもたせたバイト数
+REQUEST_MAX_BLOCKS = 100
+REQUEST_MAX_BYTES = 400_000
+
+# 前後の空白を除いて "## " / "### " で始まる見出し行。見出しテキストをキャプチャする
+_SECTION_HEADER_RE = re.compile(r"^[^\S\n]*#{2,3} (.*\S)[^\S\n]*$", re.M)
+# 各行末の空白（改行以外）
+_TRAILING_WS_RE = re.compile(r"[^\S\n]+$", re.M)
+
 
 def parse_summary(summary: str) -> dict:
     """
@@ -13,25 +29,11 @@ def parse_summary(summary: str) -> dict:
     旧フォーマット（概要、主な議題、決定事項、アクションアイテム、次回の議題）の
     両方に対応する。
     """
+    parts = _SECTION_HEADER_RE.split(summary)
     sections = {}
-    current_section = None
-    current_content = []
-
-    for line in summary.split("\n"):
-        stripped = line.strip()
-        if stripped.startswith("## ") or stripped.startswith("### "):
-            if current_section:
-                sections[current_section] = "\n".join(current_content).strip()
-            if stripped.startswith("### "):
-                current_section = stripped[4:].strip()
-            else:
-                current_section = stripped[3:].strip()
-            current_content = []
-        elif current_section is not None:
-            current_content.append(line.rstrip())
-
-    if current_section:
-        sections[current_section] = "\n".join(current_content).strip()
+    # parts = [見出し前, 見出し1, 本文1, 見出し2, 本文2, ...]
+    for i in range(1, len(parts), 2):
+        sections[parts[i].strip()] = _TRAILING_WS_RE.sub("", parts[i + 1]).strip()
 
     return sections
 
@@ -97,6 +99,54 @@ def _flush_text_buffer(text_buffer: list, blocks: list):
         })
 
 
+def _chunks(text: str, size: int = RICH_TEXT_MAX_CHARS):
+    """text を size 文字ずつ切り出す"""
+    for i in range(0, len(text), size):
+        yield text[i:i + size]
+
+
+def long_text_to_paragraphs(text: str, max_items: int = RICH_TEXT_MAX_ITEMS) -> list:
+    """
+    長いテキストを切り捨てずに paragraph ブロックのリストに変換する。
+    RICH_TEXT_MAX_CHARS 文字ごとの rich_text 要素に分け、
+    max_items 要素を超える分は次の paragraph に続ける。
+    """
+    blocks = []
+    rich_text = []
+    for chunk in _chunks(text):
+        rich_text.append({"type": "text", "text": {"content": chunk}})
+        if len(rich_text) == max_items:
+            blocks.append({"object": "block", "type": "paragraph", "paragraph": {"rich_text": rich_text}})
+            rich_text = []
+    if rich_text or not blocks:
+        blocks.append({"object": "block", "type": "paragraph", "paragraph": {"rich_text": rich_text}})
+    return blocks
+
+
+def batch_blocks(
+    blocks: list,
+    max_blocks: int = REQUEST_MAX_BLOCKS,
+    max_bytes: int = REQUEST_MAX_BYTES,
+) -> Iterator[list]:
+    """
+    ブロックを 1 リクエストに収まる単位に分割する。
+    各バッチは max_blocks 件以下かつシリアライズ後 max_bytes 以下
+    （単体で超えるブロックはそのまま 1 件のバッチにする）。
+    """
+    batch = []
+    batch_bytes = 0
+    for block in blocks:
+        size = len(orjson.dumps(block))
+        if batch and (len(batch) == max_blocks or batch_bytes + size > max_bytes):
+            yield batch
+            batch = []
+            batch_bytes = 0
+        batch.append(block)
+        batch_bytes += size
+    if batch:
+        yield batch
+
+
 def markdown_table_to_notion(table_lines: list) -> Optional[dict]:
     """
     Markdownテーブル行のリストをNotion APIのtableブロックに変換する。
@@ -179,38 +229,38 @@ def parse_cell_rich_text(text: str) -> list:
     return result
 
 
+def heading_2_block(text: str) -> dict:
+    """heading_2 ブロックを生成する"""
+    return {
+        "object": "block",
+        "type": "heading_2",
+        "heading_2": {
+            "rich_text": [{"type": "text", "text": {"content": text}}]
+        }
+    }
+
+
+def sections_to_blocks(sections: dict) -> list:
+    """parse_summary のセクションを 見出し + 本文ブロック の並びに変換する"""
+    return [
+        block
+        for section_title, content in sections.items()
+        for block in (heading_2_block(section_title), *content_to_blocks(content))
+    ]
+
+
 def build_meeting_content(summary: str, metadata: dict) -> list:
     """議事録ページのコンテンツを構築（新フォーマット対応・テーブル変換あり）"""
-    children = []
-
     participants = metadata.get("participants", [])
-    if participants:
-        children.append({
-            "object": "block",
-            "type": "heading_2",
-            "heading_2": {
-                "rich_text": [{"type": "text", "text": {"content": "参加者"}}]
-            }
-        })
-        children.append({
+    participant_blocks = [
+        heading_2_block("参加者"),
+        {
             "object": "block",
             "type": "paragraph",
             "paragraph": {
                 "rich_text": [{"type": "text", "text": {"content": "、".join(participants)}}]
             }
-        })
-
-    sections = parse_summary(summary)
-
-    for section_title, content in sections.items():
-        children.append({
-            "object": "block",
-            "type": "heading_2",
-            "heading_2": {
-                "rich_text": [{"type": "text", "text": {"content": section_title}}]
-            }
-        })
-        content_blocks = content_to_blocks(content)
-        children.extend(content_blocks)
+        },
+    ] if participants else []
 
-    return children
+    return [*participant_blocks, *sections_to_blocks(parse_summary(summary))]
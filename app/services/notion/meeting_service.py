@@ -4,13 +4,20 @@ from typing import Optional
 
 from app.services.notion.base import NotionServiceBase
 from app.services.notion.content_builder import (
+    batch_blocks,
     build_meeting_content,
-    content_to_blocks,
+    heading_2_block,
+    long_text_to_paragraphs,
     parse_summary,
+    sections_to_blocks,
 )
 
 logger = logging.getLogger(__name__)
 
+# 書き起こし paragraph 1 つあたりの rich_text 要素数。
+# 上限の 100 要素（20 万文字）では日本語 1 ブロックだけでペイロード上限を超えるため小さく分ける
+TRANSCRIPT_PARAGRAPH_ITEMS = 20
+
 
 class NotionMeetingService(NotionServiceBase):
     """議事録の作成・更新を担当するサービス"""
@@ -101,7 +108,7 @@ class NotionMeetingService(NotionServiceBase):
 
             children = build_meeting_content(summary, metadata)
 
-            response = self.client.pages.create(
+            response = await self.client.pages.create(
                 parent={"database_id": self.meeting_database_id},
                 properties=properties,
                 children=children
@@ -131,7 +138,7 @@ class NotionMeetingService(NotionServiceBase):
         try:
             task_relations = [{"id": task_id} for task_id in task_ids]
 
-            self.client.pages.update(
+            await self.client.pages.update(
                 page_id=meeting_page_id,
                 properties={"タスク": {"relation": task_relations}}
             )
@@ -153,7 +160,7 @@ class NotionMeetingService(NotionServiceBase):
             return
 
         try:
-            self.client.pages.update(
+            await self.client.pages.update(
                 page_id=meeting_page_id,
                 properties={"案件": {"relation": [{"id": project_page_id}]}}
             )
@@ -164,7 +171,7 @@ class NotionMeetingService(NotionServiceBase):
             logger.error(f"Error updating meeting project relation: {e}", exc_info=True)
             raise
 
-    def create_meeting_note(
+    async def create_meeting_note(
         self,
         title: str,
         transcription: str,
@@ -175,55 +182,42 @@ class NotionMeetingService(NotionServiceBase):
         if not self.enabled:
             raise Exception("Notion integration is not configured. Set NOTION_API_KEY and NOTION_DATABASE_ID.")
         try:
-            summary_sections = parse_summary(summary)
-
-            children = []
-            for section_title, content in summary_sections.items():
-                children.append({
-                    "object": "block",
-                    "type": "heading_2",
-                    "heading_2": {
-                        "rich_text": [{"type": "text", "text": {"content": section_title}}]
-                    }
-                })
-                content_blocks = content_to_blocks(content)
-                children.extend(content_blocks)
-
-            children.extend([
-                {
-                    "object": "block",
-                    "type": "heading_2",
-                    "heading_2": {
-                        "rich_text": [{"type": "text", "text": {"content": "全文書き起こし"}}]
-                    }
-                },
-                {
-                    "object": "block",
-                    "type": "toggle",
-                    "toggle": {
-                        "rich_text": [{"type": "text", "text": {"content": "書き起こしテキストを表示"}}],
-                        "children": [
-                            {
-                                "object": "block",
-                                "type": "paragraph",
-                                "paragraph": {
-                                    "rich_text": [{"type": "text", "text": {"content": transcription[:2000]}}]
-                                }
-                            }
-                        ]
-                    }
-                }
-            ])
-
-            response = self.client.pages.create(
+            # Notion は 1 リクエストあたりのブロック数とペイロードサイズに上限があるため、
+            # 最初のバッチでページを作成し、残りは blocks.children.append で追記する
+            summary_batches = list(batch_blocks([
+                *sections_to_blocks(parse_summary(summary)),
+                heading_2_block("全文書き起こし"),
+            ]))
+            transcript_batches = list(batch_blocks(
+                long_text_to_paragraphs(transcription, max_items=TRANSCRIPT_PARAGRAPH_ITEMS)
+            ))
+
+            response = await self.client.pages.create(
                 parent={"database_id": self.database_id},
                 properties={
                     "名前": {
                         "title": [{"text": {"content": title}}]
                     },
                 },
-                children=children
+                children=summary_batches[0]
+            )
+            for batch in summary_batches[1:]:
+                await self.client.blocks.children.append(block_id=response["id"], children=batch)
+
+            toggle_response = await self.client.blocks.children.append(
+                block_id=response["id"],
+                children=[{
+                    "object": "block",
+                    "type": "toggle",
+                    "toggle": {
+                        "rich_text": [{"type": "text", "text": {"content": "書き起こしテキストを表示"}}],
+                        "children": transcript_batches[0]
+                    }
+                }]
             )
+            toggle_id = toggle_response["results"][0]["id"]
+            for batch in transcript_batches[1:]:
+                await self.client.blocks.children.append(block_id=toggle_id, children=batch)
 
             page_id = response["id"]
             page_url = response["url"]
@@ -1,4 +1,5 @@
 """Notion 案件 CRUD 操作"""
+import asyncio
 import logging
 from typing import Optional
 
@@ -10,14 +11,36 @@ logger = logging.getLogger(__name__)
 class NotionProjectService(NotionServiceBase):
     """案件の一覧取得・作成を担当するサービス"""
 
+    # 実行中の案件一覧取得タスク（同時呼び出しで共有する）
+    _projects_inflight: Optional[asyncio.Task] = None
+
     async def list_projects(self) -> list[dict]:
-        """Notion案件DBから案件一覧を取得する"""
+        """
+        Notion案件DBから案件一覧を取得する
+
+        同時に複数の呼び出しがあった場合は Notion へのリクエストを 1 回にまとめ、
+        実行中の取得結果を全員で共有する（single-flight）。
+        """
         if not self.enabled or not self.project_database_id:
             logger.warning("Project DB is not configured.")
             return []
 
+        task = self._projects_inflight
+        if task is None:
+            task = asyncio.ensure_future(self._query_projects())
+            self._projects_inflight = task
+            task.add_done_callback(self._clear_projects_inflight)
+        # 呼び出し元のキャンセルが共有タスクに波及しないよう shield する
+        return await asyncio.shield(task)
+
+    def _clear_projects_inflight(self, task: asyncio.Task) -> None:
+        if self._projects_inflight is task:
+            self._projects_inflight = None
+
+    async def _query_projects(self) -> list[dict]:
+        """Notion案件DBを検索して案件一覧に変換する"""
         try:
-            results = self.client.databases.query(
+            results = await self.client.databases.query(
                 database_id=self.project_database_id,
                 sorts=[{"property": "案件名", "direction": "ascending"}]
             )
@@ -158,7 +181,7 @@ class NotionProjectService(NotionServiceBase):
             if data.get("dropbox_url"):
                 properties["DropBoxURL"] = {"url": data["dropbox_url"]}
 
-            response = self.client.pages.create(
+            response = await self.client.pages.create(
                 parent={"database_id": self.project_database_id},
                 properties=properties
             )
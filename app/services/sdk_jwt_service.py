@@ -2,20 +2,34 @@
 SDK JWT生成サービス
 Zoom Meeting SDK用のJWTトークンを生成する
 """
+import re
 import time
 import logging
 from typing import Optional
 
 import jwt
+from cachetools import TTLCache
 
 from app.zoom_config import zoom_config
 
 logger = logging.getLogger(__name__)
 
+# 同じ会議への再派遣で署名をやり直さないよう、発行済みトークンを使い回す
+JWT_CACHE_MAXSIZE = 256
+JWT_CACHE_TTL_SECONDS = 3600
+# 使い回すのは有効期間がこの割合以上残っているトークンのみ
+JWT_MIN_REMAINING_RATIO = 0.5
+
+_NON_DIGITS_RE = re.compile(r"\D+")
+
 
 class SDKJwtService:
     """Zoom Meeting SDK用JWT生成サービス"""
     
+    def __init__(self):
+        # (会議番号, ロール, 有効期間) -> (トークン, 有効期限)
+        self._jwt_cache: TTLCache = TTLCache(maxsize=JWT_CACHE_MAXSIZE, ttl=JWT_CACHE_TTL_SECONDS)
+    
     def generate_jwt(
         self,
         meeting_number: str,
@@ -41,9 +55,16 @@ class SDKJwtService:
             return None
         
         # 会議番号から非数字を除去
-        clean_meeting_number = ''.join(filter(str.isdigit, meeting_number))
+        clean_meeting_number = _NON_DIGITS_RE.sub("", meeting_number)
         
         iat = int(time.time())
+        cache_key = (clean_meeting_number, role, expiration_seconds)
+        cached = self._jwt_cache.get(cache_key)
+        if cached is not None:
+            token, cached_exp = cached
+            if cached_exp - iat >= expiration_seconds * JWT_MIN_REMAINING_RATIO:
+                return token
+        
         exp = iat + expiration_seconds
         
         payload = {
@@ -61,6 +82,7 @@ class SDKJwtService:
                 zoom_config.sdk_secret,
                 algorithm="HS256"
             )
+            self._jwt_cache[cache_key] = (token, exp)
             logger.info(
                 f"SDK JWT生成完了: meeting={clean_meeting_number}, "
                 f"role={role}, exp={exp}"
@@ -20,11 +20,23 @@ from app.models.task import (
 )
 from app.services.azure_openai import get_azure_openai_service
 from fastapi import HTTPException
+from functools import lru_cache
 import logging
 import json
 
 logger = logging.getLogger(__name__)
 
+# 優先度の並び順: 高 > 中 > 低
+_PRIORITY_ORDER = {TaskPriority.HIGH: 3, TaskPriority.MEDIUM: 2, TaskPriority.LOW: 1}
+
+# タスク一覧のソートキー（許可された sort_by のみ）
+_TASK_SORT_KEYS = {
+    "due_date": lambda t: t.due_date if t.due_date else date.max,
+    "priority": lambda t: _PRIORITY_ORDER.get(t.priority, 0),
+    "assignee": lambda t: t.assignee or "",
+    "created_at": lambda t: t.created_at,
+}
+
 
 class TaskService:
     """タスク管理サービス"""
@@ -410,6 +422,7 @@ class TaskService:
             
             # NotionレスポンスをパースしてTaskResponseに変換
             tasks = []
+            today = date.today()
             for notion_task in notion_tasks:
                 parsed = notion_service.parse_task_response(notion_task)
                 
@@ -421,7 +434,7 @@ class TaskService:
                 # 期限超過判定
                 is_overdue = False
                 if parsed["due_date"] and parsed["status"] != TaskStatus.COMPLETED:
-                    is_overdue = parsed["due_date"] < date.today()
+                    is_overdue = parsed["due_date"] < today
                 
                 task_response = TaskResponse(
                     id=parsed["id"],
@@ -445,19 +458,10 @@ class TaskService:
                 )
                 tasks.append(task_response)
             
-            # ソート処理
-            reverse = (sort_order == "desc")
-            
-            if sort_by == "due_date":
-                tasks.sort(key=lambda t: t.due_date if t.due_date else date.max, reverse=reverse)
-            elif sort_by == "priority":
-                # 優先度: 高 > 中 > 低
-                priority_order = {TaskPriority.HIGH: 3, TaskPriority.MEDIUM: 2, TaskPriority.LOW: 1}
-                tasks.sort(key=lambda t: priority_order.get(t.priority, 0), reverse=reverse)
-            elif sort_by == "assignee":
-                tasks.sort(key=lambda t: t.assignee or "", reverse=reverse)
-            elif sort_by == "created_at":
-                tasks.sort(key=lambda t: t.created_at, reverse=reverse)
+            # ソート処理（フィルターは Notion 側のクエリで適用済み）
+            sort_key = _TASK_SORT_KEYS.get(sort_by)
+            if sort_key is not None:
+                tasks.sort(key=sort_key, reverse=(sort_order == "desc"))
             
             logger.info(f"Retrieved {len(tasks)} tasks")
             return tasks
@@ -637,13 +641,7 @@ class TaskService:
             )
 
 
-# シングルトンインスタンス
-_task_service: Optional[TaskService] = None
-
-
+@lru_cache(maxsize=None)
 def get_task_service() -> TaskService:
     """TaskServiceのシングルトンインスタンスを取得"""
-    global _task_service
-    if _task_service is None:
-        _task_service = TaskService()
-    return _task_service
+    return TaskService()
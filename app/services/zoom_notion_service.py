@@ -1,4 +1,5 @@
 
+import asyncio
 import logging
 from datetime import datetime, timezone, timedelta
 from notion_client import AsyncClient
@@ -9,6 +10,9 @@ _JST = timezone(timedelta(hours=9))
 
 logger = logging.getLogger(__name__)
 
+# Notion API のレート制限（平均 3 リクエスト/秒）を踏まえ、同時に発行するページ作成数を制限する
+NOTION_WRITE_CONCURRENCY = 3
+
 class ZoomNotionService:
     """Zoom用Notion同期サービス（既存のnotion_client.pyとは別管理）"""
     
@@ -21,6 +25,8 @@ class ZoomNotionService:
             self.client = None
         else:
             self.client = AsyncClient(auth=self.api_key)
+        # 同時同期リクエストのバースト時に 429 を連発しないよう書き込みを絞る
+        self._write_semaphore = asyncio.Semaphore(NOTION_WRITE_CONCURRENCY)
 
     async def create_meeting_note(self, title: str, summary: str, tags: list[str]) -> dict:
         """
@@ -115,11 +121,12 @@ class ZoomNotionService:
                 }
             ]
 
-            response = await self.client.pages.create(
-                parent={"database_id": self.database_id},
-                properties=properties,
-                children=children
-            )
+            async with self._write_semaphore:
+                response = await self.client.pages.create(
+                    parent={"database_id": self.database_id},
+                    properties=properties,
+                    children=children
+                )
             
             logger.info(f"Successfully created Notion page: {response.get('url')}")
             return response
@@ -12,6 +12,7 @@ os.environ["DATABASE_URL"] = "sqlite:///./test.db"
 import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
 from app.database import Base
 from app.models.user import User
@@ -24,7 +25,12 @@ import app.models.notification_db  # noqa: F401
 @pytest.fixture()
 def test_engine():
     """テスト用 SQLite in-memory エンジン"""
-    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+    # run_db / to_thread 経由でワーカースレッドから触っても同じ in-memory DB を見るよう接続を共有する
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
     Base.metadata.create_all(bind=engine)
     yield engine
     Base.metadata.drop_all(bind=engine)
@@ -0,0 +1,97 @@
+"""
+azure_openai.py のユニットテスト
+
+C0: generate_summary, _create_chat_completion の正常系
+C1: プロンプトをキーにしたキャッシュヒット / ミス, 文字起こし修正後のキャッシュミス, 429 時の次デプロイメントへの切り替え,
+    全デプロイメント 429
+"""
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import httpx
+import pytest
+from openai import RateLimitError
+
+from app.config import settings
+from app.services.azure_openai import AzureOpenAIService
+
+
+@pytest.fixture()
+def service(monkeypatch):
+    monkeypatch.setattr(settings, "AZURE_OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(settings, "AZURE_OPENAI_ENDPOINT", "https://example.openai.azure.com/")
+    monkeypatch.setattr(settings, "AZURE_OPENAI_DEPLOYMENTS", [])
+    svc = AzureOpenAIService()
+    yield svc
+    svc._http_client.close()
+
+
+def completion(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def rate_limit_error():
+    request = httpx.Request("POST", "https://example.openai.azure.com/")
+    return RateLimitError("rate limited", response=httpx.Response(429, request=request), body=None)
+
+
+def fake_deployment(**create_kwargs):
+    client = MagicMock()
+    client.chat.completions.create = MagicMock(**create_kwargs)
+    return client
+
+
+class TestSummaryCache:
+    def test_same_prompt_is_served_from_cache(self, service, monkeypatch):
+        client = fake_deployment(return_value=completion("要約"))
+        monkeypatch.setattr(service, "_deployments", [(client, "gpt")])
+
+        assert service.generate_summary("文字起こし", "プロンプトA") == "要約"
+        assert service.generate_summary("文字起こし", "プロンプトA") == "要約"
+        assert client.chat.completions.create.call_count == 1
+
+    def test_different_prompt_misses_cache(self, service, monkeypatch):
+        client = fake_deployment(side_effect=[completion("要約A"), completion("要約B")])
+        monkeypatch.setattr(service, "_deployments", [(client, "gpt")])
+
+        assert service.generate_summary("文字起こし", "プロンプトA") == "要約A"
+        assert service.generate_summary("文字起こし", "プロンプトB") == "要約B"
+        assert client.chat.completions.create.call_count == 2
+
+    def test_edited_transcription_misses_cache(self, service, monkeypatch):
+        client = fake_deployment(side_effect=[completion("要約A"), completion("要約B")])
+        monkeypatch.setattr(service, "_deployments", [(client, "gpt")])
+
+        assert service.generate_summary("文字起こし", "プロンプト") == "要約A"
+        # 文字起こしを修正すると別キーになるため、明示的な破棄なしで再生成される
+        assert service.generate_summary("文字起こし（修正）", "プロンプト") == "要約B"
+        assert client.chat.completions.create.call_count == 2
+
+
+class TestCreateChatCompletion:
+    def test_rate_limited_deployment_fails_over_to_next(self, service, monkeypatch):
+        limited = fake_deployment(side_effect=rate_limit_error())
+        healthy = fake_deployment(return_value=completion("ok"))
+        monkeypatch.setattr(service, "_deployments", [(limited, "primary"), (healthy, "secondary")])
+        monkeypatch.setattr(service, "_rr", iter([0, 1, 0, 1]))
+
+        assert service._create_chat_completion(messages=[]).choices[0].message.content == "ok"
+        assert healthy.chat.completions.create.call_args.kwargs["model"] == "secondary"
+        # 429 を返したデプロイメントはクールダウン中となり、次の呼び出しでは選ばれない
+        assert service._cooldown_until[0] > time.monotonic()
+        service._create_chat_completion(messages=[])
+        assert limited.chat.completions.create.call_count == 1
+        assert healthy.chat.completions.create.call_count == 2
+
+    def test_all_deployments_rate_limited_raises(self, service, monkeypatch):
+        first = fake_deployment(side_effect=rate_limit_error())
+        second = fake_deployment(side_effect=rate_limit_error())
+        monkeypatch.setattr(service, "_deployments", [(first, "primary"), (second, "secondary")])
+        monkeypatch.setattr(service, "_rr", iter([0, 1]))
+
+        with pytest.raises(RateLimitError):
+            service._create_chat_completion(messages=[])
+        assert first.chat.completions.create.call_count == 1
+        assert second.chat.completions.create.call_count == 1
+
@@ -0,0 +1,44 @@
+"""
+bot_service.py のユニットテスト
+
+C0: get_sessions_by_meeting の正常系
+C1: 期限切れセッションの索引からの削除
+"""
+from app.services.bot_service import BotPlatform, BotService, BotSession, BotStatus
+from app.timezone import jst_now
+
+
+def add_session(service: BotService, session_id: str, meeting_id: str) -> BotSession:
+    now = jst_now()
+    session = BotSession(
+        id=session_id,
+        meeting_id=meeting_id,
+        meeting_password=None,
+        status=BotStatus.PENDING,
+        created_at=now,
+        updated_at=now,
+        platform=BotPlatform.ZOOM,
+    )
+    service._sessions[session_id] = session
+    service._by_meeting[meeting_id].add(session_id)
+    return session
+
+
+class TestGetSessionsByMeeting:
+    def test_expired_sessions_are_pruned_from_index(self):
+        service = BotService()
+        add_session(service, "s1", "123")
+        alive = add_session(service, "s2", "123")
+        # TTL 切れで破棄されたのと同じ状態にする
+        del service._sessions["s1"]
+
+        assert service.get_sessions_by_meeting("123") == [alive]
+        assert service._by_meeting["123"] == {"s2"}
+
+    def test_index_entry_removed_when_all_expired(self):
+        service = BotService()
+        add_session(service, "s1", "123")
+        del service._sessions["s1"]
+
+        assert service.get_sessions_by_meeting("123") == []
+        assert "123" not in service._by_meeting
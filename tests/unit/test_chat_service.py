@@ -152,6 +152,11 @@ class TestSendMessage:
         # ジェネレータを消費
         chunks = list(gen)
         assert chunks == ["chunk1", "chunk2"]
+        # 完了時にユーザーメッセージとアシスタントメッセージがまとめて保存されること
+        messages = db_session.query(ChatMessage).filter(
+            ChatMessage.session_id == session.session_id
+        ).all()
+        assert [(m.role, m.content) for m in messages] == [("user", "テスト"), ("assistant", "chunk1chunk2")]
 
     def test_job_not_found_during_send(self, db_session, monkeypatch):
         """C1: send_message 中に job/summary 未発見"""
@@ -227,6 +232,28 @@ class TestBuildContext:
         assert context[-1]["content"] == "新しい質問"
 
 
+    def test_history_limited_to_latest_five_in_order(self, db_session, monkeypatch):
+        """C1: 過去メッセージが5件超 → 最新5件のみを古い順に含む"""
+        create_job(db_session, job_id="job-hist-limit")
+        monkeypatch.setattr(
+            "app.services.chat_service.get_azure_openai_service",
+            lambda: build_openai_service(),
+        )
+        svc = ChatService(db_session)
+        session = svc.create_session("job-hist-limit")
+        db_session.add_all([
+            ChatMessage(
+                message_id=f"msg-limit-{i}",
+                session_id=session.session_id,
+                role="user" if i % 2 == 0 else "assistant",
+                content=f"履歴{i}",
+            )
+            for i in range(7)
+        ])
+        db_session.commit()
+        context = svc.build_context(session.session_id, "元の要約", "新しい質問")
+        assert [m["content"] for m in context[1:-1]] == [f"履歴{i}" for i in range(2, 7)]
+
 # ============================================================
 # get_messages
 # ============================================================
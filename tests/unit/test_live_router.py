@@ -0,0 +1,118 @@
+"""
+live_router.py のユニットテスト
+
+C0: get_segments の正常系, ETag による 304, finalize_session, stream_segments
+C1: 非 ASCII のセッションID / since_id, 保持上限で破棄されたセグメントの通知,
+    購読直後に追加されたセグメントの重複送信
+"""
+from collections import deque
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.database import get_db
+from app.models.job import Job
+from app.routers import live_router
+from app.services.live_transcription_service import LiveTranscriptionService
+
+
+@pytest.fixture()
+def client(monkeypatch, db_session):
+    service = LiveTranscriptionService()
+    monkeypatch.setattr(live_router, "live_transcription_service", service)
+
+    async def noop_summarize(job_id):
+        return None
+
+    monkeypatch.setattr(live_router, "auto_summarize_background", noop_summarize)
+    app = FastAPI()
+    app.include_router(live_router.router)
+    app.dependency_overrides[get_db] = lambda: db_session
+    return TestClient(app), service
+
+
+class TestGetSegments:
+    def test_non_ascii_session_and_since_id(self, client):
+        test_client, service = client
+        service.create_session("会議", "123")
+        service.add_segment("会議", "田中", "こんにちは")
+
+        response = test_client.get("/api/live/segments/会議", params={"since_id": "日本"})
+
+        assert response.status_code == 200
+        assert response.json()["total_count"] == 1
+        assert response.headers["etag"].isascii()
+
+    def test_matching_etag_returns_304(self, client):
+        test_client, service = client
+        service.create_session("s1", "123")
+        service.add_segment("s1", "田中", "こんにちは")
+
+        etag = test_client.get("/api/live/segments/s1").headers["etag"]
+        response = test_client.get("/api/live/segments/s1", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+        service.add_segment("s1", "田中", "追加")
+        response = test_client.get("/api/live/segments/s1", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+
+
+class TestStreamSegments:
+    def test_segment_added_right_after_subscribe_is_sent_once(self, client, monkeypatch):
+        test_client, service = client
+        service.create_session("s1", "123")
+        service.add_segment("s1", "田中", "既存")
+        subscribe = service.subscribe
+
+        def subscribe_then_add(session_id):
+            queue = subscribe(session_id)
+            # 購読直後に別スレッドから追加された状況を再現
+            service.add_segment(session_id, "佐藤", "購読直後")
+            return queue
+
+        monkeypatch.setattr(service, "subscribe", subscribe_then_add)
+
+        with test_client.websocket_connect("/api/live/ws/s1") as ws:
+            assert ws.receive_json()["text"] == "既存"
+            assert ws.receive_json()["text"] == "購読直後"
+            test_client.post("/api/live/segments/s1/push", json={"speaker": "田中", "text": "新着"})
+            assert ws.receive_json()["text"] == "新着"
+
+    def test_unknown_session_is_rejected(self, client):
+        test_client, _ = client
+        with pytest.raises(WebSocketDisconnect):
+            with test_client.websocket_connect("/api/live/ws/missing") as ws:
+                ws.receive_json()
+
+
+class TestFinalizeSession:
+    def test_saves_transcription(self, client, db_session):
+        test_client, service = client
+        service.create_session("s1", "123")
+        service.add_segment("s1", "田中", "こんにちは", time_str="10:00")
+
+        body = test_client.post("/api/live/segments/s1/finalize").json()
+
+        job = db_session.query(Job).filter(Job.job_id == body["job_id"]).one()
+        assert job.transcription == "[10:00 田中]: こんにちは"
+        assert body["segment_count"] == 1
+        assert body["evicted_segment_count"] == 0
+
+    def test_flags_evicted_segments(self, client, db_session):
+        test_client, service = client
+        session = service.create_session("s1", "123")
+        session.segments = deque(maxlen=2)
+        for i in range(3):
+            service.add_segment("s1", "田中", f"発言{i}", time_str="10:00")
+
+        body = test_client.post("/api/live/segments/s1/finalize").json()
+
+        job = db_session.query(Job).filter(Job.job_id == body["job_id"]).one()
+        assert body["evicted_segment_count"] == 1
+        assert job.transcription.splitlines() == [
+            "（会議冒頭の 1 件の発言は保持上限を超えたため含まれていません）",
+            "[10:00 田中]: 発言1",
+            "[10:00 田中]: 発言2",
+        ]
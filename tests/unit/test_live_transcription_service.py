@@ -0,0 +1,215 @@
+"""
+live_transcription_service.py のユニットテスト
+
+C0: create_session, add_segment, get_segments, clear_session, subscribe, set_speaker_mapping,
+    get_unique_speakers, reap_idle_sessions の正常系
+C1: since_id 指定有無, 未知の since_id, limit 適用, セッション未発見, リングバッファ上限, 別スレッドからの配信,
+    別スレッドからの追加中の走査
+"""
+import asyncio
+import threading
+from collections import deque
+
+from app.services.live_transcription_service import LiveTranscriptionService
+
+
+def build_service_with_segments(count=3):
+    svc = LiveTranscriptionService()
+    svc.create_session("s1", "123")
+    segments = [svc.add_segment("s1", "田中", f"発言{i}") for i in range(count)]
+    return svc, segments
+
+
+class TestGetSegments:
+    def test_without_since_id_returns_all(self):
+        svc, segments = build_service_with_segments()
+        assert [s.id for s in svc.get_segments("s1")] == [s.id for s in segments]
+
+    def test_since_id_returns_following_segments(self):
+        svc, segments = build_service_with_segments()
+        result = svc.get_segments("s1", since_id=segments[0].id)
+        assert [s.id for s in result] == [segments[1].id, segments[2].id]
+
+    def test_since_latest_id_returns_empty(self):
+        svc, segments = build_service_with_segments()
+        assert svc.get_segments("s1", since_id=segments[-1].id) == []
+
+    def test_unknown_since_id_returns_all(self):
+        svc, segments = build_service_with_segments()
+        assert len(svc.get_segments("s1", since_id="unknown")) == len(segments)
+
+    def test_limit_keeps_latest(self):
+        svc, segments = build_service_with_segments(5)
+        result = svc.get_segments("s1", limit=2)
+        assert [s.id for s in result] == [segments[3].id, segments[4].id]
+
+    def test_unknown_session_returns_empty(self):
+        svc = LiveTranscriptionService()
+        assert svc.get_segments("missing") == []
+
+    def test_ring_buffer_evicts_oldest(self):
+        svc = LiveTranscriptionService()
+        session = svc.create_session("s1", "123")
+        session.segments = deque(maxlen=3)
+        segments = [svc.add_segment("s1", "田中", f"発言{i}") for i in range(5)]
+
+        assert [s.id for s in svc.get_segments("s1")] == [s.id for s in segments[2:]]
+        assert session.evicted_count == 2
+        # 保持中の ID からの差分
+        assert [s.id for s in svc.get_segments("s1", since_id=segments[3].id)] == [segments[4].id]
+        # 破棄済みの ID は先頭から返す
+        assert len(svc.get_segments("s1", since_id=segments[0].id)) == 3
+
+    def test_snapshot_while_other_thread_appends(self):
+        svc, _ = build_service_with_segments(0)
+        stop = threading.Event()
+
+        def produce():
+            while not stop.is_set():
+                svc.add_segment("s1", "田中", "発言")
+
+        thread = threading.Thread(target=produce)
+        thread.start()
+        try:
+            for _ in range(2000):
+                svc.snapshot_segments("s1")
+                svc.get_segments("s1", limit=500)
+        finally:
+            stop.set()
+            thread.join()
+
+
+class TestSetSpeakerMapping:
+    def test_mapping_refreshes_cached_dict(self):
+        svc = LiveTranscriptionService()
+        svc.create_session("s1", "123")
+        segment = svc.add_segment("s1", "Guest-1", "こんにちは", speaker_id="Guest-1")
+        assert segment.to_dict()["speaker"] == "Guest-1"
+
+        assert svc.set_speaker_mapping("s1", {"Guest-1": "田中太郎"}) is True
+        assert segment.to_dict()["speaker"] == "田中太郎"
+        assert segment.to_dict()["initials"] == "田中"
+
+    def test_only_mapped_speakers_are_renamed(self):
+        svc = LiveTranscriptionService()
+        svc.create_session("s1", "123")
+        first = svc.add_segment("s1", "Guest-1", "おはよう", speaker_id="Guest-1")
+        second = svc.add_segment("s1", "Guest-2", "こんにちは", speaker_id="Guest-2")
+
+        svc.set_speaker_mapping("s1", {"Guest-1": "田中"})
+        svc.set_speaker_mapping("s1", {"Guest-1": "田中", "Guest-2": "佐藤"})
+
+        assert (first.speaker, second.speaker) == ("田中", "佐藤")
+        # マッピング設定後に追加されたセグメントにも適用される
+        third = svc.add_segment("s1", "Guest-2", "さようなら", speaker_id="Guest-2")
+        assert third.speaker == "佐藤"
+
+    def test_mapping_mutated_in_place(self):
+        svc = LiveTranscriptionService()
+        svc.create_session("s1", "123")
+        segment = svc.add_segment("s1", "Guest-1", "こんにちは", speaker_id="Guest-1")
+        svc.set_speaker_mapping("s1", {})
+
+        mapping = svc.get_speaker_mapping("s1")
+        mapping["Guest-1"] = "田中"
+        svc.set_speaker_mapping("s1", mapping)
+        assert segment.speaker == "田中"
+
+
+class TestGetUniqueSpeakers:
+    def test_speakers_in_first_appearance_order(self):
+        svc = LiveTranscriptionService()
+        svc.create_session("s1", "123")
+        svc.add_segment("s1", "Guest-2", "a", speaker_id="Guest-2")
+        svc.add_segment("s1", "Guest-1", "b", speaker_id="Guest-1")
+        svc.add_segment("s1", "Guest-2", "c", speaker_id="Guest-2")
+        svc.add_segment("s1", "田中", "d")
+
+        assert svc.get_unique_speakers("s1") == [
+            {"speaker_id": "Guest-2", "label": "Guest-2", "mapped_name": ""},
+            {"speaker_id": "Guest-1", "label": "Guest-1", "mapped_name": ""},
+            {"speaker_id": "", "label": "田中", "mapped_name": ""},
+        ]
+
+    def test_mapping_updates_and_clears_mapped_name(self):
+        svc = LiveTranscriptionService()
+        svc.create_session("s1", "123")
+        svc.add_segment("s1", "Guest-1", "a", speaker_id="Guest-1")
+
+        svc.set_speaker_mapping("s1", {"Guest-1": "田中"})
+        assert svc.get_unique_speakers("s1") == [
+            {"speaker_id": "Guest-1", "label": "田中", "mapped_name": "田中"},
+        ]
+
+        svc.set_speaker_mapping("s1", {})
+        assert svc.get_unique_speakers("s1")[0]["mapped_name"] == ""
+
+    def test_unknown_session_returns_empty(self):
+        svc = LiveTranscriptionService()
+        assert svc.get_unique_speakers("missing") == []
+
+
+class TestClearSession:
+    def test_clear_removes_session(self):
+        svc, _ = build_service_with_segments()
+        assert svc.clear_session("s1") is True
+        assert svc.get_session("s1") is None
+        assert svc.get_segments("s1") == []
+
+    def test_clear_unknown_session(self):
+        svc = LiveTranscriptionService()
+        assert svc.clear_session("missing") is False
+
+
+class TestReapIdleSessions:
+    def test_only_idle_sessions_are_removed(self):
+        svc = LiveTranscriptionService()
+        idle = svc.create_session("idle", "1")
+        svc.create_session("active", "2")
+        idle.last_activity -= 3600
+
+        assert svc.reap_idle_sessions(idle_seconds=1800) == 1
+        assert svc.get_session("idle") is None
+        assert svc.get_session("active") is not None
+
+    def test_activity_refreshes_session(self):
+        svc = LiveTranscriptionService()
+        session = svc.create_session("s1", "1")
+        session.last_activity -= 3600
+        svc.add_segment("s1", "田中", "発言")
+
+        assert svc.reap_idle_sessions(idle_seconds=1800) == 0
+
+
+class TestSubscribe:
+    async def test_added_segment_is_pushed(self):
+        svc, _ = build_service_with_segments(0)
+        queue = svc.subscribe("s1")
+        segment = svc.add_segment("s1", "田中", "こんにちは")
+        assert queue.get_nowait() == segment.to_dict()
+
+    async def test_push_from_other_thread(self):
+        svc, _ = build_service_with_segments(0)
+        queue = svc.subscribe("s1")
+        thread = threading.Thread(target=svc.add_segment, args=("s1", "田中", "別スレッド"))
+        thread.start()
+        thread.join()
+        payload = await asyncio.wait_for(queue.get(), timeout=1)
+        assert payload["text"] == "別スレッド"
+
+    async def test_unsubscribed_queue_receives_nothing(self):
+        svc, _ = build_service_with_segments(0)
+        queue = svc.subscribe("s1")
+        svc.unsubscribe("s1", queue)
+        svc.add_segment("s1", "田中", "こんにちは")
+        assert queue.empty()
+
+    async def test_clear_session_notifies_end(self):
+        svc, _ = build_service_with_segments(0)
+        queue = svc.subscribe("s1")
+        svc.clear_session("s1")
+        assert queue.get_nowait() is None
+
+    async def test_unknown_session_returns_none(self):
+        svc = LiveTranscriptionService()
+        assert svc.subscribe("missing") is None
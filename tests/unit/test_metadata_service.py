@@ -0,0 +1,71 @@
+"""
+metadata_service.py のユニットテスト
+
+C0: extract_metadata, select_project の正常系
+C1: キャッシュヒット, キャッシュ無効, 既定日付の適用, デプロイメント振り分け経由の呼び出し
+"""
+import json
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+import app.services.metadata_service as metadata_module
+import app.services.notion_client as notion_client_module
+from app.services.metadata_service import MetadataService
+
+
+@pytest.fixture()
+def openai_service(monkeypatch):
+    content = json.dumps({"mtg_name": "定例会議", "participants": ["田中"]})
+    svc = MagicMock()
+    svc._create_chat_completion.return_value = SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content))]
+    )
+    monkeypatch.setattr(metadata_module, "get_azure_openai_service", lambda: svc)
+    return svc
+
+
+class TestExtractMetadata:
+    async def test_same_input_is_served_from_cache(self, openai_service):
+        service = MetadataService()
+        first = await service.extract_metadata("要約", "文字起こし")
+        first.participants.append("佐藤")
+        second = await service.extract_metadata("要約", "文字起こし")
+
+        assert openai_service._create_chat_completion.call_count == 1
+        assert second.mtg_name == "定例会議"
+        assert second.participants == ["田中"]
+
+    async def test_different_input_calls_api(self, openai_service):
+        service = MetadataService()
+        await service.extract_metadata("要約A")
+        await service.extract_metadata("要約B")
+        assert openai_service._create_chat_completion.call_count == 2
+
+    async def test_cache_disabled(self, openai_service):
+        service = MetadataService(cache_enabled=False)
+        await service.extract_metadata("要約")
+        await service.extract_metadata("要約")
+        assert openai_service._create_chat_completion.call_count == 2
+
+    async def test_default_date_applied_on_cache_hit(self, openai_service):
+        service = MetadataService()
+        await service.extract_metadata("要約")
+        metadata = await service.extract_metadata("要約", default_date=date(2025, 1, 2))
+        assert metadata.meeting_date == "2025-01-02"
+
+
+class TestSelectProject:
+    async def test_selection_goes_through_deployment_failover(self, openai_service, monkeypatch):
+        openai_service._create_chat_completion.return_value = SimpleNamespace(choices=[SimpleNamespace(
+            message=SimpleNamespace(content=json.dumps({"project_id": "p1", "project_name": "案件A"}))
+        )])
+        notion = MagicMock()
+        notion.list_projects = AsyncMock(return_value=[{"id": "p1", "name": "案件A"}])
+        monkeypatch.setattr(notion_client_module, "get_notion_service", lambda: notion)
+
+        assert await MetadataService().select_project("要約") == ("p1", "案件A")
+        openai_service._create_chat_completion.assert_called_once()
+        openai_service.client.chat.completions.create.assert_not_called()
@@ -0,0 +1,115 @@
+"""
+notion/content_builder.py と議事録ページ作成のユニットテスト
+
+C0: long_text_to_paragraphs, batch_blocks, create_meeting_note の正常系
+C1: rich_text の文字数境界 / 要素数境界, 空文字, ブロック数 / バイト数によるバッチ分割,
+    長い書き起こしの分割追記
+"""
+from unittest.mock import AsyncMock, MagicMock
+
+import orjson
+
+from app.services.notion.content_builder import (
+    RICH_TEXT_MAX_CHARS,
+    RICH_TEXT_MAX_ITEMS,
+    batch_blocks,
+    long_text_to_paragraphs,
+)
+from app.services.notion.meeting_service import NotionMeetingService
+
+
+def rich_text_lengths(block):
+    return [len(item["text"]["content"]) for item in block["paragraph"]["rich_text"]]
+
+
+def joined_text(blocks):
+    return "".join(
+        item["text"]["content"] for block in blocks for item in block["paragraph"]["rich_text"]
+    )
+
+
+class TestLongTextToParagraphs:
+    def test_empty_text_gives_one_empty_paragraph(self):
+        blocks = long_text_to_paragraphs("")
+        assert len(blocks) == 1
+        assert blocks[0]["paragraph"]["rich_text"] == []
+
+    def test_exact_max_chars_fits_one_item(self):
+        blocks = long_text_to_paragraphs("あ" * RICH_TEXT_MAX_CHARS)
+        assert rich_text_lengths(blocks[0]) == [RICH_TEXT_MAX_CHARS]
+
+    def test_one_char_over_max_chars_starts_new_item(self):
+        blocks = long_text_to_paragraphs("あ" * (RICH_TEXT_MAX_CHARS + 1))
+        assert rich_text_lengths(blocks[0]) == [RICH_TEXT_MAX_CHARS, 1]
+
+    def test_exact_max_items_fits_one_paragraph(self):
+        text = "あ" * (RICH_TEXT_MAX_CHARS * RICH_TEXT_MAX_ITEMS)
+        blocks = long_text_to_paragraphs(text)
+        assert len(blocks) == 1
+        assert len(blocks[0]["paragraph"]["rich_text"]) == RICH_TEXT_MAX_ITEMS
+
+    def test_one_char_over_max_items_starts_new_paragraph(self):
+        text = "あ" * (RICH_TEXT_MAX_CHARS * RICH_TEXT_MAX_ITEMS + 1)
+        blocks = long_text_to_paragraphs(text)
+        assert len(blocks) == 2
+        assert len(blocks[0]["paragraph"]["rich_text"]) == RICH_TEXT_MAX_ITEMS
+        assert rich_text_lengths(blocks[1]) == [1]
+        assert joined_text(blocks) == text
+
+    def test_max_items_argument(self):
+        blocks = long_text_to_paragraphs("あ" * (RICH_TEXT_MAX_CHARS * 5), max_items=2)
+        assert [len(b["paragraph"]["rich_text"]) for b in blocks] == [2, 2, 1]
+
+
+class TestBatchBlocks:
+    def test_split_by_block_count(self):
+        blocks = [long_text_to_paragraphs("a")[0] for _ in range(250)]
+        assert [len(b) for b in batch_blocks(blocks)] == [100, 100, 50]
+
+    def test_split_by_bytes(self):
+        blocks = long_text_to_paragraphs("あ" * (RICH_TEXT_MAX_CHARS * 6), max_items=2)
+        size = len(orjson.dumps(blocks[0]))
+        batches = list(batch_blocks(blocks, max_bytes=size * 2))
+        assert [len(b) for b in batches] == [2, 1]
+
+    def test_empty_input(self):
+        assert list(batch_blocks([])) == []
+
+
+class TestCreateMeetingNote:
+    def build_service(self):
+        service = NotionMeetingService.__new__(NotionMeetingService)
+        service.enabled = True
+        service.database_id = "db"
+        service.client = MagicMock()
+        service.client.pages.create = AsyncMock(return_value={"id": "page", "url": "https://notion.so/page"})
+        service.client.blocks.children.append = AsyncMock(return_value={"results": [{"id": "toggle"}]})
+        return service
+
+    async def test_short_transcript_uses_single_append(self):
+        service = self.build_service()
+        result = await service.create_meeting_note("定例", "こんにちは", "## 要約\n内容", "a.wav")
+
+        assert result == ("page", "https://notion.so/page")
+        append = service.client.blocks.children.append
+        assert append.await_count == 1
+        toggle = append.await_args.kwargs["children"][0]
+        assert append.await_args.kwargs["block_id"] == "page"
+        assert toggle["type"] == "toggle"
+        assert joined_text(toggle["toggle"]["children"]) == "こんにちは"
+
+    async def test_long_transcript_is_appended_in_batches(self):
+        service = self.build_service()
+        transcription = "あ" * 1_000_000
+        await service.create_meeting_note("定例", transcription, "## 要約\n内容", "a.wav")
+
+        calls = service.client.blocks.children.append.await_args_list
+        toggle = calls[0].kwargs["children"][0]
+        appended = [toggle["toggle"]["children"]] + [c.kwargs["children"] for c in calls[1:]]
+
+        assert len(calls) > 1
+        assert all(c.kwargs["block_id"] == "toggle" for c in calls[1:])
+        for batch in appended:
+            assert len(batch) <= 100
+            assert len(orjson.dumps(batch)) <= 500_000
+        assert joined_text([b for batch in appended for b in batch]) == transcription
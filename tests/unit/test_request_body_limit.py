@@ -0,0 +1,71 @@
+"""
+main.py の RequestBodySizeLimitMiddleware のユニットテスト
+
+C0: 上限以内のリクエストの通過
+C1: Content-Length 超過, Content-Length なし（chunked）での超過, multipart アップロードでの超過
+"""
+import pytest
+from fastapi import FastAPI, Request, UploadFile
+from fastapi.testclient import TestClient
+
+from app.main import RequestBodySizeLimitMiddleware
+
+LIMIT = 1024
+
+
+@pytest.fixture()
+def client():
+    app = FastAPI()
+    app.add_middleware(RequestBodySizeLimitMiddleware, max_body_bytes=LIMIT)
+
+    @app.post("/echo")
+    async def echo(request: Request):
+        return {"size": len(await request.body())}
+
+    @app.post("/upload")
+    async def upload(file: UploadFile):
+        return {"size": len(await file.read())}
+
+    return TestClient(app)
+
+
+def chunked(total: int, chunk: int = 256):
+    for _ in range(total // chunk):
+        yield b"x" * chunk
+
+
+def test_body_within_limit_passes(client):
+    response = client.post("/echo", content=b"x" * LIMIT)
+    assert response.status_code == 200
+    assert response.json() == {"size": LIMIT}
+
+
+def test_content_length_over_limit_is_rejected(client):
+    response = client.post("/echo", content=b"x" * (LIMIT + 1))
+    assert response.status_code == 413
+
+
+def test_chunked_body_over_limit_is_rejected(client):
+    response = client.post("/echo", content=chunked(LIMIT * 4))
+    assert response.status_code == 413
+
+
+def test_chunked_body_within_limit_passes(client):
+    response = client.post("/echo", content=chunked(LIMIT))
+    assert response.status_code == 200
+    assert response.json() == {"size": LIMIT}
+
+
+def test_chunked_multipart_over_limit_is_rejected(client):
+    boundary = b"testboundary"
+    body = (
+        b"--" + boundary + b"\r\n"
+        b'Content-Disposition: form-data; name="file"; filename="a.wav"\r\n'
+        b"Content-Type: audio/wav\r\n\r\n" + b"x" * (LIMIT * 4) + b"\r\n--" + boundary + b"--\r\n"
+    )
+    response = client.post(
+        "/upload",
+        content=(body[i:i + 256] for i in range(0, len(body), 256)),
+        headers={"Content-Type": "multipart/form-data; boundary=testboundary"},
+    )
+    assert response.status_code == 413
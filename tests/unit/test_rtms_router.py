@@ -0,0 +1,66 @@
+"""
+rtms_router.py のユニットテスト
+
+C0: rtms.started の処理
+C1: 再送の重複スキップ, 起動失敗後の再送
+"""
+from unittest.mock import AsyncMock
+
+import orjson
+import pytest
+
+from app.routers import rtms_router
+
+
+class DummyRequest:
+    def __init__(self, body: bytes):
+        self._body = body
+        self.headers = {}
+
+    async def body(self) -> bytes:
+        return self._body
+
+
+def build_started_request() -> DummyRequest:
+    return DummyRequest(orjson.dumps({
+        "event": "rtms.started",
+        "payload": {
+            "object": {
+                "meeting_id": "123",
+                "start_time": "2025-01-01T00:00:00Z",
+                "rtms": {"stream_url": "wss://example.com/stream"},
+            }
+        },
+    }))
+
+
+@pytest.fixture(autouse=True)
+def no_signature_check(monkeypatch):
+    monkeypatch.setattr(rtms_router.settings, "ZOOM_WEBHOOK_SECRET_TOKEN", "")
+    rtms_router._processed_events.clear()
+    yield
+    rtms_router._processed_events.clear()
+
+
+async def test_retried_event_is_deduped(monkeypatch):
+    start_session = AsyncMock()
+    monkeypatch.setattr(rtms_router.rtms_manager, "start_session", start_session)
+
+    first = await rtms_router.rtms_webhook(build_started_request())
+    second = await rtms_router.rtms_webhook(build_started_request())
+
+    assert first == {"status": "ok"}
+    assert second == {"status": "ok", "deduped": True}
+    start_session.assert_awaited_once()
+
+
+async def test_retry_after_start_failure_is_processed(monkeypatch):
+    start_session = AsyncMock(side_effect=[RuntimeError("connect failed"), None])
+    monkeypatch.setattr(rtms_router.rtms_manager, "start_session", start_session)
+
+    with pytest.raises(RuntimeError):
+        await rtms_router.rtms_webhook(build_started_request())
+    retried = await rtms_router.rtms_webhook(build_started_request())
+
+    assert retried == {"status": "ok"}
+    assert start_session.await_count == 2
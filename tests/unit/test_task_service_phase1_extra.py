@@ -277,8 +277,8 @@ async def test_delete_task_wraps_unexpected_exception(monkeypatch):
     assert "delete failed" in exc_info.value.detail
 
 
-def test_get_task_service_returns_singleton(monkeypatch):
-    monkeypatch.setattr(task_service_module, "_task_service", None)
+def test_get_task_service_returns_singleton():
+    task_service_module.get_task_service.cache_clear()
 
     first = task_service_module.get_task_service()
     second = task_service_module.get_task_service()
@@ -0,0 +1,109 @@
+"""
+transcribe.py ルーターのユニットテスト
+
+C0: transcribe_audio, transcribe_stream の正常系
+C1: 同一ジョブへの同時リクエスト, 送信失敗時の FAILED 記録, 未知のジョブ,
+    配信開始前の切断
+"""
+from unittest.mock import MagicMock
+
+import orjson
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm import sessionmaker
+
+from app.models.job import Job, JobStatus
+from app.routers import transcribe
+
+
+@pytest.fixture()
+def uploaded_job(db_session):
+    job = Job(job_id="job-1", filename="a.wav", file_size=1, blob_name="blob-a",
+              status=JobStatus.UPLOADED.value)
+    db_session.add(job)
+    db_session.commit()
+    return job
+
+
+@pytest.fixture()
+def blob_service(monkeypatch):
+    service = MagicMock()
+    service.get_blob_sas_url.return_value = "https://blob/a.wav?sas"
+    monkeypatch.setattr(transcribe, "get_blob_storage_service", lambda: service)
+    return service
+
+
+def patch_submit(monkeypatch, submit):
+    batch_service = MagicMock()
+    batch_service.submit_transcription_async = submit
+    monkeypatch.setattr(transcribe, "get_azure_speech_batch_service", lambda: batch_service)
+
+
+async def test_concurrent_request_cannot_submit_twice(db_session, uploaded_job, blob_service, monkeypatch):
+    submitted = []
+
+    async def submit(blob_sas_url):
+        # 送信中に同じジョブへ 2 件目のリクエストが届く
+        with pytest.raises(HTTPException) as exc_info:
+            await transcribe.transcribe_audio(transcribe.TranscribeRequest(job_id="job-1"), db=db_session)
+        assert exc_info.value.status_code == 400
+        submitted.append(blob_sas_url)
+        return "batch-1"
+
+    patch_submit(monkeypatch, submit)
+    response = await transcribe.transcribe_audio(transcribe.TranscribeRequest(job_id="job-1"), db=db_session)
+
+    assert response["transcription_job_id"] == "batch-1"
+    assert submitted == ["https://blob/a.wav?sas"]
+    db_session.refresh(uploaded_job)
+    assert uploaded_job.status == JobStatus.TRANSCRIBING.value
+    assert uploaded_job.transcription_job_id == "batch-1"
+
+
+async def test_submit_failure_marks_job_failed(db_session, uploaded_job, blob_service, monkeypatch):
+    async def submit(blob_sas_url):
+        raise RuntimeError("speech unavailable")
+
+    patch_submit(monkeypatch, submit)
+    with pytest.raises(HTTPException) as exc_info:
+        await transcribe.transcribe_audio(transcribe.TranscribeRequest(job_id="job-1"), db=db_session)
+
+    assert exc_info.value.status_code == 500
+    db_session.refresh(uploaded_job)
+    assert uploaded_job.status == JobStatus.FAILED.value
+    assert uploaded_job.error_message == "speech unavailable"
+
+
+async def test_unknown_job_returns_404(db_session, blob_service):
+    with pytest.raises(HTTPException) as exc_info:
+        await transcribe.transcribe_audio(transcribe.TranscribeRequest(job_id="missing"), db=db_session)
+    assert exc_info.value.status_code == 404
+
+
+class TestTranscribeStream:
+    async def test_unknown_job_returns_404(self, db_session):
+        with pytest.raises(HTTPException) as exc_info:
+            await transcribe.transcribe_stream("missing", db=db_session)
+        assert exc_info.value.status_code == 404
+        assert "missing" not in transcribe._stream_subscribers
+
+    async def test_disconnect_before_first_event_leaves_no_subscriber(self, db_session, uploaded_job):
+        response = await transcribe.transcribe_stream("job-1", db=db_session)
+        await response.body_iterator.aclose()
+
+        assert "job-1" not in transcribe._stream_subscribers
+        assert "job-1" not in transcribe._stream_watchers
+
+    async def test_finished_job_streams_final_status(self, db_session, test_engine, uploaded_job, monkeypatch):
+        uploaded_job.status = JobStatus.TRANSCRIBED.value
+        uploaded_job.transcription = "こんにちは"
+        db_session.commit()
+        monkeypatch.setattr(transcribe, "SessionLocal", sessionmaker(bind=test_engine))
+
+        response = await transcribe.transcribe_stream("job-1", db=db_session)
+        chunks = [chunk async for chunk in response.body_iterator]
+
+        assert [orjson.loads(chunk.removeprefix(b"data: ")) for chunk in chunks] == [
+            {"job_id": "job-1", "status": JobStatus.TRANSCRIBED.value, "transcription": "こんにちは"}
+        ]
+        assert "job-1" not in transcribe._stream_subscribers
@@ -1,4 +1,5 @@
-from unittest.mock import MagicMock
+import io
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 from fastapi import HTTPException
@@ -12,6 +13,7 @@ class DummyUploadFile:
         self.filename = filename
         self.content_type = content_type
         self._data = data
+        self.file = io.BytesIO(data)
         self.size = len(data) if size is None else size
 
     async def read(self) -> bytes:
@@ -40,9 +42,10 @@ async def test_upload_audio_stores_audio_file_without_extraction(db_session, mon
     assert job.filename == "meeting.wav"
     assert job.status == JobStatus.UPLOADED.value
     blob_service.upload_file.assert_called_once_with(
-        file_data=b"audio-bytes",
+        file_data=file.file,
         filename="meeting.wav",
         content_type="audio/wav",
+        length=len(b"audio-bytes"),
     )
 
 
@@ -82,7 +85,7 @@ async def test_upload_audio_extracts_audio_from_video(db_session, monkeypatch):
 
     audio_extractor = MagicMock()
     audio_extractor.is_video_file.return_value = True
-    audio_extractor.extract_audio.return_value = (b"wav-bytes", "meeting.wav")
+    audio_extractor.extract_audio_async = AsyncMock(return_value=(b"wav-bytes", "meeting.wav"))
 
     monkeypatch.setattr(upload, "get_blob_storage_service", lambda: blob_service)
     monkeypatch.setattr(upload, "get_audio_extractor", lambda: audio_extractor)
@@ -99,6 +102,7 @@ async def test_upload_audio_extracts_audio_from_video(db_session, monkeypatch):
         file_data=b"wav-bytes",
         filename="meeting.wav",
         content_type="audio/wav",
+        length=len(b"wav-bytes"),
     )
 
 
@@ -108,7 +112,7 @@ async def test_upload_audio_marks_job_failed_when_extraction_fails(db_session, m
 
     audio_extractor = MagicMock()
     audio_extractor.is_video_file.return_value = True
-    audio_extractor.extract_audio.side_effect = RuntimeError("ffmpeg failed")
+    audio_extractor.extract_audio_async = AsyncMock(side_effect=RuntimeError("ffmpeg failed"))
 
     monkeypatch.setattr(upload, "get_blob_storage_service", lambda: blob_service)
     monkeypatch.setattr(upload, "get_audio_extractor", lambda: audio_extractor)
@@ -147,3 +151,23 @@ async def test_upload_audio_marks_job_failed_when_blob_upload_fails(db_session,
     assert exc_info.value.detail == "Failed to upload file"
     assert job.status == JobStatus.FAILED.value
     assert job.error_message == "blob failure"
+
+
+@pytest.mark.asyncio
+async def test_upload_audio_job_is_visible_while_uploading(db_session, monkeypatch):
+    seen_statuses = []
+
+    def upload_file(**kwargs):
+        seen_statuses.append(db_session.query(Job.status).scalar())
+        return ("blob-audio", "https://example.com/blob-audio")
+
+    blob_service = MagicMock()
+    blob_service.upload_file.side_effect = upload_file
+
+    monkeypatch.setattr(upload, "get_blob_storage_service", lambda: blob_service)
+    monkeypatch.setattr(upload, "get_audio_extractor", lambda: MagicMock())
+
+    await upload.upload_audio(file=DummyUploadFile("meeting.wav", "audio/wav", b"audio-bytes"), db=db_session)
+
+    assert seen_statuses == [JobStatus.UPLOADING.value]
+    assert db_session.query(Job).one().status == JobStatus.UPLOADED.value
@@ -6,7 +6,7 @@ from types import ModuleType, SimpleNamespace
 from unittest.mock import AsyncMock
 
 import pytest
-from fastapi import HTTPException
+from fastapi import BackgroundTasks, HTTPException
 
 from app.routers import zoom_webhook as webhook
 
@@ -42,6 +42,15 @@ def test_verify_zoom_signature_returns_true_for_valid_signature():
     assert result is True
 
 
+@pytest.mark.parametrize("signature", ["invalid", "v0=not-hex", "v0=abcd"])
+def test_verify_zoom_signature_returns_false_for_malformed_signature(signature):
+    body = b'{"event":"meeting.started"}'
+
+    result = webhook.verify_zoom_signature(body, "1700000000", signature, "secret-token")
+
+    assert result is False
+
+
 def test_create_challenge_response_returns_expected_hash():
     response = webhook.create_challenge_response("plain-token", "secret-token")
     expected_hash = hmac.new(
@@ -59,19 +68,31 @@ async def test_zoom_webhook_rejects_invalid_json():
     request = DummyRequest(b"{invalid")
 
     with pytest.raises(HTTPException) as exc_info:
-        await webhook.zoom_webhook(request)
+        await webhook.verified_zoom_body(request)
 
     assert exc_info.value.status_code == 400
     assert exc_info.value.detail == "Invalid JSON payload"
 
 
+@pytest.mark.asyncio
+async def test_zoom_webhook_rejects_payload_with_invalid_schema():
+    request = DummyRequest(b'{"event": "meeting.started", "payload": []}')
+
+    with pytest.raises(HTTPException) as exc_info:
+        await webhook.verified_zoom_body(request)
+
+    assert exc_info.value.status_code == 400
+    assert exc_info.value.detail == "Invalid webhook payload"
+
+
 @pytest.mark.asyncio
 async def test_zoom_webhook_rejects_crc_without_plain_token():
     body = json.dumps({"event": "endpoint.url_validation", "payload": {}}).encode("utf-8")
     request = DummyRequest(body)
+    webhook_payload = await webhook.verified_zoom_body(request)
 
     with pytest.raises(HTTPException) as exc_info:
-        await webhook.zoom_webhook(request)
+        await webhook.zoom_webhook(BackgroundTasks(), webhook_payload)
 
     assert exc_info.value.status_code == 400
     assert exc_info.value.detail == "plainToken not found"
@@ -88,7 +109,7 @@ async def test_zoom_webhook_returns_crc_response(monkeypatch):
     ).encode("utf-8")
     request = DummyRequest(body)
 
-    response = await webhook.zoom_webhook(request)
+    response = await webhook.zoom_webhook(BackgroundTasks(), await webhook.verified_zoom_body(request))
 
     assert response.plainToken == "plain-token"
     assert response.encryptedToken == hmac.new(
@@ -110,17 +131,39 @@ async def test_zoom_webhook_continues_when_signature_is_invalid(monkeypatch):
     body = json.dumps({"event": "meeting.ended", "payload": {"object": {"id": "123"}}}).encode("utf-8")
     request = DummyRequest(body)
 
-    response = await webhook.zoom_webhook(
+    webhook_payload = await webhook.verified_zoom_body(
         request,
         x_zm_request_timestamp="1700000000",
         x_zm_signature="invalid",
     )
+    background_tasks = BackgroundTasks()
+    response = await webhook.zoom_webhook(background_tasks, webhook_payload)
+    await background_tasks()
 
-    assert response["status"] == "success"
+    assert response["status"] == "accepted"
     assert response["event"] == "meeting.ended"
     webhook.handle_meeting_ended.assert_awaited_once()
 
 
+@pytest.mark.asyncio
+async def test_zoom_webhook_skips_redelivered_meeting_event(monkeypatch):
+    monkeypatch.setattr(webhook, "_accepted_events", {})
+    monkeypatch.setattr(webhook, "handle_meeting_ended", AsyncMock())
+
+    body = json.dumps(
+        {"event": "meeting.ended", "event_ts": 1700000000000, "payload": {"object": {"id": "123"}}}
+    ).encode("utf-8")
+
+    background_tasks = BackgroundTasks()
+    first = await webhook.zoom_webhook(background_tasks, await webhook.verified_zoom_body(DummyRequest(body)))
+    second = await webhook.zoom_webhook(background_tasks, await webhook.verified_zoom_body(DummyRequest(body)))
+    await background_tasks()
+
+    assert first == {"status": "accepted", "event": "meeting.ended"}
+    assert second["deduped"] is True
+    webhook.handle_meeting_ended.assert_awaited_once()
+
+
 @pytest.mark.asyncio
 async def test_handle_meeting_started_dispatches_bot_when_no_active_sessions(monkeypatch):
     meeting_details = SimpleNamespace(
@@ -177,6 +220,7 @@ async def test_handle_meeting_started_skips_dispatch_when_active_session_exists(
 
     assert result.meeting_id == "12345"
     bot_service.dispatch_bot.assert_not_awaited()
+    webhook.zoom_api_service.get_meeting_details.assert_not_awaited()
 
 
 @pytest.mark.asyncio